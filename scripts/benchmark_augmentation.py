@@ -0,0 +1,77 @@
+"""Measure how cap augmentation throughput scales with the number of workers.
+
+Every image in ``--images-dir`` is augmented with an ``AugmentationPool`` of
+each size given by ``--workers``. Worker start-up and model loading are
+excluded from the timings. The script reports the throughput of each pool and
+its speedup over the first one.
+
+Usage:
+    python -m scripts.benchmark_augmentation --workers 1 2 4 8
+"""
+
+import argparse
+import asyncio
+import time
+from pathlib import Path
+
+from scripts.export_u2net import IMAGE_SUFFIXES
+from src.cap_detection.augmentation_pool import AugmentationPool
+from src.config import settings
+
+
+async def run_pool(pool: AugmentationPool, images: list[bytes], repeats: int) -> float:
+    # Start every worker and load its model before timing.
+    await asyncio.gather(*[pool.augment(images[0]) for _ in range(pool.workers)])
+
+    started = time.perf_counter()
+    for _ in range(repeats):
+        await asyncio.gather(*[pool.augment(image) for image in images])
+    elapsed = time.perf_counter() - started
+
+    return repeats * len(images) / elapsed
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images-dir", type=Path, default=Path("data/test_images"))
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument(
+        "--augmentations-per-image", type=int, default=settings.augmentations_per_image
+    )
+    parser.add_argument("--repeats", type=int, default=1)
+    args = parser.parse_args()
+
+    images = [
+        path.read_bytes()
+        for path in sorted(args.images_dir.iterdir())
+        if path.suffix.lower() in IMAGE_SUFFIXES
+    ]
+    if not images:
+        raise SystemExit(f"No images found in {args.images_dir}")
+
+    print(
+        f"images={len(images)} augmentations_per_image={args.augmentations_per_image} "
+        f"backend={settings.background_removal_backend}"
+    )
+    baseline = None
+    for workers in args.workers:
+        pool = AugmentationPool(
+            u2net_model_path=settings.background_removal_model_path,
+            augmentations_per_image=args.augmentations_per_image,
+            background_removal_backend=settings.background_removal_backend,
+            workers=workers,
+        )
+        try:
+            throughput = await run_pool(pool, images, args.repeats)
+        finally:
+            pool.shutdown()
+
+        baseline = baseline or throughput
+        print(
+            f"workers={workers}: {throughput:.2f} images/s, "
+            f"speedup={throughput / baseline:.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+"""Compare background removal backends against the fp32 U2NET baseline.
+
+Every backend whose model file exists is run over the images in
+``--images-dir``. The script reports the mean latency per image and the mean
+IoU of the binarized foreground masks against the masks of the ``u2net``
+backend.
+
+Usage:
+    python -m scripts.benchmark_background_removal --batch-size 4
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+from scripts.export_u2net import load_images
+from src.cap_detection.background_remover import (
+    BACKEND_U2NET,
+    BACKEND_U2NET_INT8,
+    BACKEND_U2NET_TORCHSCRIPT,
+    BACKEND_U2NETP,
+    BackgroundRemover,
+)
+from src.config import settings
+
+BACKEND_PATHS = {
+    BACKEND_U2NET: settings.u2net_model_path,
+    BACKEND_U2NETP: settings.u2netp_model_path,
+    BACKEND_U2NET_TORCHSCRIPT: settings.u2net_torchscript_path,
+    BACKEND_U2NET_INT8: settings.u2net_int8_model_path,
+}
+
+
+def run_backend(
+    remover: BackgroundRemover,
+    images: list[np.ndarray],
+    batch_size: int,
+    repeats: int,
+) -> tuple[list[np.ndarray], float]:
+    # Warm up kernels and allocator before timing.
+    remover.remove_background_batch(images[:batch_size])
+
+    masks: list[np.ndarray] = []
+    started = time.perf_counter()
+    for _ in range(repeats):
+        masks = []
+        for start in range(0, len(images), batch_size):
+            results = remover.remove_background_batch(
+                images[start : start + batch_size]
+            )
+            masks.extend(result[..., 3] for result in results)
+    elapsed = time.perf_counter() - started
+
+    return masks, elapsed / (repeats * len(images))
+
+
+def mask_iou(first: np.ndarray, second: np.ndarray, threshold: int = 127) -> float:
+    first_fg = first > threshold
+    second_fg = second > threshold
+    union = np.logical_or(first_fg, second_fg).sum()
+    if union == 0:
+        return 1.0
+    return float(np.logical_and(first_fg, second_fg).sum() / union)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images-dir", type=Path, default=Path("data/test_images"))
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    images = load_images(args.images_dir)
+    if not images:
+        raise SystemExit(f"No images found in {args.images_dir}")
+    if not BACKEND_PATHS[BACKEND_U2NET].exists():
+        raise SystemExit(f"Baseline model {BACKEND_PATHS[BACKEND_U2NET]} not found")
+
+    baseline: list[np.ndarray] = []
+    print(f"images={len(images)} batch_size={args.batch_size}")
+    for backend, path in BACKEND_PATHS.items():
+        if not path.exists():
+            print(f"{backend}: skipped, {path} not found")
+            continue
+
+        remover = BackgroundRemover(model_path=path, backend=backend)
+        masks, latency = run_backend(remover, images, args.batch_size, args.repeats)
+        if backend == BACKEND_U2NET:
+            baseline = masks
+        iou = np.mean([mask_iou(mask, base) for mask, base in zip(masks, baseline)])
+        print(
+            f"{backend} ({remover.device}): {latency * 1000:.1f} ms/image, "
+            f"mask IoU vs {BACKEND_U2NET}={iou:.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Measure the per-request cost of building a MinIO client and facade.
+
+Compares creating a ``MinioClientWrapper`` and ``BeerCapFacade`` for every
+request, as the API dependencies used to, with reusing one shared instance.
+When ``--bucket`` and ``--object`` are given, it also times a metadata
+round trip (``stat_object``) on a fresh client, which has to open a new
+connection, against the shared client whose pooled connection is kept alive.
+
+Usage:
+    python -m scripts.benchmark_storage_client --bucket caps-index --object caps.meta
+"""
+
+import argparse
+import time
+from typing import Callable
+
+from src.services.beer_cap_facade import BeerCapFacade
+from src.storage.minio.minio_client import MinioClientWrapper
+
+
+def time_per_call(func: Callable[[], object], repeats: int) -> float:
+    func()
+    started = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - started) / repeats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--bucket")
+    parser.add_argument("--object")
+    args = parser.parse_args()
+
+    shared = MinioClientWrapper()
+    shared_facade = BeerCapFacade(minio_wrapper=shared)
+
+    per_request = time_per_call(
+        lambda: BeerCapFacade(minio_wrapper=MinioClientWrapper()), args.repeats
+    )
+    reused = time_per_call(lambda: shared_facade, args.repeats)
+    print(
+        f"construct per request: {per_request * 1e6:.1f} us, "
+        f"shared instance: {reused * 1e6:.3f} us"
+    )
+
+    if args.bucket and args.object:
+        fresh = time_per_call(
+            lambda: MinioClientWrapper().object_exists(args.bucket, args.object),
+            args.repeats,
+        )
+        pooled = time_per_call(
+            lambda: shared.object_exists(args.bucket, args.object), args.repeats
+        )
+        print(
+            f"stat_object with new client: {fresh * 1e3:.2f} ms, "
+            f"with shared client: {pooled * 1e3:.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Compare centroid index search against exhaustive augmented aggregation.
+
+Every sampled augmented cap embedding is used as a query. The caps returned by
+the exhaustive ``augmented`` index (``faiss_k`` neighbours, aggregated per cap)
+are treated as ground truth, and the script reports how many of them the
+``centroid`` index finds, with and without the re-rank stage.
+
+Usage:
+    python -m scripts.evaluate_centroid_index --queries 500 --top-k 3
+"""
+
+import argparse
+import asyncio
+import time
+
+import faiss  # type: ignore[import-untyped]
+import numpy as np
+
+from src.cap_detection.image_querier import aggregate_hits, rerank_shortlist
+from src.cap_detection.index_builder import IndexBuilder, IndexMetadata
+from src.config import settings
+from src.db.crud.augmented_cap_crud import load_embedding_matrix
+from src.db.database import GLOBAL_ASYNC_SESSION_MAKER
+
+
+async def load_embeddings() -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    async with GLOBAL_ASYNC_SESSION_MAKER() as session:
+        aug_ids, cap_ids, embeddings = await load_embedding_matrix(session)
+
+    return embeddings, aug_ids, cap_ids
+
+
+def evaluate(
+    embeddings: np.ndarray,
+    aug_ids: np.ndarray,
+    cap_ids: np.ndarray,
+    queries: int,
+    top_k: int,
+    faiss_k: int,
+    prototypes_per_cap: int,
+    candidate_factor: int,
+) -> None:
+    builder = IndexBuilder()
+    exhaustive_index, _ = builder.build_index(embeddings, aug_ids)
+    centroid_index, centroid_blob = builder.build_centroid_index(
+        embeddings, cap_ids, prototypes_per_cap
+    )
+    # The augmented index is ID-mapped, so its labels are augmented cap IDs.
+    label_to_cap = np.full(aug_ids.max() + 1, -1, dtype=np.int32)
+    label_to_cap[aug_ids] = cap_ids
+    prototype_caps = np.asarray(
+        IndexMetadata.from_bytes(centroid_blob).ids, dtype=np.int32
+    )
+
+    normalized = embeddings.copy()
+    faiss.normalize_L2(normalized)
+
+    rng = np.random.default_rng(0)
+    sample = rng.choice(
+        len(normalized), size=min(queries, len(normalized)), replace=False
+    )
+    query_vectors = np.ascontiguousarray(normalized[sample])
+
+    exhaustive_k = min(faiss_k, exhaustive_index.ntotal)
+    centroid_k = min(top_k * candidate_factor, centroid_index.ntotal)
+
+    started = time.perf_counter()
+    ex_sims, ex_labels = exhaustive_index.search(query_vectors, exhaustive_k)
+    truth = [
+        set(aggregate_hits(sims, labels, label_to_cap, top_k))
+        for sims, labels in zip(ex_sims, ex_labels)
+    ]
+    exhaustive_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    ce_sims, ce_rows = centroid_index.search(query_vectors, centroid_k)
+    centroid = [
+        set(aggregate_hits(sims, rows, prototype_caps, top_k))
+        for sims, rows in zip(ce_sims, ce_rows)
+    ]
+    centroid_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    reranked = [
+        set(
+            rerank_shortlist(
+                vector,
+                np.unique(prototype_caps[rows[rows >= 0]]),
+                normalized,
+                cap_ids,
+                top_k,
+            )
+        )
+        for vector, rows in zip(query_vectors, ce_rows)
+    ]
+    rerank_time = centroid_time + time.perf_counter() - started
+
+    def recall(results: list[set[int]]) -> float:
+        found = sum(len(result & expected) for result, expected in zip(results, truth))
+        return found / max(sum(len(expected) for expected in truth), 1)
+
+    count = len(query_vectors)
+    print(f"vectors={len(normalized)} caps={len(np.unique(cap_ids))} queries={count}")
+    print(
+        f"exhaustive (faiss_k={exhaustive_k}): "
+        f"{exhaustive_time / count * 1000:.3f} ms/query"
+    )
+    print(
+        f"centroid (k={centroid_k}): recall@{top_k}={recall(centroid):.4f}, "
+        f"{centroid_time / count * 1000:.3f} ms/query"
+    )
+    print(
+        f"centroid + rerank: recall@{top_k}={recall(reranked):.4f}, "
+        f"{rerank_time / count * 1000:.3f} ms/query"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--faiss-k", type=int, default=10000)
+    parser.add_argument(
+        "--prototypes-per-cap", type=int, default=settings.index_prototypes_per_cap
+    )
+    parser.add_argument(
+        "--candidate-factor",
+        type=int,
+        default=settings.index_centroid_candidate_factor,
+    )
+    args = parser.parse_args()
+
+    embeddings, aug_ids, cap_ids = asyncio.run(load_embeddings())
+    evaluate(
+        embeddings,
+        aug_ids,
+        cap_ids,
+        args.queries,
+        args.top_k,
+        args.faiss_k,
+        args.prototypes_per_cap,
+        args.candidate_factor,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Export the U2NET weights as TorchScript and int8-quantized TorchScript models.
+
+The ``u2net_torchscript`` backend uses a traced and frozen copy of the fp32
+model. The ``u2net_int8`` backend uses a statically quantized copy whose
+activation ranges are calibrated on the images in ``--calibration-dir``.
+
+Usage:
+    python -m scripts.export_u2net --calibration-dir data/test_images
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import torch
+from PIL import Image
+from torch.ao.quantization import get_default_qconfig_mapping
+from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+from src.cap_detection.background_remover import U2NET_INPUT_SIZE, BackgroundRemover
+from src.config import settings
+
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png")
+
+
+def load_images(directory: Path) -> list[np.ndarray]:
+    return [
+        np.asarray(Image.open(path).convert("RGB"))
+        for path in sorted(directory.iterdir())
+        if path.suffix.lower() in IMAGE_SUFFIXES
+    ]
+
+
+def export_torchscript(model: torch.nn.Module, output_path: Path) -> None:
+    example = torch.zeros((1, 3, U2NET_INPUT_SIZE, U2NET_INPUT_SIZE))
+    with torch.no_grad():
+        traced = torch.jit.freeze(torch.jit.trace(model, example))
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    torch.jit.save(traced, str(output_path))
+    print(f"Saved TorchScript model to {output_path}")
+
+
+def export_int8(
+    remover: BackgroundRemover, images: list[np.ndarray], output_path: Path
+) -> None:
+    example = torch.zeros((1, 3, U2NET_INPUT_SIZE, U2NET_INPUT_SIZE))
+    prepared = prepare_fx(remover.model, get_default_qconfig_mapping("x86"), (example,))
+    with torch.no_grad():
+        for start in range(0, len(images), 8):
+            batch, _ = remover.letterbox(images[start : start + 8])
+            prepared(batch)
+    export_torchscript(convert_fx(prepared), output_path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model-path", type=Path, default=settings.u2net_model_path)
+    parser.add_argument(
+        "--calibration-dir", type=Path, default=Path("data/test_images")
+    )
+    parser.add_argument(
+        "--torchscript-path", type=Path, default=settings.u2net_torchscript_path
+    )
+    parser.add_argument(
+        "--int8-path", type=Path, default=settings.u2net_int8_model_path
+    )
+    args = parser.parse_args()
+
+    # Export and calibrate on CPU; the quantized model only runs there.
+    remover = BackgroundRemover(model_path=args.model_path)
+    remover.model.cpu()
+    remover.device = torch.device("cpu")
+
+    export_torchscript(remover.model, args.torchscript_path)
+
+    images = load_images(args.calibration_dir)
+    if not images:
+        raise SystemExit(f"No calibration images found in {args.calibration_dir}")
+    export_int8(remover, images, args.int8_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Add the columns used to skip unchanged caps during preprocessing.
+
+``create_all`` does not alter existing tables, so databases created before
+incremental preprocessing lack ``beer_caps.augmentation_fingerprint`` and
+``augmented_caps.embedding_model``. This script adds both columns. Existing
+rows keep ``NULL`` values, so the next preprocessing run augments and embeds
+every cap once and records their fingerprints. It is safe to re-run.
+
+Usage:
+    python -m scripts.migrate_incremental_columns
+"""
+
+import argparse
+import asyncio
+
+from sqlalchemy import text
+
+from src.db.database import GLOBAL_ENGINE
+
+ADD_COLUMNS = (
+    text(
+        "ALTER TABLE beer_caps "
+        "ADD COLUMN IF NOT EXISTS augmentation_fingerprint VARCHAR(64)"
+    ),
+    text(
+        "ALTER TABLE augmented_caps "
+        "ADD COLUMN IF NOT EXISTS embedding_model VARCHAR(64)"
+    ),
+)
+
+
+async def migrate() -> None:
+    async with GLOBAL_ENGINE.begin() as conn:
+        for statement in ADD_COLUMNS:
+            await conn.execute(statement)
+    print("Added augmentation_fingerprint and embedding_model columns.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.parse_args()
+    asyncio.run(migrate())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Copy legacy ``float8[]`` embeddings into the packed ``embedding`` column.
+
+Older databases store augmented cap embeddings in the ``embedding_vector``
+array column. This script adds the ``embedding`` ``bytea`` column if needed,
+packs every legacy vector into it in chunks and can finally drop the legacy
+column. It is safe to re-run: rows that already have a packed embedding are
+skipped.
+
+Usage:
+    python -m scripts.migrate_packed_embeddings --chunk-size 1000 --drop-legacy
+"""
+
+import argparse
+import asyncio
+
+from sqlalchemy import text
+
+from src.config import settings
+from src.db.database import GLOBAL_ENGINE
+from src.db.types import pack_vector
+
+ADD_COLUMN = text("ALTER TABLE augmented_caps ADD COLUMN IF NOT EXISTS embedding BYTEA")
+LEGACY_COLUMN_EXISTS = text(
+    "SELECT 1 FROM information_schema.columns "
+    "WHERE table_name = 'augmented_caps' AND column_name = 'embedding_vector'"
+)
+SELECT_CHUNK = text(
+    "SELECT id, embedding_vector FROM augmented_caps "
+    "WHERE embedding IS NULL AND embedding_vector IS NOT NULL "
+    "ORDER BY id LIMIT :limit"
+)
+UPDATE_ROW = text("UPDATE augmented_caps SET embedding = :blob WHERE id = :id")
+DROP_LEGACY = text("ALTER TABLE augmented_caps DROP COLUMN embedding_vector")
+
+
+async def migrate(chunk_size: int, drop_legacy: bool) -> int:
+    migrated = 0
+    async with GLOBAL_ENGINE.begin() as conn:
+        await conn.execute(ADD_COLUMN)
+        if (await conn.execute(LEGACY_COLUMN_EXISTS)).first() is None:
+            print("No legacy embedding_vector column found; nothing to migrate.")
+            return 0
+
+    while True:
+        async with GLOBAL_ENGINE.begin() as conn:
+            rows = (await conn.execute(SELECT_CHUNK, {"limit": chunk_size})).all()
+            if not rows:
+                break
+            await conn.execute(
+                UPDATE_ROW,
+                [
+                    {
+                        "id": row.id,
+                        "blob": pack_vector(
+                            row.embedding_vector, settings.embedding_storage_dtype
+                        ),
+                    }
+                    for row in rows
+                ],
+            )
+        migrated += len(rows)
+        print(f"Packed {migrated} embeddings")
+
+    if drop_legacy:
+        async with GLOBAL_ENGINE.begin() as conn:
+            await conn.execute(DROP_LEGACY)
+        print("Dropped legacy embedding_vector column.")
+
+    return migrated
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument(
+        "--drop-legacy",
+        action="store_true",
+        help="Drop the embedding_vector column once every row is packed",
+    )
+    args = parser.parse_args()
+    asyncio.run(migrate(args.chunk_size, args.drop_legacy))
+
+
+if __name__ == "__main__":
+    main()
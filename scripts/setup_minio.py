@@ -15,11 +15,11 @@ async def ensure_buckets_exist() -> None:
     Raises:
         ValueError: If any of the required bucket environment variables are not set.
     """
-    buckets = [
+    public_buckets = [
         settings.minio_original_caps_bucket,
         settings.minio_augmented_caps_bucket,
-        settings.minio_augmented_caps_bucket,
     ]
+    buckets = [*public_buckets, settings.minio_index_bucket]
 
     if not all(buckets):
         raise ValueError(
@@ -29,7 +29,8 @@ async def ensure_buckets_exist() -> None:
     minio_wrapper = MinioClientWrapper()
     minio_wrapper.ensure_buckets_exist(buckets)
 
-    for bucket in buckets:
+    # Cap images are served by URL; the index bucket stays private.
+    for bucket in public_buckets:
         policy = {
             "Version": "2012-10-17",
             "Statement": [
@@ -14,7 +14,10 @@ from src.api.routers import (
     country_router,
     similarity_router,
 )
+from src.cap_detection.model_loader import loaded_model_sizes
+from src.services.beer_cap_facade import BeerCapFacade
 from src.services.cap_detection_service import CapDetectionService
+from src.services.index_updater import IndexUpdater
 from src.services.query_service import QueryService
 from src.storage.minio.minio_client import MinioClientWrapper
 from src.utils.logger import get_logger, setup_logging
@@ -41,14 +44,25 @@ async def lifespan(_: FastAPI):
     query_service = QueryService(minio_wrapper=minio_client)
     await query_service.load_index()
     cap_detection_service = CapDetectionService(minio_wrapper=minio_client)
+    beer_cap_facade = BeerCapFacade(minio_wrapper=minio_client)
 
     app.state.minio_client = minio_client
+    app.state.beer_cap_facade = beer_cap_facade
     app.state.query_service = query_service
     app.state.cap_detection_service = cap_detection_service
 
+    index_updater = None
+    if settings.index_incremental_updates:
+        index_updater = IndexUpdater(cap_detection_service, query_service)
+        index_updater.start()
+    app.state.index_updater = index_updater
+
     logger.info("Services initialized.")
     yield
     logger.info("Shutting down app.")
+    if index_updater is not None:
+        await index_updater.stop()
+    query_service.shutdown()
 
 
 app = FastAPI(title="Beer Cap API", lifespan=lifespan)
@@ -80,5 +94,11 @@ async def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/health/models", tags=["health"])
+async def model_memory() -> dict[str, int]:
+    """Memory used by the weights of each loaded model, in bytes."""
+    return loaded_model_sizes()
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -7,6 +7,7 @@ ERROR_DESCRIPTIONS = {
     403: "Forbidden",
     404: "Resource not found",
     500: "Internal server error",
+    503: "Service unavailable",
 }
 
 INTERNAL_SERVER_ERROR_RESPONSE: ResponseDict = {
@@ -15,6 +16,10 @@ INTERNAL_SERVER_ERROR_RESPONSE: ResponseDict = {
 
 NOT_FOUND_RESPONSE: ResponseDict = {404: {"description": ERROR_DESCRIPTIONS[404]}}
 
+SERVICE_UNAVAILABLE_RESPONSE: ResponseDict = {
+    503: {"description": ERROR_DESCRIPTIONS[503]}
+}
+
 UNAUTHORIZED_RESPONSE: ResponseDict = {401: {"description": ERROR_DESCRIPTIONS[401]}}
 
 DEFAULT_ERROR_RESPONSES: ResponseDict = {
@@ -5,7 +5,9 @@ from .facades import get_beer_cap_facade
 from .minio import get_minio_client
 from .services import (
     get_cap_detection_service,
+    get_index_updater,
     get_query_service,
+    invalidate_beer_cap_metadata,
     reload_query_service_index,
 )
 
@@ -14,6 +16,8 @@ __all__ = [
     "get_beer_cap_facade",
     "get_minio_client",
     "get_cap_detection_service",
+    "get_index_updater",
     "get_query_service",
+    "invalidate_beer_cap_metadata",
     "reload_query_service_index",
 ]
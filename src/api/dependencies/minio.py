@@ -1,14 +1,19 @@
+from fastapi import Request
+
 from src.storage.minio.minio_client import MinioClientWrapper
 
 
-def get_minio_client() -> MinioClientWrapper:
-    """Gets a Minio client wrapper instance.
+def get_minio_client(request: Request) -> MinioClientWrapper:
+    """Gets the Minio client wrapper from the application state.
+
+    The wrapper is created once in the application lifespan and shared by
+    every request, so its connection pool is reused instead of being rebuilt
+    per request.
 
-    This function serves as a dependency injector. It creates and returns
-    a singleton instance of the `MinioClientWrapper`, which is used to interact
-    with the Minio object storage service.
+    Args:
+        request: The incoming request object.
 
     Returns:
-        MinioClientWrapper: An initialized Minio client wrapper instance.
+        MinioClientWrapper: The shared Minio client wrapper instance.
     """
-    return MinioClientWrapper()
+    return request.app.state.minio_client
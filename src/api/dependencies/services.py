@@ -1,6 +1,9 @@
+from typing import Optional
+
 from fastapi import Request
 
 from src.services.cap_detection_service import CapDetectionService
+from src.services.index_updater import IndexUpdater
 from src.services.query_service import QueryService
 
 
@@ -28,6 +31,18 @@ def get_cap_detection_service(request: Request) -> CapDetectionService:
     return request.app.state.cap_detection_service
 
 
+def get_index_updater(request: Request) -> Optional[IndexUpdater]:
+    """Gets the incremental index updater from the application state.
+
+    Args:
+        request: The incoming request object.
+
+    Returns:
+        The index updater, or ``None`` if incremental updates are disabled.
+    """
+    return getattr(request.app.state, "index_updater", None)
+
+
 async def reload_query_service_index(request: Request) -> None:
     """Reloads the query service index.
 
@@ -35,3 +50,17 @@ async def reload_query_service_index(request: Request) -> None:
         request: The incoming request object.
     """
     await request.app.state.query_service.load_index()
+
+
+def invalidate_beer_cap_metadata(
+    request: Request, beer_cap_ids: Optional[list[int]] = None
+) -> None:
+    """Drops cached similarity metadata of modified or deleted beer caps.
+
+    Args:
+        request: The incoming request object.
+        beer_cap_ids: Caps to drop, or ``None`` to drop every cap.
+    """
+    query_service = getattr(request.app.state, "query_service", None)
+    if query_service is not None:
+        query_service.invalidate_cap_metadata(beer_cap_ids)
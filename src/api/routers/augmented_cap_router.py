@@ -1,5 +1,5 @@
 import logging
-from typing import Annotated
+from typing import Annotated, Literal, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -41,11 +41,16 @@ async def generate_all_augmented_caps(
     augmentations_per_image: int = Query(
         ..., gt=-1, lt=100, description="Number of augmentations per image"
     ),
+    full_rebuild: bool = Query(
+        False, description="Re-augment every cap, including up-to-date ones"
+    ),
 ) -> StatusResponse:
     """
-    Generate all augmented images for caps.
+    Generate augmented images for caps that are new or changed.
     """
-    generated_count = await cap_detection_service.preprocess(augmentations_per_image)
+    generated_count = await cap_detection_service.preprocess(
+        augmentations_per_image, full_rebuild=full_rebuild
+    )
     logger.info("Generated %s augmented images", generated_count)
     return StatusResponse(
         success=True, message=f"Generated {generated_count} augmented images"
@@ -61,11 +66,16 @@ async def generate_embeddings(
     cap_detection_service: Annotated[
         CapDetectionService, Depends(get_cap_detection_service)
     ],
+    full_rebuild: bool = Query(
+        False, description="Re-embed every augmented cap, including up-to-date ones"
+    ),
 ) -> StatusResponse:
     """
-    Generate embeddings for all augmented caps.
+    Generate embeddings for augmented caps without a current embedding.
     """
-    embeddings_count = await cap_detection_service.generate_embeddings()
+    embeddings_count = await cap_detection_service.generate_embeddings(
+        full_rebuild=full_rebuild
+    )
     logger.info("Generated %s embeddings", embeddings_count)
     return StatusResponse(
         success=True, message=f"Generated {embeddings_count} embeddings"
@@ -82,11 +92,18 @@ async def generate_index(
     cap_detection_service: Annotated[
         CapDetectionService, Depends(get_cap_detection_service)
     ],
+    index_mode: Optional[Literal["augmented", "centroid"]] = Query(
+        None,
+        description=(
+            "Store every augmented embedding or per-cap centroids; "
+            "defaults to the configured index mode"
+        ),
+    ),
 ) -> StatusResponse:
     """
     Generate index for all augmented cap embeddings.
     """
-    index_count = await cap_detection_service.generate_index()
+    index_count = await cap_detection_service.generate_index(index_mode)
     logger.info("Generated index for %s embeddings", index_count)
 
     await reload_query_service_index(request)
@@ -114,7 +131,11 @@ async def get_all_augmented_beer_caps(
     return [
         AugmentedBeerCapResponse(
             id=cap.id,
-            embedding_vector=cap.embedding_vector if include_embedding_vector else None,
+            embedding_vector=(
+                cap.embedding_vector.tolist()
+                if include_embedding_vector and cap.embedding_vector is not None
+                else None
+            ),
         )
         for cap in augmented_caps
     ]
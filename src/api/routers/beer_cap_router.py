@@ -3,7 +3,16 @@ import logging
 from datetime import date
 from typing import Optional
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    File,
+    Form,
+    HTTPException,
+    Request,
+    UploadFile,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.api.constants.responses import (
@@ -12,6 +21,10 @@ from src.api.constants.responses import (
 )
 from src.api.dependencies.db import get_db_session
 from src.api.dependencies.facades import get_beer_cap_facade
+from src.api.dependencies.services import (
+    get_index_updater,
+    invalidate_beer_cap_metadata,
+)
 from src.api.schemas.beer_cap.beer_cap_create import BeerCapCreateSchema
 from src.api.schemas.beer_cap.beer_cap_response import BeerCapResponseWithUrl
 from src.api.schemas.beer_cap.beer_cap_update import BeerCapUpdateSchema
@@ -24,6 +37,7 @@ from src.db.crud.beer_cap_crud import (
     update_beer_cap,
 )
 from src.services.beer_cap_facade import BeerCapFacade
+from src.services.index_updater import IndexUpdater
 from src.api.dependencies.auth import verify_admin
 
 logger = logging.getLogger(__name__)
@@ -42,6 +56,7 @@ router = APIRouter(prefix="/beer_caps", tags=["Beer Caps"])
     },
 )
 async def create_cap_endpoint(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     variant_name: Optional[str] = Form(None, max_length=100),
     collected_date: Optional[date] = Form(None),
@@ -53,12 +68,16 @@ async def create_cap_endpoint(
     country_id: Optional[int] = Form(None, ge=1),
     country_name: Optional[str] = Form(None, min_length=1, max_length=100),
     beer_cap_facade: BeerCapFacade = Depends(get_beer_cap_facade),
+    index_updater: Optional[IndexUpdater] = Depends(get_index_updater),
 ) -> BeerCapResponseWithUrl:
     """
     Creates a new beer cap. Can optionally create a new beer, beer brand, and/or country.
     - If `beer_id` is provided, a new cap is added to that existing beer.
     - If `beer_name` is provided, a new beer is created. The beer brand and country
       will be linked by ID or created by name based on the provided values.
+
+    When incremental index updates are enabled, the new cap is augmented,
+    embedded and added to the similarity index in the background.
     """
     if not file.content_type or not file.content_type.startswith("image/"):
         raise HTTPException(
@@ -98,6 +117,9 @@ async def create_cap_endpoint(
         "Successfully created beer cap %s for beer %s", beer_cap.id, beer_cap.beer.name
     )
 
+    if index_updater is not None:
+        background_tasks.add_task(index_updater.add_beer_cap, beer_cap.id)
+
     return build_beer_cap_response(beer_cap, beer_cap_facade)
 
 
@@ -168,7 +190,9 @@ async def get_beer_cap(
 )
 async def delete_beer_cap(
     beer_cap_id: int,
+    request: Request,
     beer_cap_facade: BeerCapFacade = Depends(get_beer_cap_facade),
+    index_updater: Optional[IndexUpdater] = Depends(get_index_updater),
 ) -> StatusResponse:
     """
     Delete a beer cap and its augmented caps.
@@ -178,6 +202,10 @@ async def delete_beer_cap(
     if not success:
         raise HTTPException(status_code=404, detail="Beer cap not found.")
 
+    invalidate_beer_cap_metadata(request, [beer_cap_id])
+    if index_updater is not None:
+        await index_updater.remove_beer_caps([beer_cap_id])
+
     logger.info("Deleted beer cap %s and its augmented caps.", beer_cap_id)
 
     return StatusResponse(
@@ -199,6 +227,7 @@ async def delete_beer_cap(
 async def update_beer_cap_endpoint(
     beer_cap_id: int,
     update_data: BeerCapUpdateSchema,
+    request: Request,
     beer_cap_facade: BeerCapFacade = Depends(get_beer_cap_facade),
     db: AsyncSession = Depends(get_db_session),
 ) -> BeerCapResponseWithUrl:
@@ -210,6 +239,7 @@ async def update_beer_cap_endpoint(
     if not updated_cap:
         raise HTTPException(status_code=404, detail="Beer cap not found.")
 
+    invalidate_beer_cap_metadata(request, [beer_cap_id])
     logger.info("Updated beer cap %s with data: %s", beer_cap_id, update_data.dict())
 
     return build_beer_cap_response(updated_cap, beer_cap_facade)
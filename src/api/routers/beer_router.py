@@ -1,7 +1,7 @@
 import logging
-from typing import Annotated
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.api.constants.responses import (
@@ -10,6 +10,10 @@ from src.api.constants.responses import (
 )
 from src.api.dependencies.db import get_db_session
 from src.api.dependencies.facades import get_beer_cap_facade
+from src.api.dependencies.services import (
+    get_index_updater,
+    invalidate_beer_cap_metadata,
+)
 from src.api.schemas.beer.beer_create import BeerCreateSchema
 from src.api.schemas.beer.beer_response import BeerResponseWithCaps
 from src.api.schemas.beer.beer_update import BeerUpdateSchema
@@ -17,6 +21,7 @@ from src.api.schemas.beer_brand.beer_brand_response_base import BeerBrandRespons
 from src.api.schemas.beer_cap.beer_cap_response_base import BeerCapResponseBase
 from src.api.schemas.common.status_response import StatusResponse
 from src.api.schemas.country.country_response_base import CountryResponseBase
+from src.db.crud.beer_cap_crud import get_beer_caps_by_beer_id
 from src.db.crud.beer_crud import (
     create_beer,
     get_all_beers,
@@ -24,6 +29,7 @@ from src.db.crud.beer_crud import (
     update_beer,
 )
 from src.services.beer_cap_facade import BeerCapFacade
+from src.services.index_updater import IndexUpdater
 from src.api.dependencies.auth import verify_admin
 
 logger = logging.getLogger(__name__)
@@ -170,13 +176,21 @@ async def get_beer_by_id_endpoint(
 )
 async def delete_beer(
     beer_id: int,
+    request: Request,
     beer_cap_facade: Annotated[BeerCapFacade, Depends(get_beer_cap_facade)],
+    db: Annotated[AsyncSession, Depends(get_db_session)],
+    index_updater: Annotated[Optional[IndexUpdater], Depends(get_index_updater)],
 ) -> StatusResponse:
+    # Collect the caps first; they are gone from the database afterwards.
+    cap_ids = [cap.id for cap in await get_beer_caps_by_beer_id(db, beer_id)]
     deleted = await beer_cap_facade.delete_beer_and_caps(beer_id)
 
     if not deleted:
         raise HTTPException(status_code=404, detail="Beer not found.")
 
+    invalidate_beer_cap_metadata(request, cap_ids)
+    if index_updater is not None:
+        await index_updater.remove_beer_caps(cap_ids)
     logger.info("Deleted beer %s and its associated caps", beer_id)
 
     return StatusResponse(success=True, message="Beer deleted successfully.")
@@ -1,23 +1,35 @@
 import logging
 from datetime import date
-from typing import Annotated, Any, Mapping, Optional, cast
+from typing import TYPE_CHECKING, Annotated, Any, Mapping, Optional, cast
 
 from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
 
-from src.api.constants.responses import INTERNAL_SERVER_ERROR_RESPONSE, ResponseDict
+from src.api.constants.responses import (
+    INTERNAL_SERVER_ERROR_RESPONSE,
+    SERVICE_UNAVAILABLE_RESPONSE,
+    ResponseDict,
+)
 from src.api.dependencies.facades import get_beer_cap_facade
 from src.api.dependencies.services import get_query_service
 from src.api.schemas.similarity.query_response import (
     BeerCapResponseWithQueryResult,
+    ImageQueryResponse,
     QueryResultResponse,
 )
+from src.config import settings
 from src.services.beer_cap_facade import BeerCapFacade
+from src.services.beer_cap_metadata_cache import BeerCapMetadata
+from src.services.inference_executor import InferenceQueueFullError
 from src.services.query_service import QueryService
 from src.api.dependencies.auth import verify_admin
 
+if TYPE_CHECKING:
+    from src.cap_detection.image_querier import AggregatedResult
+
 logger = logging.getLogger(__name__)
 
 BAD_REQUEST_RESPONSE: ResponseDict = {400: {"description": "Invalid image format"}}
+SERVER_BUSY_DETAIL = "Similarity search is busy, please retry later."
 
 router = APIRouter(
     prefix="/similarity", tags=["Similarity"], dependencies=[Depends(verify_admin)]
@@ -30,6 +42,7 @@ router = APIRouter(
     responses={
         **BAD_REQUEST_RESPONSE,
         **cast(Mapping[int | str, dict[str, Any]], INTERNAL_SERVER_ERROR_RESPONSE),
+        **cast(Mapping[int | str, dict[str, Any]], SERVICE_UNAVAILABLE_RESPONSE),
     },
 )
 async def query_image(
@@ -40,6 +53,12 @@ async def query_image(
     faiss_k: int = Query(
         10000, gt=0, description="Number of FAISS candidates to search"
     ),
+    nprobe: Optional[int] = Query(
+        None, gt=0, description="IVF lists to visit (IVF index types only)"
+    ),
+    ef_search: Optional[int] = Query(
+        None, gt=0, description="HNSW candidate list size (HNSW index only)"
+    ),
 ) -> list[BeerCapResponseWithQueryResult]:
     """
     Query the most similar beer caps to the uploaded image.
@@ -56,12 +75,99 @@ async def query_image(
         faiss_k,
     )
 
-    caps, query_results = await query_service.query_image(
-        image_bytes=image_bytes,
-        top_k=top_k,
-        faiss_k=faiss_k,
+    try:
+        caps, query_results = await query_service.query_image(
+            image_bytes=image_bytes,
+            top_k=top_k,
+            faiss_k=faiss_k,
+            nprobe=nprobe,
+            ef_search=ef_search,
+        )
+    except InferenceQueueFullError:
+        raise HTTPException(status_code=503, detail=SERVER_BUSY_DETAIL)
+
+    return _build_query_results(caps, query_results, beer_cap_facade)
+
+
+@router.post(
+    "/query-images",
+    response_model=list[ImageQueryResponse],
+    responses={
+        **BAD_REQUEST_RESPONSE,
+        **cast(Mapping[int | str, dict[str, Any]], INTERNAL_SERVER_ERROR_RESPONSE),
+        **cast(Mapping[int | str, dict[str, Any]], SERVICE_UNAVAILABLE_RESPONSE),
+    },
+)
+async def query_images(
+    query_service: Annotated[QueryService, Depends(get_query_service)],
+    beer_cap_facade: Annotated[BeerCapFacade, Depends(get_beer_cap_facade)],
+    files: list[UploadFile] = File(...),
+    top_k: int = Query(3, gt=0, le=15, description="Number of top matches to return"),
+    faiss_k: int = Query(
+        10000, gt=0, description="Number of FAISS candidates to search"
+    ),
+    nprobe: Optional[int] = Query(
+        None, gt=0, description="IVF lists to visit (IVF index types only)"
+    ),
+    ef_search: Optional[int] = Query(
+        None, gt=0, description="HNSW candidate list size (HNSW index only)"
+    ),
+) -> list[ImageQueryResponse]:
+    """
+    Query the most similar beer caps for each of the uploaded images.
+
+    All images are searched as a single batch, so the results are returned in
+    the same order as the uploaded files.
+    """
+    if len(files) > settings.similarity_max_batch_images:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                "Too many images; at most "
+                f"{settings.similarity_max_batch_images} are allowed."
+            ),
+        )
+
+    for file in files:
+        if not file.content_type or not file.content_type.startswith("image/"):
+            raise HTTPException(
+                status_code=400, detail="Only image uploads are allowed."
+            )
+
+    images = [await file.read() for file in files]
+
+    logger.info(
+        "Received batch similarity query: files=%s, top_k=%s, faiss_k=%s",
+        len(files),
+        top_k,
+        faiss_k,
     )
 
+    try:
+        batch_results = await query_service.query_images(
+            images=images,
+            top_k=top_k,
+            faiss_k=faiss_k,
+            nprobe=nprobe,
+            ef_search=ef_search,
+        )
+    except InferenceQueueFullError:
+        raise HTTPException(status_code=503, detail=SERVER_BUSY_DETAIL)
+
+    return [
+        ImageQueryResponse(
+            filename=file.filename,
+            matches=_build_query_results(caps, query_results, beer_cap_facade),
+        )
+        for file, (caps, query_results) in zip(files, batch_results)
+    ]
+
+
+def _build_query_results(
+    caps: list[BeerCapMetadata],
+    query_results: list["AggregatedResult"],
+    beer_cap_facade: BeerCapFacade,
+) -> list[BeerCapResponseWithQueryResult]:
     if len(caps) != len(query_results):
         raise HTTPException(
             status_code=500, detail="Mismatch between results and metadata."
@@ -50,3 +50,19 @@ class BeerCapResponseWithQueryResult(BaseModel):
     )
 
     model_config = ConfigDict(from_attributes=True, extra="forbid")
+
+
+class ImageQueryResponse(BaseModel):
+    """
+    Response schema for a single image of a batch similarity query, holding
+    the matched beer caps for that image.
+    """
+
+    filename: Optional[str] = Field(
+        default=None, description="Name of the uploaded image file"
+    )
+    matches: list[BeerCapResponseWithQueryResult] = Field(
+        ..., description="Matched beer caps ordered by mean similarity"
+    )
+
+    model_config = ConfigDict(from_attributes=True, extra="forbid")
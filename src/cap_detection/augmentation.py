@@ -1,3 +1,9 @@
+import hashlib
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
 import albumentations as A  # type: ignore[import-untyped]
 from PIL import Image, ImageChops
 
@@ -39,6 +45,61 @@ def get_augmentation_pipeline(image_size: tuple[int, int] = (224, 224)) -> A.Com
     )
 
 
+@lru_cache(maxsize=8)
+def _file_sha256(path: Path, size: int, mtime_ns: int) -> str:
+    # Size and mtime only key the cache, so an unchanged file is hashed once.
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _model_file_digest(model_path: Path) -> Optional[str]:
+    """Return the SHA-256 of a model weights file, or ``None`` if it is missing.
+
+    The digest is cached per path, size and modification time, so repeated
+    calls only read the file again after it changed.
+    """
+
+    path = Path(model_path).resolve()
+    if not path.is_file():
+        return None
+    stat = path.stat()
+    return _file_sha256(path, stat.st_size, stat.st_mtime_ns)
+
+
+def augmentation_config_hash(
+    augmentations_per_image: int,
+    image_size: tuple[int, int] = (224, 224),
+    background_removal_backend: Optional[str] = None,
+    model_path: Optional[Path] = None,
+) -> str:
+    """Fingerprint the augmentation settings used to generate augmented caps.
+
+    Args:
+        augmentations_per_image: Number of augmentations generated per image.
+        image_size: Target size of the augmentation pipeline.
+        background_removal_backend: Backend removing the cap backgrounds.
+        model_path: Weights of the background removal model. The file is
+            identified by its contents, so other weights change the hash
+            while the same weights at another path or re-downloaded do not.
+
+    Returns:
+        A hex digest that changes whenever the pipeline, its parameters or
+        the background removal model do.
+    """
+
+    config = {
+        "pipeline": A.to_dict(get_augmentation_pipeline(image_size=image_size)),
+        "augmentations_per_image": augmentations_per_image,
+        "background_removal_backend": background_removal_backend,
+        "model_sha256": _model_file_digest(model_path) if model_path else None,
+    }
+    serialized = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode()).hexdigest()
+
+
 def crop_transparent(image: Image.Image) -> Image.Image:
     """Crop fully transparent borders from an RGBA image.
 
@@ -0,0 +1,129 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import torch
+
+from src.cap_detection.background_remover import BACKEND_U2NET
+from src.cap_detection.image_processor import ImageAugmenter
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Augmenter of the current worker process, created once by ``_init_worker``.
+_worker_augmenter: Optional[ImageAugmenter] = None
+
+
+def _init_worker(
+    u2net_model_path: Path,
+    augmentations_per_image: int,
+    image_size: tuple[int, int],
+    background_removal_backend: str,
+    torch_threads: int,
+) -> None:
+    global _worker_augmenter
+
+    # Split the cores between workers instead of letting each one use all of them.
+    torch.set_num_threads(torch_threads)
+    _worker_augmenter = ImageAugmenter(
+        u2net_model_path=u2net_model_path,
+        augmentations_per_image=augmentations_per_image,
+        image_size=image_size,
+        background_removal_backend=background_removal_backend,
+    )
+    logger.info("Augmentation worker %d ready", os.getpid())
+
+
+def _augment_in_worker(image_bytes: bytes) -> list[bytes]:
+    if _worker_augmenter is None:
+        raise RuntimeError("Augmentation worker was not initialized")
+    return _worker_augmenter.augment_image_bytes(image_bytes)
+
+
+class AugmentationPool:
+    """Augment cap images on a pool of worker processes.
+
+    Every worker loads the background removal model once and then turns
+    encoded cap images into encoded augmented images, so background removal
+    and the augmentation pipeline run on several cores instead of being
+    serialized by the GIL. With a single worker the images are augmented on a
+    thread of the current process instead.
+    """
+
+    def __init__(
+        self,
+        u2net_model_path: Path,
+        augmentations_per_image: int,
+        image_size: tuple[int, int] = (224, 224),
+        background_removal_backend: str = BACKEND_U2NET,
+        workers: int = 1,
+    ) -> None:
+        """Start the workers.
+
+        Args:
+            u2net_model_path: Path to the background removal model weights.
+            augmentations_per_image: Number of augmented images to generate in
+                addition to the original.
+            image_size: Output resolution for the augmentation pipeline.
+            background_removal_backend: Backend ``u2net_model_path`` belongs to.
+            workers: Number of worker processes.
+        """
+
+        self.workers = max(1, workers)
+        self._augmenter: Optional[ImageAugmenter] = None
+        self._executor: Executor
+        if self.workers == 1:
+            self._augmenter = ImageAugmenter(
+                u2net_model_path=u2net_model_path,
+                augmentations_per_image=augmentations_per_image,
+                image_size=image_size,
+                background_removal_backend=background_removal_backend,
+            )
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="augmentation"
+            )
+            return
+
+        # Forking a process that already runs torch threads can deadlock.
+        torch_threads = max(1, (os.cpu_count() or 1) // self.workers)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(
+                Path(u2net_model_path),
+                augmentations_per_image,
+                image_size,
+                background_removal_backend,
+                torch_threads,
+            ),
+        )
+        logger.info(
+            "Started %d augmentation workers with %d torch threads each",
+            self.workers,
+            torch_threads,
+        )
+
+    async def augment(self, image_bytes: bytes) -> list[bytes]:
+        """Return the encoded augmentations of an encoded cap image.
+
+        The first image is the background-removed original followed by the
+        augmented versions, as returned by
+        :meth:`ImageAugmenter.augment_image_bytes`.
+        """
+
+        loop = asyncio.get_running_loop()
+        if self._augmenter is not None:
+            return await loop.run_in_executor(
+                self._executor, self._augmenter.augment_image_bytes, image_bytes
+            )
+        return await loop.run_in_executor(
+            self._executor, _augment_in_worker, image_bytes
+        )
+
+    def shutdown(self) -> None:
+        """Stop the workers once the submitted images are augmented."""
+        self._executor.shutdown(wait=True)
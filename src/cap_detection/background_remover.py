@@ -1,37 +1,64 @@
 from pathlib import Path
-from typing import Union
+from typing import Sequence, Union
 
-import cv2
 import numpy as np
 import torch
+import torch.nn.functional as F
 from PIL import Image
-from torchvision import transforms  # type: ignore[import-untyped]
 
 from src.utils.logger import get_logger
-from src.utils.u2net_model import U2NET
+from src.utils.u2net_model import U2NET, U2NETP
 
 logger = get_logger(__name__)
 
+U2NET_INPUT_SIZE = 320
+
+BACKEND_U2NET = "u2net"
+BACKEND_U2NETP = "u2netp"
+BACKEND_U2NET_TORCHSCRIPT = "u2net_torchscript"
+BACKEND_U2NET_INT8 = "u2net_int8"
+BACKGROUND_REMOVAL_BACKENDS = (
+    BACKEND_U2NET,
+    BACKEND_U2NETP,
+    BACKEND_U2NET_TORCHSCRIPT,
+    BACKEND_U2NET_INT8,
+)
+# Backends stored as TorchScript modules rather than state dicts.
+TORCHSCRIPT_BACKENDS = (BACKEND_U2NET_TORCHSCRIPT, BACKEND_U2NET_INT8)
+
 
 class BackgroundRemover:
     """Remove backgrounds from images using a pre-trained U2NET model."""
 
-    def __init__(self, model_path: Path):
+    def __init__(self, model_path: Path, backend: str = BACKEND_U2NET):
         """Load the U2NET model used for foreground extraction.
 
         Args:
-            model_path: Filesystem path to the serialized U2NET weights.
+            model_path: Filesystem path to the serialized model. ``u2net`` and
+                ``u2netp`` expect state dicts, the other backends TorchScript
+                files written by ``scripts/export_u2net.py``.
+            backend: One of ``BACKGROUND_REMOVAL_BACKENDS``.
         """
 
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.model = U2NET(3, 1)
-        self.model.load_state_dict(torch.load(model_path, map_location=self.device))
-        self.model.to(self.device)
-        self.model.eval()
+        if backend not in BACKGROUND_REMOVAL_BACKENDS:
+            raise ValueError(f"Unknown background removal backend: {backend}")
 
-        self.transform = transforms.Compose(
-            [transforms.Resize((320, 320)), transforms.ToTensor()]
-        )
+        # Quantized kernels only exist for CPU.
+        use_cuda = torch.cuda.is_available() and backend != BACKEND_U2NET_INT8
+        self.device = torch.device("cuda" if use_cuda else "cpu")
+        self.backend = backend
+
+        self.model: torch.nn.Module
+        if backend in TORCHSCRIPT_BACKENDS:
+            self.model = torch.jit.load(str(model_path), map_location=self.device)
+        else:
+            model_class = U2NETP if backend == BACKEND_U2NETP else U2NET
+            self.model = model_class(3, 1, fused_output_only=True)
+            self.model.load_state_dict(torch.load(model_path, map_location=self.device))
+            self.model.to(self.device)
+            self.model.to(memory_format=torch.channels_last)
+        self.model.eval()
+        logger.info("Loaded %s background removal model from %s", backend, model_path)
 
     def remove_background(self, image: Union[Image.Image, np.ndarray]) -> Image.Image:
         """Generate an RGBA image with the background removed.
@@ -44,26 +71,94 @@ class BackgroundRemover:
             transparent.
         """
 
-        if isinstance(image, np.ndarray):
-            image = Image.fromarray(image).convert("RGB")
-        else:
-            image = image.convert("RGB")
+        return Image.fromarray(self.remove_background_batch([image])[0], mode="RGBA")
 
-        input_tensor = self.transform(image).unsqueeze(0).to(self.device)
+    def remove_background_batch(
+        self, images: Sequence[Union[Image.Image, np.ndarray]]
+    ) -> list[np.ndarray]:
+        """Remove the backgrounds of several images with one U2NET forward pass.
 
-        with torch.no_grad():
-            pred = self.model(input_tensor)[0]
-            mask = pred.squeeze().cpu().numpy()
-            mask = (mask - mask.min()) / (mask.max() - mask.min())
-            mask = cv2.resize(mask, image.size)
-            mask = (mask * 255).astype(np.uint8)
+        Every image is letterboxed into a ``320x320`` input so images of
+        different sizes and aspect ratios share a batch. The predicted masks
+        are normalized and upsampled back to the original resolutions on the
+        model device.
 
-        original = np.array(image)
+        Args:
+            images: Input images as PIL objects or ``HxWx3`` RGB arrays.
 
-        alpha = mask
+        Returns:
+            One ``HxWx4`` RGBA ``uint8`` array per input image, in input order,
+            where the alpha channel is the foreground mask.
+        """
 
-        rgba = np.dstack((original, alpha))
+        if not images:
+            return []
+
+        arrays = [_to_rgb_array(image) for image in images]
+        batch, boxes = self.letterbox(arrays)
+
+        with torch.inference_mode():
+            batch = batch.contiguous(memory_format=torch.channels_last)
+            masks = self.model(batch)[0][:, 0]
+
+            results: list[np.ndarray] = []
+            for array, mask, (top, left, box_height, box_width) in zip(
+                arrays, masks, boxes
+            ):
+                mask = mask[top : top + box_height, left : left + box_width]
+                low, high = mask.min(), mask.max()
+                mask = (mask - low) / (high - low).clamp_min(1e-8)
+                mask = F.interpolate(
+                    mask[None, None],
+                    size=array.shape[:2],
+                    mode="bilinear",
+                    align_corners=False,
+                )[0, 0]
+                alpha = mask.mul_(255).to(torch.uint8).cpu().numpy()
+                results.append(np.dstack((array, alpha)))
+
+        return results
+
+    def letterbox(
+        self, arrays: Sequence[np.ndarray]
+    ) -> tuple[torch.Tensor, list[tuple[int, int, int, int]]]:
+        """Scale RGB arrays into the centre of a batch of ``320x320`` inputs.
 
-        result_image = Image.fromarray(rgba, mode="RGBA")
+        Returns:
+            The input batch on the model device and the ``(top, left,
+            height, width)`` box each image occupies in it.
+        """
 
-        return result_image
+        batch = torch.zeros(
+            (len(arrays), 3, U2NET_INPUT_SIZE, U2NET_INPUT_SIZE), device=self.device
+        )
+        boxes: list[tuple[int, int, int, int]] = []
+        for position, array in enumerate(arrays):
+            height, width = array.shape[:2]
+            scale = U2NET_INPUT_SIZE / max(height, width)
+            box_height = max(1, round(height * scale))
+            box_width = max(1, round(width * scale))
+            top = (U2NET_INPUT_SIZE - box_height) // 2
+            left = (U2NET_INPUT_SIZE - box_width) // 2
+
+            pixels = torch.from_numpy(array).to(self.device).permute(2, 0, 1)
+            batch[position, :, top : top + box_height, left : left + box_width] = (
+                F.interpolate(
+                    pixels.unsqueeze(0).float().div_(255),
+                    size=(box_height, box_width),
+                    mode="bilinear",
+                    align_corners=False,
+                    antialias=True,
+                )[0]
+            )
+            boxes.append((top, left, box_height, box_width))
+
+        return batch, boxes
+
+
+def _to_rgb_array(image: Union[Image.Image, np.ndarray]) -> np.ndarray:
+    if isinstance(image, Image.Image):
+        return np.asarray(image.convert("RGB"))
+    if image.ndim == 3 and image.shape[-1] == 3 and image.dtype == np.uint8:
+        return np.ascontiguousarray(image)
+    return np.asarray(Image.fromarray(image).convert("RGB"))
@@ -0,0 +1,102 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class EmbeddingCache:
+    """LRU cache of normalized query embeddings keyed by image content.
+
+    Entries are keyed by the SHA-256 digest of the uploaded bytes, so retried
+    and re-uploaded images skip background removal and CLIP encoding. The
+    cache is bound to a model version; switching versions drops every entry
+    because embeddings of different models are not comparable.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: Optional[float] = None,
+        model_version: str = "",
+    ) -> None:
+        """Configure the cache limits.
+
+        Args:
+            max_entries: Number of embeddings kept before the least recently
+                used one is evicted.
+            ttl_seconds: Age after which an entry is treated as a miss;
+                ``None`` keeps entries until they are evicted.
+            model_version: Identifier of the models producing the embeddings.
+        """
+
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.model_version = model_version
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, np.ndarray]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key_for(image_bytes: bytes) -> str:
+        """Return the cache key of an uploaded image."""
+        return hashlib.sha256(image_bytes).hexdigest()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Return the cached embedding for ``key`` and count the lookup."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (
+                self.ttl_seconds is None
+                or time.monotonic() - entry[0] <= self.ttl_seconds
+            ):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, embedding: np.ndarray) -> None:
+        """Store a normalized embedding, evicting the least recently used."""
+        if self.max_entries <= 0:
+            return
+
+        embedding = np.array(embedding, dtype=np.float32)
+        embedding.setflags(write=False)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def set_model_version(self, model_version: str) -> None:
+        """Bind the cache to new models, dropping entries of the old ones."""
+        with self._lock:
+            if model_version == self.model_version:
+                return
+            logger.info(
+                "Embedding model changed from %r to %r; clearing %d cached embeddings",
+                self.model_version,
+                model_version,
+                len(self._entries),
+            )
+            self.model_version = model_version
+            self._entries.clear()
+
+    def clear(self) -> None:
+        """Drop every cached embedding."""
+        with self._lock:
+            self._entries.clear()
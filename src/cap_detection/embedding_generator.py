@@ -1,5 +1,6 @@
 import io
-from typing import Any, Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Sequence
 
 import numpy as np
 import torch
@@ -14,13 +15,30 @@ logger = get_logger(__name__)
 class EmbeddingGenerator:
     """Generate CLIP embeddings for images provided as bytes."""
 
-    def __init__(self, image_size: tuple[int, int] = (224, 224)) -> None:
+    def __init__(
+        self,
+        image_size: tuple[int, int] = (224, 224),
+        batch_size: int = 32,
+        preprocess_workers: int = 4,
+    ) -> None:
+        """Load the CLIP model.
+
+        Args:
+            image_size: Resolution of the embedded images.
+            batch_size: Number of images encoded per ``encode_image`` call by
+                :meth:`generate_embeddings_batch`.
+            preprocess_workers: Threads decoding and preprocessing images for
+                :meth:`generate_embeddings_batch`.
+        """
+
         self.device: str = "cuda" if torch.cuda.is_available() else "cpu"
         self.model: Any
         self.preprocess: Callable[[Image.Image], torch.Tensor]
         self.model, self.preprocess = load_model_and_preprocess()
         self.model.eval()
         self.image_size = image_size
+        self.batch_size = batch_size
+        self.preprocess_workers = preprocess_workers
 
     def generate_embeddings_from_bytes(
         self, images: Iterable[tuple[str, bytes]]
@@ -41,16 +59,82 @@ class EmbeddingGenerator:
         Generate embeddings directly from image bytes.
         This method assumes the input bytes are already preprocessed.
         """
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGBA")
-
-        image_array = np.array(image)
-        rgb = image_array[..., :3] if image_array.shape[-1] == 4 else image_array
-        image_rgb = Image.fromarray(rgb)
-
-        image_tensor = self.preprocess(image_rgb).unsqueeze(0).to(self.device)
+        image_tensor = self._preprocess_bytes(image_bytes).unsqueeze(0).to(self.device)
 
         with torch.no_grad():
             embedding = self.model.encode_image(image_tensor)
             embedding = embedding.squeeze(0).cpu()
 
         return embedding
+
+    def generate_embeddings_batch(
+        self, images: Sequence[bytes], batch_size: int | None = None
+    ) -> np.ndarray:
+        """Embed many preprocessed images with batched model calls.
+
+        Images are decoded and preprocessed on a thread pool, stacked into
+        batches of ``batch_size`` and encoded with one ``encode_image`` call
+        per batch.
+
+        Args:
+            images: Raw bytes of the images to embed.
+            batch_size: Images per model call; defaults to ``self.batch_size``.
+
+        Returns:
+            A contiguous ``float32`` matrix with one embedding row per image,
+            in input order.
+        """
+
+        batch_size = batch_size or self.batch_size
+        chunks: list[np.ndarray] = []
+
+        with ThreadPoolExecutor(max_workers=self.preprocess_workers) as executor:
+            for start in range(0, len(images), batch_size):
+                batch = self.preprocess_batch(
+                    images[start : start + batch_size], executor
+                )
+                chunks.append(self.encode_batch(batch))
+
+        if not chunks:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.ascontiguousarray(np.concatenate(chunks), dtype=np.float32)
+
+    def preprocess_batch(
+        self, images: Sequence[bytes], executor: ThreadPoolExecutor | None = None
+    ) -> torch.Tensor:
+        """Decode and preprocess images into a single model input batch.
+
+        Args:
+            images: Raw bytes of the images to preprocess.
+            executor: Pool used to decode the images in parallel; a temporary
+                pool with ``preprocess_workers`` threads is used when omitted.
+
+        Returns:
+            A tensor of shape ``(len(images), 3, H, W)``.
+        """
+
+        if executor is None:
+            with ThreadPoolExecutor(max_workers=self.preprocess_workers) as pool:
+                return self.preprocess_batch(images, pool)
+
+        return torch.stack(list(executor.map(self._preprocess_bytes, images)))
+
+    def encode_batch(self, batch: torch.Tensor) -> np.ndarray:
+        """Encode a preprocessed batch with one ``encode_image`` call.
+
+        Returns:
+            A ``float32`` matrix with one embedding row per batch item.
+        """
+
+        with torch.no_grad():
+            embeddings = self.model.encode_image(batch.to(self.device))
+        return np.ascontiguousarray(embeddings.float().cpu().numpy(), dtype=np.float32)
+
+    def _preprocess_bytes(self, image_bytes: bytes) -> torch.Tensor:
+        image = Image.open(io.BytesIO(image_bytes)).convert("RGBA")
+
+        image_array = np.array(image)
+        rgb = image_array[..., :3] if image_array.shape[-1] == 4 else image_array
+        image_rgb = Image.fromarray(rgb)
+
+        return self.preprocess(image_rgb)
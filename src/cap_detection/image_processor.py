@@ -1,10 +1,12 @@
 import io
 from pathlib import Path
+from typing import Sequence
 
 import numpy as np
 from PIL import Image
 
-from src.cap_detection.background_remover import BackgroundRemover
+from src.cap_detection.background_remover import BACKEND_U2NET, BackgroundRemover
+from src.cap_detection.model_loader import load_background_remover
 from src.utils.logger import get_logger
 
 from .augmentation import crop_transparent, get_augmentation_pipeline
@@ -25,14 +27,35 @@ def _process_image_for_embedding(
     When ``keep_alpha`` is ``True`` the alpha channel is preserved and the
     image is returned in RGBA mode.
     """
-    img_pil = Image.open(io.BytesIO(image_bytes)).convert("RGBA")
-    img_pil = background_remover.remove_background(img_pil)
-    img_pil = crop_transparent(img_pil)
+    return _process_images_for_embedding(
+        [image_bytes], background_remover, image_size, keep_alpha
+    )[0]
 
-    if not keep_alpha:
-        img_pil = img_pil.convert("RGB")
 
-    return img_pil.resize(image_size, Image.Resampling.LANCZOS)
+def _process_images_for_embedding(
+    images: Sequence[bytes],
+    background_remover: BackgroundRemover,
+    image_size: tuple[int, int] = (224, 224),
+    keep_alpha: bool = False,
+) -> list[Image.Image]:
+    """Preprocess several images, removing their backgrounds in one batch.
+
+    See :func:`_process_image_for_embedding` for the steps applied to each
+    image.
+    """
+    rgb_arrays = [
+        np.asarray(Image.open(io.BytesIO(data)).convert("RGB")) for data in images
+    ]
+    rgba_arrays = background_remover.remove_background_batch(rgb_arrays)
+
+    processed: list[Image.Image] = []
+    for rgba in rgba_arrays:
+        img_pil = crop_transparent(Image.fromarray(rgba, mode="RGBA"))
+        if not keep_alpha:
+            img_pil = img_pil.convert("RGB")
+        processed.append(img_pil.resize(image_size, Image.Resampling.LANCZOS))
+
+    return processed
 
 
 class ImageAugmenter:
@@ -43,6 +66,7 @@ class ImageAugmenter:
         u2net_model_path: Path,
         augmentations_per_image: int = 10,
         image_size: tuple[int, int] = (224, 224),
+        background_removal_backend: str = BACKEND_U2NET,
     ):
         """Configure the augmentation pipeline.
 
@@ -51,12 +75,15 @@ class ImageAugmenter:
             augmentations_per_image: Number of augmented images to generate in
                 addition to the original.
             image_size: Output resolution for the augmentation pipeline.
+            background_removal_backend: Backend ``u2net_model_path`` belongs to.
         """
 
         self.augmentations_per_image = augmentations_per_image
         self.pipeline = get_augmentation_pipeline(image_size=image_size)
         self.image_size = image_size
-        self.background_remover = BackgroundRemover(model_path=u2net_model_path)
+        self.background_remover = load_background_remover(
+            u2net_model_path, background_removal_backend
+        )
 
     def augment_image_bytes(self, image_bytes: bytes) -> list[bytes]:
         """
@@ -1,6 +1,5 @@
-from collections import defaultdict
-from dataclasses import dataclass, field
-from pathlib import Path
+import threading
+from dataclasses import dataclass, replace
 from typing import Any, Callable, Optional
 
 import faiss  # type: ignore[import-untyped]
@@ -8,9 +7,21 @@ import numpy as np
 import torch
 from PIL import Image
 
-from src.cap_detection.background_remover import BackgroundRemover
-from src.cap_detection.image_processor import _process_image_for_embedding
-from src.cap_detection.model_loader import load_model_and_preprocess
+from src.cap_detection.background_remover import BACKEND_U2NET
+from src.cap_detection.embedding_cache import EmbeddingCache
+from src.cap_detection.image_processor import _process_images_for_embedding
+from src.cap_detection.index_builder import (
+    INDEX_MODE_AUGMENTED,
+    INDEX_MODE_CENTROID,
+    INDEX_TYPE_FLAT,
+    configure_index,
+    make_search_parameters,
+)
+from src.cap_detection.model_loader import (
+    CLIP_MODEL_NAME,
+    load_background_remover,
+    load_model_and_preprocess,
+)
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -26,31 +37,260 @@ class AggregatedResult:
     max_similarity: float
 
 
-@dataclass
-class _Agg:
-    count: int = 0
-    similarities: list[float] = field(default_factory=list)
+def aggregate_hits(
+    similarities: np.ndarray,
+    indices: np.ndarray,
+    label_to_cap: np.ndarray,
+    top_k: int,
+) -> dict[int, AggregatedResult]:
+    """Group FAISS hits by beer cap and keep the best ``top_k`` caps.
 
+    Args:
+        similarities: Similarity of each hit to the query.
+        indices: FAISS label of each hit (an index row, or an augmented cap
+            ID for ID-mapped indexes); negative labels and labels outside
+            ``label_to_cap`` are ignored.
+        label_to_cap: Beer cap ID for every FAISS label, ``-1`` when unknown.
+        top_k: Number of caps to return.
 
-class ImageQuerier:
-    """Query a FAISS index with processed cap images."""
+    Returns:
+        A dictionary mapping cap IDs to their aggregated similarity
+        statistics, ordered by mean similarity.
+    """
 
-    def __init__(
-        self,
+    valid = (indices >= 0) & (indices < label_to_cap.size)
+    cap_ids = label_to_cap[indices[valid]]
+    similarities = similarities[valid]
+    known = cap_ids >= 0
+    cap_ids, similarities = cap_ids[known], similarities[known]
+    if cap_ids.size == 0:
+        return {}
+
+    unique_caps, groups = np.unique(cap_ids, return_inverse=True)
+    counts = np.bincount(groups)
+    means = np.bincount(groups, weights=similarities) / counts
+
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    grouped = similarities[np.argsort(groups, kind="stable")]
+    mins = np.minimum.reduceat(grouped, starts)
+    maxs = np.maximum.reduceat(grouped, starts)
+
+    if top_k < unique_caps.size:
+        best = np.argpartition(-means, top_k - 1)[:top_k]
+    else:
+        best = np.arange(unique_caps.size)
+    best = best[np.argsort(-means[best], kind="stable")]
+
+    return {
+        int(unique_caps[i]): AggregatedResult(
+            match_count=int(counts[i]),
+            mean_similarity=float(means[i]),
+            min_similarity=float(mins[i]),
+            max_similarity=float(maxs[i]),
+        )
+        for i in best
+    }
+
+
+@dataclass(frozen=True)
+class RerankMatrix:
+    """Augmented cap embeddings grouped by beer cap for shortlist re-ranking.
+
+    ``rows`` holds the row numbers of ``embeddings`` ordered by beer cap and
+    the rows of ``caps[i]`` are ``rows[offsets[i]:offsets[i + 1]]``, so a
+    shortlist is resolved with a binary search instead of a full scan.
+    """
+
+    embeddings: np.ndarray
+    cap_ids: np.ndarray
+    caps: np.ndarray
+    rows: np.ndarray
+    offsets: np.ndarray
+
+    @classmethod
+    def build(cls, embeddings: np.ndarray, cap_ids: np.ndarray) -> "RerankMatrix":
+        """Group the rows of ``embeddings`` by their beer cap ID.
+
+        Args:
+            embeddings: Normalized augmented cap embeddings.
+            cap_ids: Beer cap ID of each row of ``embeddings``.
+        """
+
+        rows = np.argsort(cap_ids, kind="stable")
+        caps, counts = np.unique(cap_ids[rows], return_counts=True)
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        return cls(
+            embeddings=embeddings,
+            cap_ids=cap_ids,
+            caps=caps,
+            rows=rows,
+            offsets=offsets,
+        )
+
+    def rows_for(self, shortlist: np.ndarray) -> np.ndarray:
+        """Return the embedding rows of the given beer caps."""
+
+        positions = np.searchsorted(self.caps, shortlist)
+        found = positions < self.caps.size
+        positions = positions[found]
+        positions = positions[self.caps[positions] == shortlist[found]]
+        if positions.size == 0:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(
+            [self.rows[self.offsets[i] : self.offsets[i + 1]] for i in positions]
+        )
+
+
+def rerank_shortlist(
+    embedding: np.ndarray,
+    shortlist: np.ndarray,
+    rerank: RerankMatrix,
+    top_k: int,
+) -> dict[int, AggregatedResult]:
+    """Score every stored embedding of the shortlisted caps exactly.
+
+    Args:
+        embedding: Normalized query embedding.
+        shortlist: Beer cap IDs selected by the first search stage.
+        rerank: Augmented cap embeddings grouped by beer cap.
+        top_k: Number of caps to return.
+
+    Returns:
+        Aggregated statistics over all embeddings of the best ``top_k``
+        shortlisted caps, ordered by mean similarity.
+    """
+
+    rows = rerank.rows_for(shortlist)
+    similarities = rerank.embeddings[rows] @ embedding
+    return aggregate_hits(similarities, rows, rerank.cap_ids, top_k)
+
+
+@dataclass(frozen=True)
+class IndexSnapshot:
+    """An index together with everything needed to interpret its results.
+
+    Snapshots, including their index, are never modified after they are
+    published to an :class:`ImageQuerier`. Reloads publish a new snapshot and
+    incremental updates publish a modified copy of the index, so queries read
+    a consistent index and lookup without locking.
+    """
+
+    index: faiss.Index
+    metadata: tuple[int, ...]
+    label_to_cap: np.ndarray
+    index_mode: str = INDEX_MODE_AUGMENTED
+    index_type: str = INDEX_TYPE_FLAT
+    id_mapped: bool = False
+    rerank: Optional[RerankMatrix] = None
+    memory_mapped: bool = False
+    nprobe: Optional[int] = None
+    ef_search: Optional[int] = None
+    version: int = 0
+
+    @classmethod
+    def build(
+        cls,
         index: faiss.Index,
         metadata: list[int],
         augmented_cap_to_cap: dict[str, int],
+        index_mode: str = INDEX_MODE_AUGMENTED,
+        index_type: str = INDEX_TYPE_FLAT,
+        id_mapped: bool = False,
+        rerank_embeddings: Optional[np.ndarray] = None,
+        rerank_cap_ids: Optional[np.ndarray] = None,
+        memory_mapped: bool = False,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        version: int = 0,
+    ) -> "IndexSnapshot":
+        """Create a snapshot, deriving the FAISS label to beer cap lookup.
+
+        Args:
+            index: FAISS index containing cap embeddings.
+            metadata: Mapping of index entries to cap identifiers.
+            augmented_cap_to_cap: Lookup from augmented image IDs to original IDs.
+            index_mode: ``augmented`` when index rows are augmented caps,
+                ``centroid`` when they are per-cap prototypes and
+                ``metadata`` holds beer cap IDs.
+            index_type: Index type recorded in the index metadata.
+            id_mapped: Whether ``index`` returns augmented cap IDs as labels
+                (``faiss.IndexIDMap2``) rather than row numbers.
+            rerank_embeddings: Optional normalized augmented cap embeddings
+                used to re-rank the centroid shortlist.
+            rerank_cap_ids: Beer cap ID of each row of ``rerank_embeddings``.
+            memory_mapped: Whether ``index`` was read with
+                ``faiss.IO_FLAG_MMAP_IFC``; its mapped codes are read-only and
+                are copied into memory by the first update.
+            nprobe: IVF lists visited by default, re-applied to index copies.
+            ef_search: Default HNSW candidate list size, re-applied to index
+                copies.
+            version: Monotonic version number of the snapshot.
+        """
+
+        if index_mode == INDEX_MODE_CENTROID:
+            label_to_cap = np.asarray(metadata, dtype=np.int32)
+        elif id_mapped:
+            label_to_cap = np.full(max(metadata, default=-1) + 1, -1, np.int32)
+            for aug_id in metadata:
+                label_to_cap[aug_id] = augmented_cap_to_cap.get(str(aug_id), -1)
+        else:
+            label_to_cap = np.array(
+                [augmented_cap_to_cap.get(str(aug_id), -1) for aug_id in metadata],
+                dtype=np.int32,
+            )
+
+        return cls(
+            index=index,
+            metadata=tuple(metadata),
+            label_to_cap=label_to_cap,
+            index_mode=index_mode,
+            index_type=index_type,
+            id_mapped=id_mapped,
+            rerank=(
+                RerankMatrix.build(rerank_embeddings, rerank_cap_ids)
+                if rerank_embeddings is not None and rerank_cap_ids is not None
+                else None
+            ),
+            memory_mapped=memory_mapped,
+            nprobe=nprobe,
+            ef_search=ef_search,
+            version=version,
+        )
+
+    @property
+    def supports_updates(self) -> bool:
+        """Whether single augmented caps can be added to or removed from the index."""
+        return self.id_mapped and self.index_mode == INDEX_MODE_AUGMENTED
+
+
+class ImageQuerier:
+    """Query a FAISS index with processed cap images.
+
+    The models are loaded once; the searched index lives in an
+    :class:`IndexSnapshot` that can be replaced with :meth:`swap_snapshot`
+    while queries are running.
+    """
+
+    def __init__(
+        self,
+        snapshot: IndexSnapshot,
         u2net_model_path: str,
         image_size: tuple[int, int] = (224, 224),
+        centroid_candidate_factor: int = 4,
+        background_removal_backend: str = BACKEND_U2NET,
+        embedding_cache: Optional[EmbeddingCache] = None,
     ):
         """Initialise the querier with an index and preprocessing tools.
 
         Args:
-            index: FAISS index containing cap embeddings.
-            metadata: Mapping of index entries to cap identifiers.
-            augmented_cap_to_cap: Lookup from augmented image IDs to original IDs.
+            snapshot: Index to search.
             u2net_model_path: Path to the background removal model.
             image_size: Resolution used for preprocessing query images.
+            centroid_candidate_factor: In centroid mode, number of
+                prototypes retrieved per requested cap.
+            background_removal_backend: Backend ``u2net_model_path`` belongs to.
+            embedding_cache: Optional cache of query embeddings keyed by the
+                uploaded image bytes.
         """
 
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
@@ -58,17 +298,46 @@ class ImageQuerier:
         self.preprocess: Callable[[Image.Image], torch.Tensor]
         self.model, self.preprocess = load_model_and_preprocess()
         self.model.eval()
-        self.index = index
-        self.metadata = metadata
-        self.augmented_cap_to_cap = augmented_cap_to_cap
-        self.background_remover = BackgroundRemover(model_path=Path(u2net_model_path))
+        self.snapshot = snapshot
+        self.centroid_candidate_factor = centroid_candidate_factor
+        # Serializes snapshot swaps and updates; searches never take it.
+        self._index_lock = threading.Lock()
+        self.background_remover = load_background_remover(
+            u2net_model_path, background_removal_backend
+        )
         self.image_size = image_size
+        self.model_version = (
+            f"{CLIP_MODEL_NAME}/{background_removal_backend}/"
+            f"{image_size[0]}x{image_size[1]}"
+        )
+        self.embedding_cache = embedding_cache
+        if embedding_cache is not None:
+            embedding_cache.set_model_version(self.model_version)
+
+    def swap_snapshot(self, snapshot: IndexSnapshot) -> IndexSnapshot:
+        """Atomically replace the searched index.
+
+        Queries that already started finish on the previous snapshot.
+
+        Returns:
+            The replaced snapshot.
+        """
+
+        with self._index_lock:
+            previous, self.snapshot = self.snapshot, snapshot
+
+        logger.info(
+            "Swapped index snapshot v%d for v%d", previous.version, snapshot.version
+        )
+        return previous
 
     def query(
         self,
         image_bytes: Optional[bytes] = None,
         top_k: int = 3,
         faiss_k: int = 10000,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
     ) -> dict[int, AggregatedResult]:
         """Run a nearest-neighbour search for a cap image.
 
@@ -77,6 +346,8 @@ class ImageQuerier:
             top_k: Number of aggregated results to return.
             faiss_k: Number of raw FAISS neighbours to retrieve before
                 aggregation.
+            nprobe: IVF lists to visit, overriding the index default.
+            ef_search: HNSW candidate list size, overriding the index default.
 
         Returns:
             A dictionary mapping cap IDs to their aggregated similarity
@@ -87,66 +358,273 @@ class ImageQuerier:
             raise ValueError("image_bytes must be provided")
 
         logger.info("Querying image from bytes")
-        image_tensor = self._process_image_bytes(image_bytes)
-        results = self._query_embedding(image_tensor, faiss_k)
-        full_results = self._aggregate_results(results)
-
-        top_k_items = dict(
-            sorted(
-                full_results.items(),
-                key=lambda item: item[1].mean_similarity,
-                reverse=True,
-            )[:top_k]
+        embeddings = self._embed_images([image_bytes])
+        return self._search(embeddings, top_k, faiss_k, nprobe, ef_search)[0]
+
+    def query_batch(
+        self,
+        images: list[bytes],
+        top_k: int = 3,
+        faiss_k: int = 10000,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+    ) -> list[dict[int, AggregatedResult]]:
+        """Run a nearest-neighbour search for several cap images at once.
+
+        U2NET removes the backgrounds of all images in one forward pass, the
+        preprocessed images are stacked into a single tensor so CLIP encodes
+        the whole batch at once and FAISS searches all query vectors with a
+        single call.
+
+        Args:
+            images: Raw image data for each query image.
+            top_k: Number of aggregated results to return per image.
+            faiss_k: Number of raw FAISS neighbours to retrieve per image
+                before aggregation.
+            nprobe: IVF lists to visit, overriding the index default.
+            ef_search: HNSW candidate list size, overriding the index default.
+
+        Returns:
+            One dictionary per input image, in input order, mapping cap IDs
+            to their aggregated similarity statistics.
+        """
+
+        if not images:
+            return []
+
+        logger.info("Querying batch of %d images", len(images))
+        embeddings = self._embed_images(images)
+        return self._search(embeddings, top_k, faiss_k, nprobe, ef_search)
+
+    @property
+    def supports_updates(self) -> bool:
+        """Whether single augmented caps can be added to or removed from the index."""
+        return self.snapshot.supports_updates
+
+    def add_embeddings(
+        self, augmented_cap_ids: list[int], cap_id: int, embeddings: np.ndarray
+    ) -> int:
+        """Add the augmented embeddings of one beer cap to the live index.
+
+        Augmented caps that are already indexed are skipped, so an update
+        applied twice does not duplicate vectors.
+
+        Args:
+            augmented_cap_ids: IDs of the augmented caps, used as FAISS IDs.
+            cap_id: Beer cap the augmented caps belong to.
+            embeddings: One embedding per augmented cap.
+
+        Returns:
+            Number of vectors added.
+        """
+
+        if not self.supports_updates:
+            raise RuntimeError("Index does not support incremental updates")
+
+        vectors = np.ascontiguousarray(embeddings, dtype=np.float32)
+        faiss.normalize_L2(vectors)
+        ids = np.asarray(augmented_cap_ids, dtype=np.int64)
+
+        with self._index_lock:
+            snapshot = self.snapshot
+            known = ids < snapshot.label_to_cap.size
+            known[known] = snapshot.label_to_cap[ids[known]] >= 0
+            ids, vectors = ids[~known], vectors[~known]
+            if ids.size == 0:
+                return 0
+            index = _copy_index(snapshot)
+            index.add_with_ids(vectors, ids)
+            label_to_cap = np.full(
+                max(snapshot.label_to_cap.size, int(ids.max()) + 1), -1, np.int32
+            )
+            label_to_cap[: snapshot.label_to_cap.size] = snapshot.label_to_cap
+            label_to_cap[ids] = cap_id
+            self.snapshot = replace(
+                snapshot,
+                index=index,
+                memory_mapped=False,
+                metadata=snapshot.metadata + tuple(ids.tolist()),
+                label_to_cap=label_to_cap,
+            )
+
+        logger.info("Added %d vectors for cap %s to index", ids.size, cap_id)
+        return int(ids.size)
+
+    def remove_caps(self, cap_ids: list[int]) -> int:
+        """Remove every augmented embedding of the given beer caps.
+
+        Returns:
+            Number of augmented embeddings removed.
+        """
+
+        removed = self._remove_labels(
+            lambda snapshot: np.flatnonzero(np.isin(snapshot.label_to_cap, cap_ids))
         )
+        logger.info("Removed %d vectors of caps %s from index", removed, cap_ids)
+        return removed
 
-        return top_k_items
+    def remove_augmented_caps(self, augmented_cap_ids: list[int]) -> int:
+        """Remove the embeddings of the given augmented caps.
+
+        Returns:
+            Number of augmented embeddings removed.
+        """
+
+        ids = np.asarray(augmented_cap_ids, dtype=np.int64)
+
+        def indexed(snapshot: IndexSnapshot) -> np.ndarray:
+            labels = ids[(ids >= 0) & (ids < snapshot.label_to_cap.size)]
+            return labels[snapshot.label_to_cap[labels] >= 0]
+
+        removed = self._remove_labels(indexed)
+        logger.info("Removed %d augmented cap vectors from index", removed)
+        return removed
+
+    def indexed_augmented_cap_ids(self) -> np.ndarray:
+        """Return the IDs of the augmented caps the live index returns."""
+        return np.flatnonzero(self.snapshot.label_to_cap >= 0)
+
+    def _remove_labels(
+        self, select_labels: Callable[[IndexSnapshot], np.ndarray]
+    ) -> int:
+        """Remove the labels chosen by ``select_labels`` from the live index.
+
+        Index types without ``remove_ids`` support (HNSW) keep the vectors,
+        but their labels are unmapped so they never appear in results. Their
+        IDs stay in the metadata as tombstones, so a saved index keeps
+        describing every vector it holds.
+        """
+
+        if not self.supports_updates:
+            raise RuntimeError("Index does not support incremental updates")
+
+        with self._index_lock:
+            snapshot = self.snapshot
+            labels = select_labels(snapshot)
+            if labels.size == 0:
+                return 0
+            index = _copy_index(snapshot)
+            metadata = snapshot.metadata
+            try:
+                index.remove_ids(faiss.IDSelectorBatch(labels.astype(np.int64)))
+            except RuntimeError:
+                logger.warning(
+                    "Index cannot remove vectors; masking %d labels", labels.size
+                )
+            else:
+                removed = set(labels.tolist())
+                metadata = tuple(i for i in metadata if i not in removed)
+            label_to_cap = snapshot.label_to_cap.copy()
+            label_to_cap[labels] = -1
+            self.snapshot = replace(
+                snapshot,
+                index=index,
+                memory_mapped=False,
+                metadata=metadata,
+                label_to_cap=label_to_cap,
+            )
+        return int(labels.size)
+
+    def serialize_index(self) -> tuple[bytes, IndexSnapshot]:
+        """Serialize the live index for persistence.
+
+        Returns:
+            The serialized index and the snapshot it was taken from.
+        """
+        snapshot = self.snapshot
+        return faiss.serialize_index(snapshot.index).tobytes(), snapshot
 
     def _process_image_bytes(self, data: bytes) -> torch.Tensor:
-        processed_image = _process_image_for_embedding(
-            data, self.background_remover, self.image_size
+        return self._process_images_bytes([data])
+
+    def _process_images_bytes(self, images: list[bytes]) -> torch.Tensor:
+        processed_images = _process_images_for_embedding(
+            images, self.background_remover, self.image_size
         )
 
-        image_tensor = self.preprocess(processed_image).unsqueeze(0).to(self.device)
-        return image_tensor
+        return torch.stack([self.preprocess(image) for image in processed_images]).to(
+            self.device
+        )
 
-    def _query_embedding(
-        self, image_tensor: torch.Tensor, top_k: int
-    ) -> list[tuple[int, float]]:
-        top_k = min(top_k, self.index.ntotal)
-        with torch.no_grad():
-            embedding = self.model.encode_image(image_tensor).cpu().numpy()
-            faiss.normalize_L2(embedding)
+    def _embed_images(self, images: list[bytes]) -> np.ndarray:
+        if self.embedding_cache is None:
+            return self._encode(self._process_images_bytes(images))
+
+        keys = [EmbeddingCache.key_for(data) for data in images]
+        embeddings: dict[str, np.ndarray] = {}
+        for key in dict.fromkeys(keys):
+            cached = self.embedding_cache.get(key)
+            if cached is not None:
+                embeddings[key] = cached
+
+        # Duplicate uploads within one batch are only encoded once.
+        missing = {
+            key: data for key, data in zip(keys, images) if key not in embeddings
+        }
+        if missing:
+            encoded = self._encode(self._process_images_bytes(list(missing.values())))
+            for key, embedding in zip(missing, encoded):
+                self.embedding_cache.put(key, embedding)
+                embeddings[key] = embedding
+
+        return np.stack([embeddings[key] for key in keys])
+
+    def _search(
+        self,
+        embeddings: np.ndarray,
+        top_k: int,
+        faiss_k: int,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+    ) -> list[dict[int, AggregatedResult]]:
+        # Published snapshots are immutable, so searches need no lock.
+        snapshot = self.snapshot
+        if snapshot.index_mode == INDEX_MODE_CENTROID:
+            faiss_k = top_k * self.centroid_candidate_factor
+        similarities, indices = snapshot.index.search(
+            embeddings,
+            min(faiss_k, snapshot.index.ntotal),
+            params=make_search_parameters(snapshot.index, nprobe, ef_search),
+        )
 
-        similarities, indices = self.index.search(embedding, top_k)
-        results = [
-            (self.metadata[idx], float(sim))
-            for idx, sim in zip(indices[0], similarities[0])
+        rerank = snapshot.rerank
+        if snapshot.index_mode == INDEX_MODE_CENTROID and rerank is not None:
+            return [
+                rerank_shortlist(
+                    embedding,
+                    np.unique(snapshot.label_to_cap[row_indices[row_indices >= 0]]),
+                    rerank,
+                    top_k,
+                )
+                for embedding, row_indices in zip(embeddings, indices)
+            ]
+
+        return [
+            aggregate_hits(row_similarities, row_indices, snapshot.label_to_cap, top_k)
+            for row_similarities, row_indices in zip(similarities, indices)
         ]
-        return results
 
-    def _aggregate_results(
-        self, results: list[tuple[int, float]]
-    ) -> dict[int, AggregatedResult]:
-        aggregation: dict[int, _Agg] = defaultdict(_Agg)
-
-        for matched_augmented_cap_id, similarity in results:
-            cap_id = self.augmented_cap_to_cap.get(str(matched_augmented_cap_id))
-            if cap_id is None:
-                continue
-
-            aggregation[cap_id].count += 1
-            aggregation[cap_id].similarities.append(similarity)
-
-        aggregated_results: dict[int, AggregatedResult] = {}
-        for cap_id, data in aggregation.items():
-            mean_similarity = float(np.mean(data.similarities))
-            min_similarity = float(np.min(data.similarities))
-            max_similarity = float(np.max(data.similarities))
-            aggregated_results[cap_id] = AggregatedResult(
-                match_count=data.count,
-                mean_similarity=mean_similarity,
-                min_similarity=min_similarity,
-                max_similarity=max_similarity,
-            )
+    def _encode(self, image_tensor: torch.Tensor) -> np.ndarray:
+        with torch.no_grad():
+            embeddings = self.model.encode_image(image_tensor).cpu().numpy()
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        faiss.normalize_L2(embeddings)
+        return embeddings
+
+
+def _copy_index(snapshot: IndexSnapshot) -> faiss.Index:
+    """Return a private, writable in-memory copy of the snapshot's index.
+
+    ``faiss.clone_index`` keeps memory-mapped codes as a read-only view, so
+    mapped indexes are copied through a serialization round trip instead.
+    Search defaults are not part of the serialized index and are re-applied.
+    """
 
-        return aggregated_results
+    if snapshot.memory_mapped:
+        index = faiss.deserialize_index(faiss.serialize_index(snapshot.index))
+    else:
+        index = faiss.clone_index(snapshot.index)
+    configure_index(
+        index, snapshot.index_type, nprobe=snapshot.nprobe, ef_search=snapshot.ef_search
+    )
+    return index
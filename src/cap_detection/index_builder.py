@@ -1,4 +1,7 @@
+import math
 import pickle
+from dataclasses import dataclass
+from typing import Any, Optional, Sequence
 
 import faiss  # type: ignore[import-untyped]
 import numpy as np
@@ -7,19 +10,180 @@ from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+INDEX_MODE_AUGMENTED = "augmented"
+INDEX_MODE_CENTROID = "centroid"
+INDEX_MODES = (INDEX_MODE_AUGMENTED, INDEX_MODE_CENTROID)
+
+INDEX_TYPE_FLAT = "flat"
+INDEX_TYPE_IVF_FLAT = "ivf_flat"
+INDEX_TYPE_HNSW_FLAT = "hnsw_flat"
+INDEX_TYPE_IVF_PQ = "ivf_pq"
+INDEX_TYPE_OPQ_IVF_PQ = "opq_ivf_pq"
+INDEX_TYPES = (
+    INDEX_TYPE_FLAT,
+    INDEX_TYPE_IVF_FLAT,
+    INDEX_TYPE_HNSW_FLAT,
+    INDEX_TYPE_IVF_PQ,
+    INDEX_TYPE_OPQ_IVF_PQ,
+)
+IVF_INDEX_TYPES = (INDEX_TYPE_IVF_FLAT, INDEX_TYPE_IVF_PQ, INDEX_TYPE_OPQ_IVF_PQ)
+PQ_INDEX_TYPES = (INDEX_TYPE_IVF_PQ, INDEX_TYPE_OPQ_IVF_PQ)
+
+# PQ sub-quantizers use 8-bit codes and need at least 2**8 training vectors.
+PQ_MIN_TRAINING_VECTORS = 256
+
+
+@dataclass
+class IndexMetadata:
+    """Description of a serialized FAISS index.
+
+    In ``augmented`` mode every index row is an augmented cap and ``ids``
+    holds augmented cap IDs. In ``centroid`` mode every row is a prototype
+    vector of a beer cap and ``ids`` holds beer cap IDs. When ``id_mapped``
+    is set the index is wrapped in ``faiss.IndexIDMap2`` and searches return
+    augmented cap IDs instead of row numbers.
+    """
+
+    ids: list[int]
+    mode: str = INDEX_MODE_AUGMENTED
+    index_type: str = INDEX_TYPE_FLAT
+    id_mapped: bool = False
+
+    def to_bytes(self) -> bytes:
+        """Serialize the metadata for storage next to the index."""
+        return pickle.dumps(
+            {
+                "mode": self.mode,
+                "ids": self.ids,
+                "index_type": self.index_type,
+                "id_mapped": self.id_mapped,
+            }
+        )
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "IndexMetadata":
+        """Deserialize metadata, accepting the legacy plain ID list format."""
+        data: Any = pickle.loads(blob)
+        if isinstance(data, dict):
+            return cls(
+                ids=list(data["ids"]),
+                mode=data["mode"],
+                index_type=data.get("index_type", INDEX_TYPE_FLAT),
+                id_mapped=data.get("id_mapped", False),
+            )
+        return cls(ids=list(data))
+
+
+def configure_index(
+    index: faiss.Index,
+    index_type: str,
+    nprobe: Optional[int] = None,
+    ef_search: Optional[int] = None,
+) -> None:
+    """Apply default search-time parameters to a loaded index.
+
+    Args:
+        index: Index read from storage.
+        index_type: Index type recorded in the index metadata.
+        nprobe: Number of inverted lists visited by IVF indexes.
+        ef_search: Size of the HNSW candidate list.
+    """
+
+    parameter_space = faiss.ParameterSpace()
+    if nprobe is not None and index_type in IVF_INDEX_TYPES:
+        parameter_space.set_index_parameter(index, "nprobe", nprobe)
+    if ef_search is not None and index_type == INDEX_TYPE_HNSW_FLAT:
+        parameter_space.set_index_parameter(index, "efSearch", ef_search)
+
+
+def make_search_parameters(
+    index: faiss.Index,
+    nprobe: Optional[int] = None,
+    ef_search: Optional[int] = None,
+) -> Optional[faiss.SearchParameters]:
+    """Build per-query search parameters overriding the index defaults.
+
+    Unlike :func:`configure_index` this does not mutate the shared index, so
+    concurrent queries can use different values.
+
+    Returns:
+        Search parameters for ``index.search`` or ``None`` when the index
+        type has nothing to override.
+    """
+
+    if nprobe is None and ef_search is None:
+        return None
+
+    # IndexIDMap forwards search parameters to the wrapped index unchanged.
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        index = faiss.downcast_index(index.index)
+
+    inner = index
+    if isinstance(index, faiss.IndexPreTransform):
+        inner = faiss.downcast_index(index.index)
+
+    # The SWIG constructors take no keyword arguments in the faiss stubs, so
+    # the fields are set on the created objects.
+    params: Optional[faiss.SearchParameters] = None
+    if nprobe is not None and faiss.try_extract_index_ivf(inner) is not None:
+        ivf_params = faiss.SearchParametersIVF()
+        ivf_params.nprobe = nprobe
+        params = ivf_params
+    elif ef_search is not None and isinstance(inner, faiss.IndexHNSW):
+        # SearchParametersHNSW exists at runtime but is missing from the stubs.
+        hnsw_params = faiss.SearchParametersHNSW()  # type: ignore[attr-defined]
+        hnsw_params.efSearch = ef_search
+        params = hnsw_params
+
+    if params is not None and inner is not index:
+        pre_transform_params = faiss.SearchParametersPreTransform()
+        pre_transform_params.index_params = params
+        params = pre_transform_params
+    return params
+
 
 class IndexBuilder:
     """Create and serialize FAISS indexes for cap embeddings."""
 
+    def __init__(
+        self,
+        index_type: str = INDEX_TYPE_FLAT,
+        ivf_nlist: int = 0,
+        hnsw_m: int = 32,
+        pq_m: int = 16,
+    ) -> None:
+        """Configure the type of FAISS index to build.
+
+        Args:
+            index_type: One of ``INDEX_TYPES``.
+            ivf_nlist: Number of IVF coarse clusters; ``0`` picks roughly
+                ``4 * sqrt(n)`` for ``n`` vectors.
+            hnsw_m: Number of neighbours per node in HNSW graphs.
+            pq_m: Number of product quantizer sub-vectors.
+        """
+
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type: {index_type}")
+
+        self.index_type = index_type
+        self.ivf_nlist = ivf_nlist
+        self.hnsw_m = hnsw_m
+        self.pq_m = pq_m
+
     def build_index(
-        self, embeddings: list[list[float]], metadata: list[int]
-    ) -> tuple[faiss.IndexFlatIP, bytes]:
+        self,
+        embeddings: np.ndarray | list[list[float]],
+        metadata: Sequence[int] | np.ndarray,
+    ) -> tuple[faiss.Index, bytes]:
         """
         Build a FAISS index from in-memory data.
 
         Args:
-            embeddings: A list of float vectors (same length).
-            metadata: A list of identifiers (e.g. s3 keys or image IDs).
+            embeddings: Matrix of float vectors, one row per augmented cap.
+                A C-contiguous ``float32`` matrix is normalized in place
+                instead of being copied.
+            metadata: Augmented cap IDs, stored as FAISS IDs so single
+                entries can later be added or removed.
 
         Returns:
             index: The built FAISS index object.
@@ -27,12 +191,125 @@ class IndexBuilder:
         """
         logger.info("Building FAISS index with %d vectors", len(embeddings))
 
-        np_embeddings = np.array(embeddings, dtype=np.float32)
+        np_embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
         faiss.normalize_L2(np_embeddings)
+        np_ids = np.asarray(metadata, dtype=np.int64)
 
-        index = faiss.IndexFlatIP(np_embeddings.shape[1])
-        index.add(np_embeddings)
+        index, index_type = self._create_index(np_embeddings, ids=np_ids)
 
-        metadata_blob = pickle.dumps(metadata)
+        metadata_blob = IndexMetadata(
+            ids=np_ids.tolist(), index_type=index_type, id_mapped=True
+        ).to_bytes()
 
         return index, metadata_blob
+
+    def build_centroid_index(
+        self,
+        embeddings: np.ndarray | list[list[float]],
+        cap_ids: Sequence[int] | np.ndarray,
+        prototypes_per_cap: int = 1,
+    ) -> tuple[faiss.Index, bytes]:
+        """
+        Build a FAISS index holding a few prototype vectors per beer cap.
+
+        With one prototype the normalized centroid of all augmented embeddings
+        of a cap is stored. With more, the prototypes are spherical k-means
+        centres of the cap's embeddings. Queries then only need a handful of
+        neighbours per requested cap instead of every augmented image.
+
+        Args:
+            embeddings: Matrix of float vectors, one row per augmented cap.
+                A C-contiguous ``float32`` matrix is normalized in place.
+            cap_ids: Beer cap ID of each embedding.
+            prototypes_per_cap: Number of prototype vectors stored per cap.
+
+        Returns:
+            index: The built FAISS index object.
+            metadata_blob: The pickled metadata for saving.
+        """
+        np_embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        faiss.normalize_L2(np_embeddings)
+        np_cap_ids = np.asarray(cap_ids, dtype=np.int64)
+
+        prototypes: list[np.ndarray] = []
+        prototype_ids: list[int] = []
+        for cap_id in np.unique(np_cap_ids):
+            vectors = np_embeddings[np_cap_ids == cap_id]
+            centres = self._compute_prototypes(vectors, prototypes_per_cap)
+            prototypes.append(centres)
+            prototype_ids.extend([int(cap_id)] * len(centres))
+
+        np_prototypes = np.ascontiguousarray(np.vstack(prototypes), dtype=np.float32)
+        faiss.normalize_L2(np_prototypes)
+
+        logger.info(
+            "Building centroid FAISS index with %d prototypes for %d vectors",
+            len(prototype_ids),
+            len(embeddings),
+        )
+
+        index, index_type = self._create_index(np_prototypes)
+
+        metadata_blob = IndexMetadata(
+            ids=prototype_ids, mode=INDEX_MODE_CENTROID, index_type=index_type
+        ).to_bytes()
+
+        return index, metadata_blob
+
+    def _create_index(
+        self, vectors: np.ndarray, ids: Optional[np.ndarray] = None
+    ) -> tuple[faiss.Index, str]:
+        count, dim = vectors.shape
+        index_type = self.index_type
+
+        if index_type in PQ_INDEX_TYPES and (
+            count < PQ_MIN_TRAINING_VECTORS or dim % self.pq_m
+        ):
+            logger.warning(
+                "Cannot train %s with %d vectors of dimension %d; using flat index",
+                index_type,
+                count,
+                dim,
+            )
+            index_type = INDEX_TYPE_FLAT
+
+        nlist = self.ivf_nlist or int(4 * math.sqrt(count))
+        nlist = max(1, min(nlist, count))
+        factory = {
+            INDEX_TYPE_FLAT: "Flat",
+            INDEX_TYPE_IVF_FLAT: f"IVF{nlist},Flat",
+            INDEX_TYPE_HNSW_FLAT: f"HNSW{self.hnsw_m},Flat",
+            INDEX_TYPE_IVF_PQ: f"IVF{nlist},PQ{self.pq_m}",
+            INDEX_TYPE_OPQ_IVF_PQ: f"OPQ{self.pq_m},IVF{nlist},PQ{self.pq_m}",
+        }[index_type]
+
+        logger.info("Creating FAISS index '%s' for %d vectors", factory, count)
+        index = faiss.index_factory(dim, factory, faiss.METRIC_INNER_PRODUCT)
+        if not index.is_trained:
+            index.train(vectors)
+
+        if ids is None:
+            index.add(vectors)
+        else:
+            index = faiss.IndexIDMap2(index)
+            index.add_with_ids(vectors, ids)
+
+        return index, index_type
+
+    @staticmethod
+    def _compute_prototypes(vectors: np.ndarray, count: int) -> np.ndarray:
+        if count <= 1:
+            return vectors.mean(axis=0, keepdims=True)
+        if len(vectors) <= count:
+            return vectors
+
+        kmeans = faiss.Kmeans(
+            vectors.shape[1],
+            count,
+            niter=20,
+            spherical=True,
+            min_points_per_centroid=1,
+        )
+        kmeans.train(vectors)
+        assert kmeans.centroids is not None
+        return kmeans.centroids
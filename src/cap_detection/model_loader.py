@@ -1,29 +1,102 @@
-from functools import lru_cache
+import threading
+from pathlib import Path
+from typing import Any, Callable, TypeVar
 
 import clip  # type: ignore[import-untyped]
 import torch
 from torch import nn
 from torchvision.transforms import Compose  # type: ignore[import-untyped]
 
+from src.cap_detection.background_remover import BACKEND_U2NET, BackgroundRemover
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+CLIP_MODEL_NAME = "ViT-B/32"
+
+T = TypeVar("T")
+
+# Process-wide registry of loaded models, keyed by model name or weights path.
+_models: dict[str, Any] = {}
+_models_lock = threading.Lock()
+
+
+def _get_or_load(key: str, loader: Callable[[], T]) -> T:
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _models_lock:
+        model = _models.get(key)
+        if model is None:
+            model = loader()
+            _models[key] = model
+            logger.info(
+                "Model %s uses %.1f MiB", key, _module_bytes(_as_module(model)) / 2**20
+            )
+    return model
+
 
-@lru_cache(maxsize=1)
 def load_model_and_preprocess() -> tuple[nn.Module, Compose]:
     """Load the CLIP model and preprocessing pipeline.
 
+    The model is loaded once per process and shared by every caller.
+
     Returns:
         A tuple containing the loaded model and its preprocessing transform.
     """
 
-    try:
-        device: str = "cuda" if torch.cuda.is_available() else "cpu"
-        model, preprocess = clip.load("ViT-B/32", device=device)
-        logger.info("Loaded CLIP model ViT-B/32")
+    def load() -> tuple[nn.Module, Compose]:
+        try:
+            device: str = "cuda" if torch.cuda.is_available() else "cpu"
+            model, preprocess = clip.load(CLIP_MODEL_NAME, device=device)
+            logger.info("Loaded CLIP model %s", CLIP_MODEL_NAME)
+
+            return model, preprocess
+        except Exception as e:
+            logger.error(f"Failed to load CLIP model: {e}")
+            raise
+
+    return _get_or_load(f"clip:{CLIP_MODEL_NAME}", load)
+
+
+def load_background_remover(
+    model_path: Path | str, backend: str = BACKEND_U2NET
+) -> BackgroundRemover:
+    """Return the shared background remover for the given model file.
+
+    Args:
+        model_path: Filesystem path to the serialized background removal model.
+        backend: Background removal backend the file belongs to.
+    """
+
+    path = Path(model_path).resolve()
+    return _get_or_load(
+        f"{backend}:{path}",
+        lambda: BackgroundRemover(model_path=path, backend=backend),
+    )
+
+
+def loaded_model_sizes() -> dict[str, int]:
+    """Report the parameter and buffer memory of every loaded model in bytes."""
+    return {key: _module_bytes(_as_module(model)) for key, model in _models.items()}
+
+
+def unload_models() -> None:
+    """Drop all loaded models so the next request loads them again."""
+    with _models_lock:
+        _models.clear()
+
+
+def _as_module(model: Any) -> Any:
+    if isinstance(model, tuple):
+        return model[0]
+    # BackgroundRemover wraps its U2NET module.
+    return getattr(model, "model", model)
+
 
-        return model, preprocess
-    except Exception as e:
-        logger.error(f"Failed to load CLIP model: {e}")
-        raise
+def _module_bytes(module: Any) -> int:
+    if not isinstance(module, nn.Module):
+        return 0
+    tensors = [*module.parameters(), *module.buffers()]
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
@@ -1,6 +1,7 @@
-from typing import Optional
+from typing import Collection, Optional, Sequence, cast
 
-from sqlalchemy import select
+import numpy as np
+from sqlalchemy import func, insert, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.db.entities.augmented_cap_entity import AugmentedCap
@@ -16,6 +17,33 @@ async def create_augmented_cap(
     return new_aug
 
 
+async def create_augmented_caps(
+    session: AsyncSession, rows: Sequence[tuple[int, str]]
+) -> list[int]:
+    """Insert several augmented caps with multi-row ``INSERT ... RETURNING``.
+
+    The caller owns the transaction; nothing is committed here.
+
+    Args:
+        session: Database session.
+        rows: ``(beer_cap_id, s3_key)`` of every augmented cap to create.
+
+    Returns:
+        IDs of the created augmented caps in the order of ``rows``.
+    """
+    if not rows:
+        return []
+
+    result = await session.scalars(
+        insert(AugmentedCap).returning(AugmentedCap.id, sort_by_parameter_order=True),
+        [
+            {"beer_cap_id": beer_cap_id, "s3_key": s3_key}
+            for beer_cap_id, s3_key in rows
+        ],
+    )
+    return list(result)
+
+
 async def get_augmented_cap_by_id(
     session: AsyncSession, augmented_cap_id: int
 ) -> Optional[AugmentedCap]:
@@ -30,6 +58,118 @@ async def get_all_augmented_caps(session: AsyncSession) -> list[AugmentedCap]:
     return list(result.scalars().all())
 
 
+async def count_augmented_caps(session: AsyncSession) -> int:
+    result = await session.execute(select(func.count(AugmentedCap.id)))
+    return result.scalar_one()
+
+
+async def get_augmented_caps_to_embed(
+    session: AsyncSession, embedding_model: Optional[str] = None
+) -> list[tuple[int, str]]:
+    """Return ``(id, s3_key)`` of augmented caps needing a new embedding.
+
+    Args:
+        session: Database session.
+        embedding_model: Skip caps already embedded by this model; ``None``
+            returns every augmented cap.
+    """
+    stmt = select(AugmentedCap.id, AugmentedCap.s3_key).order_by(AugmentedCap.id)
+    if embedding_model is not None:
+        stmt = stmt.where(
+            or_(
+                AugmentedCap.embedding_vector.is_(None),
+                AugmentedCap.embedding_model.is_(None),
+                AugmentedCap.embedding_model != embedding_model,
+            )
+        )
+    result = await session.execute(stmt)
+    return [(row.id, row.s3_key) for row in result]
+
+
+async def get_augmented_cap_beer_cap_ids(session: AsyncSession) -> dict[int, int]:
+    result = await session.execute(select(AugmentedCap.id, AugmentedCap.beer_cap_id))
+    return {row.id: row.beer_cap_id for row in result}
+
+
+async def get_embedded_augmented_cap_ids(session: AsyncSession) -> dict[int, int]:
+    """Return ``{augmented cap ID: beer cap ID}`` of caps with an embedding."""
+    result = await session.execute(
+        select(AugmentedCap.id, AugmentedCap.beer_cap_id).where(
+            AugmentedCap.embedding_vector.is_not(None)
+        )
+    )
+    return {row.id: row.beer_cap_id for row in result}
+
+
+async def get_augmented_cap_embeddings(
+    session: AsyncSession, augmented_cap_ids: Collection[int]
+) -> list[tuple[int, int, np.ndarray]]:
+    """Return ``(ID, beer cap ID, embedding)`` of the given embedded caps."""
+    if not augmented_cap_ids:
+        return []
+
+    result = await session.execute(
+        select(AugmentedCap.id, AugmentedCap.beer_cap_id, AugmentedCap.embedding_vector)
+        .where(
+            AugmentedCap.id.in_(augmented_cap_ids),
+            AugmentedCap.embedding_vector.is_not(None),
+        )
+        .order_by(AugmentedCap.id)
+    )
+    return [(row.id, row.beer_cap_id, row.embedding_vector) for row in result]
+
+
+async def load_embedding_matrix(
+    session: AsyncSession, chunk_size: int = 10000
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Stream all stored embeddings into a preallocated ``float32`` matrix.
+
+    Rows are fetched through a server-side cursor in chunks of ``chunk_size``
+    without building ORM objects, so memory is dominated by the matrix.
+
+    Returns:
+        Augmented cap IDs (``int64``), beer cap IDs (``int32``) and the
+        embedding matrix with one row per augmented cap, ordered by ID.
+    """
+    count_result = await session.execute(
+        select(func.count(AugmentedCap.id)).where(
+            AugmentedCap.embedding_vector.is_not(None)
+        )
+    )
+    capacity = count_result.scalar_one()
+
+    stream = await session.stream(
+        select(AugmentedCap.id, AugmentedCap.beer_cap_id, AugmentedCap.embedding_vector)
+        .where(AugmentedCap.embedding_vector.is_not(None))
+        .order_by(AugmentedCap.id)
+        .execution_options(yield_per=chunk_size)
+    )
+
+    ids = np.empty(capacity, dtype=np.int64)
+    cap_ids = np.empty(capacity, dtype=np.int32)
+    matrix: Optional[np.ndarray] = None
+    size = 0
+    async for partition in stream.partitions():
+        rows = cast(Sequence[tuple[int, int, np.ndarray]], partition)
+        for aug_id, beer_cap_id, embedding in rows:
+            if matrix is None:
+                matrix = np.empty((capacity, embedding.shape[0]), dtype=np.float32)
+            if size == len(ids):
+                # Rows were inserted after counting; grow the buffers.
+                capacity = max(1, 2 * size)
+                ids = np.resize(ids, capacity)
+                cap_ids = np.resize(cap_ids, capacity)
+                matrix = np.resize(matrix, (capacity, matrix.shape[1]))
+            ids[size] = aug_id
+            cap_ids[size] = beer_cap_id
+            matrix[size] = embedding
+            size += 1
+
+    if matrix is None:
+        matrix = np.empty((0, 0), dtype=np.float32)
+    return ids[:size], cap_ids[:size], matrix[:size]
+
+
 async def delete_augmented_cap(session: AsyncSession, augmented_cap_id: int) -> bool:
     aug = await get_augmented_cap_by_id(session, augmented_cap_id)
     if aug:
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Iterable, Optional
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -54,6 +54,17 @@ async def get_beer_cap_by_id(
     return result.scalar_one_or_none()
 
 
+async def get_beer_caps_by_ids(
+    session: AsyncSession, beer_cap_ids: Iterable[int]
+) -> list[BeerCap]:
+    ids = list(beer_cap_ids)
+    if not ids:
+        return []
+
+    result = await session.execute(select(BeerCap).where(BeerCap.id.in_(ids)))
+    return list(result.scalars().all())
+
+
 async def get_beer_caps_by_beer_id(
     session: AsyncSession,
     beer_id: int,
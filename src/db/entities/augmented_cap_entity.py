@@ -2,11 +2,13 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import Float, ForeignKey, Integer, String
-from sqlalchemy.dialects.postgresql import ARRAY
+import numpy as np
+from sqlalchemy import ForeignKey, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from src.config import settings
 from src.db.entities import Base
+from src.db.types import PackedVector
 
 if TYPE_CHECKING:
     from .beer_cap_entity import BeerCap
@@ -24,9 +26,12 @@ class AugmentedCap(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
 
     s3_key: Mapped[str] = mapped_column(String, nullable=False, unique=True)
-    embedding_vector: Mapped[Optional[list[float]]] = mapped_column(
-        ARRAY(Float), nullable=True
+    embedding_vector: Mapped[Optional[np.ndarray]] = mapped_column(
+        "embedding",
+        PackedVector(settings.embedding_storage_dtype, settings.embedding_dim),
+        nullable=True,
     )
+    embedding_model: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
 
     beer_cap_id: Mapped[int] = mapped_column(
         ForeignKey("beer_caps.id", ondelete="CASCADE"), nullable=False
@@ -36,7 +41,7 @@ class AugmentedCap(Base):
     def __repr__(self) -> str:
         return (
             f"<AugmentedCap id={self.id} beer_cap_id={self.beer_cap_id} "
-            f"s3_key='{self.s3_key}' vector_len={len(self.embedding_vector) if self.embedding_vector else 0}>"
+            f"s3_key='{self.s3_key}' vector_len={len(self.embedding_vector) if self.embedding_vector is not None else 0}>"
         )
 
     def __str__(self) -> str:
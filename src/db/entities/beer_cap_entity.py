@@ -27,6 +27,9 @@ class BeerCap(Base):
     s3_key: Mapped[str] = mapped_column(String, nullable=False, unique=True)
     variant_name: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     collected_date: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
+    augmentation_fingerprint: Mapped[Optional[str]] = mapped_column(
+        String(64), nullable=True
+    )
 
     beer_id: Mapped[int] = mapped_column(ForeignKey("beers.id"), nullable=False)
     beer: Mapped["Beer"] = relationship(back_populates="caps")
@@ -0,0 +1,72 @@
+from typing import Any, Optional
+
+import numpy as np
+from sqlalchemy import LargeBinary
+from sqlalchemy.engine import Dialect
+from sqlalchemy.types import TypeDecorator
+
+VECTOR_DTYPES = ("float32", "float16")
+
+
+def pack_vector(vector: Any, dtype: str = "float32") -> bytes:
+    """Pack a 1-D vector into raw little-endian bytes of the given dtype."""
+    array = np.asarray(vector, dtype=np.dtype(dtype).newbyteorder("<"))
+    if array.ndim != 1:
+        raise ValueError(f"Expected a 1-D vector, got shape {array.shape}")
+    return array.tobytes()
+
+
+def unpack_vector(
+    blob: bytes, dtype: str = "float32", expected_dim: Optional[int] = None
+) -> np.ndarray:
+    """Decode bytes written by :func:`pack_vector` into a ``float32`` vector.
+
+    ``float32`` data is returned as a read-only view of ``blob`` without
+    copying; ``float16`` data is upcast.
+
+    Raises:
+        ValueError: If the blob size does not match ``expected_dim`` values of
+            ``dtype``, e.g. because the row was written with another dtype.
+    """
+    np_dtype = np.dtype(dtype).newbyteorder("<")
+    if expected_dim is not None and len(blob) != np_dtype.itemsize * expected_dim:
+        raise ValueError(
+            f"Packed vector has {len(blob)} bytes, expected {expected_dim} "
+            f"{dtype} values ({np_dtype.itemsize * expected_dim} bytes)"
+        )
+    if len(blob) % np_dtype.itemsize:
+        raise ValueError(f"Packed vector of {len(blob)} bytes is not a {dtype} vector")
+    array = np.frombuffer(blob, dtype=np_dtype)
+    if array.dtype != np.float32:
+        array = array.astype(np.float32)
+    return array
+
+
+class PackedVector(TypeDecorator):
+    """Store a float vector as packed ``bytea`` instead of a ``float8[]`` array.
+
+    When ``dim`` is given, stored vectors whose size does not match ``dim``
+    values of ``dtype`` are rejected on read instead of being misdecoded.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def __init__(self, dtype: str = "float32", dim: Optional[int] = None) -> None:
+        if dtype not in VECTOR_DTYPES:
+            raise ValueError(f"Unsupported vector dtype: {dtype}")
+        super().__init__()
+        self.dtype = dtype
+        self.dim = dim
+
+    def process_bind_param(self, value: Any, dialect: Dialect) -> Optional[bytes]:
+        if value is None:
+            return None
+        return pack_vector(value, self.dtype)
+
+    def process_result_value(
+        self, value: Optional[bytes], dialect: Dialect
+    ) -> Optional[np.ndarray]:
+        if value is None:
+            return None
+        return unpack_vector(value, self.dtype, self.dim)
@@ -2,11 +2,19 @@
 
 from .beer_cap_facade import BeerCapFacade
 from .cap_detection_service import CapDetectionService
-from .query_service import BeerCapNotFoundError, QueryService
+from .index_updater import IndexUpdater
+from .inference_executor import InferenceExecutor, InferenceQueueFullError
+from .query_batcher import QueryBatcher
+from .query_service import BeerCapNotFoundError, IndexChecksumError, QueryService
 
 __all__ = [
     "BeerCapFacade",
     "CapDetectionService",
+    "IndexUpdater",
+    "InferenceExecutor",
+    "InferenceQueueFullError",
+    "QueryBatcher",
     "QueryService",
     "BeerCapNotFoundError",
+    "IndexChecksumError",
 ]
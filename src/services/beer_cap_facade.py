@@ -27,6 +27,7 @@ from src.db.entities.augmented_cap_entity import AugmentedCap
 from src.db.entities.beer_brand_entity import BeerBrand
 from src.db.entities.beer_cap_entity import BeerCap
 from src.db.entities.country_entity import Country
+from src.storage.minio.async_minio_client import AsyncMinioClient
 from src.storage.minio.minio_client import MinioClientWrapper
 
 
@@ -37,6 +38,7 @@ class BeerCapFacade:
         session_maker: Callable[[], AsyncSession] = GLOBAL_ASYNC_SESSION_MAKER,
     ):
         self.minio_wrapper = minio_wrapper
+        self.storage = AsyncMinioClient(minio_wrapper)
         self.session_maker = session_maker
 
         self.original_caps_bucket = settings.minio_original_caps_bucket
@@ -126,7 +128,7 @@ class BeerCapFacade:
                 return None
 
             object_name = cap_metadata.filename
-            self.minio_wrapper.upload_file(
+            await self.storage.upload_file(
                 self.original_caps_bucket,
                 object_name,
                 image_data,
@@ -159,7 +161,7 @@ class BeerCapFacade:
                 return None
 
             object_name = cap_metadata.filename
-            self.minio_wrapper.upload_file(
+            await self.storage.upload_file(
                 self.original_caps_bucket,
                 object_name,
                 image_data,
@@ -185,7 +187,7 @@ class BeerCapFacade:
             return None
 
         for aug in beer_cap.augmented_caps:
-            self.minio_wrapper.delete_file(self.augmented_caps_bucket, aug.s3_key)
+            await self.storage.delete_file(self.augmented_caps_bucket, aug.s3_key)
             await session.delete(aug)
 
         await session.flush()
@@ -200,11 +202,11 @@ class BeerCapFacade:
                 return False
 
             for aug_cap in beer_cap.augmented_caps:
-                self.minio_wrapper.delete_file(
+                await self.storage.delete_file(
                     self.augmented_caps_bucket, aug_cap.s3_key
                 )
 
-            self.minio_wrapper.delete_file(self.original_caps_bucket, beer_cap.s3_key)
+            await self.storage.delete_file(self.original_caps_bucket, beer_cap.s3_key)
 
             await session.delete(beer_cap)
             await session.commit()
@@ -223,7 +225,7 @@ class BeerCapFacade:
             s3_keys = [aug.s3_key for aug in augmented_caps]
 
             if s3_keys:
-                self.minio_wrapper.delete_files(self.augmented_caps_bucket, s3_keys)
+                await self.storage.delete_files(self.augmented_caps_bucket, s3_keys)
 
             await session.execute(delete(AugmentedCap))
             await session.commit()
@@ -238,7 +240,7 @@ class BeerCapFacade:
 
             for cap in beer.caps:
                 await self._delete_augmented_caps_helper(session, cap.id)
-                self.minio_wrapper.delete_file(self.original_caps_bucket, cap.s3_key)
+                await self.storage.delete_file(self.original_caps_bucket, cap.s3_key)
                 await session.delete(cap)
 
             await session.delete(beer)
@@ -259,7 +261,7 @@ class BeerCapFacade:
                 return None
 
             object_name = aug_metadata.filename
-            self.minio_wrapper.upload_file(
+            await self.storage.upload_file(
                 self.augmented_caps_bucket,
                 object_name,
                 image_data,
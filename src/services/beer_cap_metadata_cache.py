@@ -0,0 +1,74 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import Iterable, Optional
+
+from src.db.entities.beer_cap_entity import BeerCap
+
+
+@dataclass(frozen=True)
+class BeerCapMetadata:
+    """Beer cap fields needed to build similarity responses."""
+
+    id: int
+    variant_name: Optional[str]
+    collected_date: Optional[date]
+    s3_key: str
+
+    @classmethod
+    def from_entity(cls, cap: BeerCap) -> "BeerCapMetadata":
+        return cls(
+            id=cap.id,
+            variant_name=cap.variant_name,
+            collected_date=cap.collected_date,
+            s3_key=cap.s3_key,
+        )
+
+
+class BeerCapMetadataCache:
+    """In-memory lookup of beer cap metadata for similarity results.
+
+    The cache is filled with every cap whenever the search index is loaded
+    and is updated with caps fetched on a miss. Callers that modify or delete
+    caps must invalidate them so stale metadata is never served.
+
+    Every invalidation bumps :attr:`generation`. Callers that fill the cache
+    from a database read should compare it before the read and before
+    filling, and skip the fill if it changed, since the read may predate the
+    invalidated change.
+    """
+
+    def __init__(self) -> None:
+        self._caps: dict[int, BeerCapMetadata] = {}
+        self._generation = 0
+
+    def __len__(self) -> int:
+        return len(self._caps)
+
+    @property
+    def generation(self) -> int:
+        """Number of invalidations so far."""
+        return self._generation
+
+    def replace(self, caps: Iterable[BeerCap]) -> None:
+        """Replace the whole cache with the given caps."""
+        self._caps = {cap.id: BeerCapMetadata.from_entity(cap) for cap in caps}
+
+    def get_many(self, beer_cap_ids: Iterable[int]) -> dict[int, BeerCapMetadata]:
+        """Return the cached metadata of the given caps, skipping misses."""
+        caps = self._caps
+        return {cap_id: caps[cap_id] for cap_id in beer_cap_ids if cap_id in caps}
+
+    def put(self, cap: BeerCap) -> BeerCapMetadata:
+        """Cache a cap loaded from the database."""
+        metadata = BeerCapMetadata.from_entity(cap)
+        self._caps[cap.id] = metadata
+        return metadata
+
+    def invalidate(self, beer_cap_ids: Optional[Iterable[int]] = None) -> None:
+        """Drop the given caps, or every cap when ``beer_cap_ids`` is ``None``."""
+        self._generation += 1
+        if beer_cap_ids is None:
+            self._caps = {}
+            return
+        for cap_id in beer_cap_ids:
+            self._caps.pop(cap_id, None)
@@ -1,22 +1,47 @@
 import asyncio
-import io
+import hashlib
 import os
 import tempfile
-from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Callable
+from typing import Callable, Optional
 
 import faiss  # type: ignore[import-untyped]
+import numpy as np
+from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.cap_detection.augmentation import augmentation_config_hash
+from src.cap_detection.augmentation_pool import AugmentationPool
 from src.cap_detection.embedding_generator import EmbeddingGenerator
 from src.cap_detection.image_processor import ImageAugmenter
-from src.cap_detection.index_builder import IndexBuilder
+from src.cap_detection.index_builder import INDEX_MODE_CENTROID, IndexBuilder
+from src.cap_detection.model_loader import CLIP_MODEL_NAME
 from src.config import settings
-from src.db.crud.augmented_cap_crud import create_augmented_cap, get_all_augmented_caps
-from src.db.crud.beer_cap_crud import get_all_beer_caps
+from src.db.crud.augmented_cap_crud import (
+    count_augmented_caps,
+    create_augmented_caps,
+    get_augmented_caps_to_embed,
+    load_embedding_matrix,
+)
+from src.db.crud.beer_cap_crud import get_all_beer_caps, get_beer_cap_by_id
 from src.db.database import GLOBAL_ASYNC_SESSION_MAKER
+from src.db.entities.augmented_cap_entity import AugmentedCap
+from src.db.entities.beer_cap_entity import BeerCap
+from src.services.embedding_pipeline import EmbeddingPipeline
+from src.storage.minio.async_minio_client import AsyncMinioClient
 from src.storage.minio.minio_client import MinioClientWrapper
+from src.utils.logger import get_logger
+from src.utils.tasks import task_group
+
+logger = get_logger(__name__)
+
+# Beer cap, its augmentation fingerprint and its encoded augmented images, or
+# ``None`` instead of the images when the cap is up to date.
+AugmentedCapImages = tuple[BeerCap, str, Optional[list[bytes]]]
+
+
+def _augmentation_fingerprint(config_hash: str, source_etag: str) -> str:
+    return hashlib.sha256(f"{config_hash}:{source_etag}".encode()).hexdigest()
 
 
 class CapDetectionService:
@@ -29,116 +54,338 @@ class CapDetectionService:
         u2net_model_path: str | None = None,
     ) -> None:
         self.minio_wrapper = minio_wrapper
+        self.storage = AsyncMinioClient(minio_wrapper)
         self.session_maker = session_maker
 
         self.original_caps_bucket = settings.minio_original_caps_bucket
         self.augmented_caps_bucket = settings.minio_augmented_caps_bucket
-        self.index_bucket = settings.minio_augmented_caps_bucket
+        self.index_bucket = settings.minio_index_bucket
         self.u2net_model_path: Path = Path(
-            u2net_model_path or settings.u2net_model_path
+            u2net_model_path or settings.background_removal_model_path
         )
+        self.background_removal_backend = settings.background_removal_backend
+        self.augmentation_workers = settings.augmentation_workers
+        self.augmented_cap_insert_chunk_size = settings.augmented_cap_insert_chunk_size
         self.index_file_name = settings.minio_index_file_name
         self.metadata_file_name = settings.minio_metadata_file_name
 
-        self.embedding_generator = EmbeddingGenerator()
-        self.index_builder = IndexBuilder()
+        self.embedding_batch_size = settings.embedding_batch_size
+        self.embedding_generator = EmbeddingGenerator(
+            batch_size=self.embedding_batch_size,
+            preprocess_workers=settings.embedding_preprocess_workers,
+        )
+        self.embedding_model_name = CLIP_MODEL_NAME
+        self.index_builder = IndexBuilder(
+            index_type=settings.index_type,
+            ivf_nlist=settings.index_ivf_nlist,
+            hnsw_m=settings.index_hnsw_m,
+            pq_m=settings.index_pq_m,
+        )
+
+    def _augmentation_config_hash(self, augmentations_per_image: int) -> str:
+        return augmentation_config_hash(
+            augmentations_per_image,
+            background_removal_backend=self.background_removal_backend,
+            model_path=self.u2net_model_path,
+        )
 
-    async def preprocess(self, augmentations_per_image: int) -> int:
-        created = 0
+    async def preprocess(
+        self, augmentations_per_image: int, full_rebuild: bool = False
+    ) -> int:
+        """Create augmented images for beer caps whose augmentations are stale.
+
+        A cap is up to date when its stored augmentation fingerprint matches
+        the current augmentation config and the ETag of its original image.
+        Stale caps have their previous augmented caps replaced.
+
+        Args:
+            augmentations_per_image: Number of augmentations per original image.
+            full_rebuild: Re-augment every cap regardless of its fingerprint.
+
+        Returns:
+            Number of augmented caps created.
+        """
+
+        config_hash = self._augmentation_config_hash(augmentations_per_image)
 
         session = self.session_maker()
         async with session:
-            beer_caps = await get_all_beer_caps(session)
-            augmenter = ImageAugmenter(
+            beer_caps = await get_all_beer_caps(session, load_augmented_caps=True)
+            pool = AugmentationPool(
                 u2net_model_path=self.u2net_model_path,
                 augmentations_per_image=augmentations_per_image,
+                background_removal_backend=self.background_removal_backend,
+                workers=self.augmentation_workers,
             )
 
-            def process_cap(cap):
-                original_bytes = self.minio_wrapper.download_bytes(
+            pending: asyncio.Queue[BeerCap] = asyncio.Queue()
+            for cap in beer_caps:
+                pending.put_nowait(cap)
+            # Augmented caps are stored as soon as they are ready. The bounded
+            # queue stops the workers while uploads catch up, so only a few
+            # caps' augmented images are held in memory at once.
+            augmented: asyncio.Queue[Optional[AugmentedCapImages]] = asyncio.Queue(
+                maxsize=pool.workers
+            )
+
+            try:
+                async with task_group() as tasks:
+                    tasks.create_task(
+                        self._augment_caps(
+                            pending, augmented, pool, config_hash, full_rebuild
+                        )
+                    )
+                    store_task = tasks.create_task(
+                        self._store_augmented_caps(session, augmented)
+                    )
+            finally:
+                pool.shutdown()
+
+        created, skipped, failed = store_task.result()
+        logger.info(
+            "Created %d augmented caps, skipped %d up-to-date caps, %d caps failed",
+            created,
+            skipped,
+            failed,
+        )
+        return created
+
+    async def _augment_caps(
+        self,
+        pending: asyncio.Queue[BeerCap],
+        augmented: asyncio.Queue[Optional[AugmentedCapImages]],
+        pool: AugmentationPool,
+        config_hash: str,
+        full_rebuild: bool,
+    ) -> None:
+        async def worker() -> None:
+            while not pending.empty():
+                cap = pending.get_nowait()
+                etag = await self.storage.get_object_etag(
                     self.original_caps_bucket, cap.s3_key
                 )
-                augmented_images = augmenter.augment_image_bytes(original_bytes)
-                return cap, augmented_images
-
-            loop = asyncio.get_running_loop()
-            with ThreadPoolExecutor(max_workers=1) as executor:
-                results = await asyncio.gather(
-                    *[
-                        loop.run_in_executor(executor, process_cap, cap)
-                        for cap in beer_caps
-                    ]
+                fingerprint = _augmentation_fingerprint(config_hash, etag)
+                if (
+                    not full_rebuild
+                    and cap.augmented_caps
+                    and cap.augmentation_fingerprint == fingerprint
+                ):
+                    await augmented.put((cap, fingerprint, None))
+                    continue
+
+                original_bytes = await self.storage.download_bytes(
+                    self.original_caps_bucket, cap.s3_key
                 )
+                augmented_images = await pool.augment(original_bytes)
+                await augmented.put((cap, fingerprint, augmented_images))
 
-            for cap, augmented_images in results:
-                for idx, aug_bytes in enumerate(augmented_images):
-                    object_name = f"{Path(cap.s3_key).stem}_aug_{idx:03d}.png"
-                    self.minio_wrapper.upload_file(
-                        self.augmented_caps_bucket,
-                        object_name,
-                        io.BytesIO(aug_bytes),
-                        len(aug_bytes),
-                    )
-                    await create_augmented_cap(session, cap.id, object_name)
-                    created += 1
+        # Keep a couple of downloaded caps queued per worker without holding
+        # every original image in memory at once.
+        async with task_group() as workers:
+            for _ in range(2 * pool.workers):
+                workers.create_task(worker())
+        await augmented.put(None)
 
-            await session.commit()
-        return created
+    async def _store_augmented_caps(
+        self,
+        session: AsyncSession,
+        augmented: asyncio.Queue[Optional[AugmentedCapImages]],
+    ) -> tuple[int, int, int]:
+        created = 0
+        skipped = 0
+        failed = 0
+        # Rows are inserted and committed in chunks rather than one
+        # transaction per augmented image.
+        pending_rows: list[tuple[int, str]] = []
+        while (item := await augmented.get()) is not None:
+            cap, fingerprint, augmented_images = item
+            if augmented_images is None:
+                skipped += 1
+                continue
 
-    async def generate_embeddings(self) -> dict:
-        session = self.session_maker()
-        async with session:
-            augmented_caps = await get_all_augmented_caps(session)
+            stale_keys = {aug.s3_key for aug in cap.augmented_caps}
+            for aug in cap.augmented_caps:
+                await session.delete(aug)
+            await session.flush()
 
-            for aug_cap in augmented_caps:
-                aug_bytes = await asyncio.to_thread(
-                    self.minio_wrapper.download_bytes,
-                    self.augmented_caps_bucket,
-                    aug_cap.s3_key,
+            object_names = [
+                f"{Path(cap.s3_key).stem}_aug_{idx:03d}.png"
+                for idx in range(len(augmented_images))
+            ]
+            leftover_keys = stale_keys.difference(object_names)
+            if leftover_keys:
+                await self.storage.delete_files(
+                    self.augmented_caps_bucket, sorted(leftover_keys)
                 )
-                embedding_tensor = await asyncio.to_thread(
-                    self.embedding_generator.generate_embeddings,
-                    aug_bytes,
+
+            failures = await self.storage.upload_files(
+                self.augmented_caps_bucket,
+                list(zip(object_names, augmented_images)),
+            )
+            if failures:
+                # Leave the cap without augmented caps so the next run
+                # augments it again.
+                logger.error(
+                    "Skipping cap %d: %d augmented images failed to upload",
+                    cap.id,
+                    len(failures),
                 )
+                failed += 1
+                continue
+
+            pending_rows.extend((cap.id, name) for name in object_names)
+            cap.augmentation_fingerprint = fingerprint
+            if len(pending_rows) >= self.augmented_cap_insert_chunk_size:
+                created += len(await create_augmented_caps(session, pending_rows))
+                await session.commit()
+                pending_rows = []
+
+        created += len(await create_augmented_caps(session, pending_rows))
+        await session.commit()
+        return created, skipped, failed
 
-                aug_cap.embedding_vector = embedding_tensor.tolist()
+    async def augment_and_embed_cap(
+        self, beer_cap_id: int, augmentations_per_image: int
+    ) -> list[tuple[int, np.ndarray]]:
+        """Augment and embed a single beer cap.
 
+        Args:
+            beer_cap_id: ID of the beer cap to process.
+            augmentations_per_image: Number of augmented images to create.
+
+        Returns:
+            The ID and embedding of every created augmented cap, empty if the
+            beer cap does not exist.
+        """
+
+        session = self.session_maker()
+        async with session:
+            cap = await get_beer_cap_by_id(session, beer_cap_id)
+            if cap is None:
+                return []
+
+            augmenter = ImageAugmenter(
+                u2net_model_path=self.u2net_model_path,
+                augmentations_per_image=augmentations_per_image,
+                background_removal_backend=self.background_removal_backend,
+            )
+            etag = await self.storage.get_object_etag(
+                self.original_caps_bucket, cap.s3_key
+            )
+            original_bytes = await self.storage.download_bytes(
+                self.original_caps_bucket, cap.s3_key
+            )
+            augmented_images = await asyncio.to_thread(
+                augmenter.augment_image_bytes, original_bytes
+            )
+
+            embeddings = await asyncio.to_thread(
+                self.embedding_generator.generate_embeddings_batch, augmented_images
+            )
+
+            object_names = [
+                f"{Path(cap.s3_key).stem}_aug_{idx:03d}.png"
+                for idx in range(len(augmented_images))
+            ]
+            failures = await self.storage.upload_files(
+                self.augmented_caps_bucket, list(zip(object_names, augmented_images))
+            )
+            if failures:
+                raise failures[0].error
+
+            aug_ids = await create_augmented_caps(
+                session, [(cap.id, object_name) for object_name in object_names]
+            )
+            await session.execute(
+                update(AugmentedCap),
+                [
+                    {
+                        "id": aug_id,
+                        "embedding_vector": embedding,
+                        "embedding_model": self.embedding_model_name,
+                    }
+                    for aug_id, embedding in zip(aug_ids, embeddings)
+                ],
+            )
+            embedded = list(zip(aug_ids, embeddings))
+
+            cap.augmentation_fingerprint = _augmentation_fingerprint(
+                self._augmentation_config_hash(augmentations_per_image), etag
+            )
             await session.commit()
-            return {"updated_embeddings": len(augmented_caps)}
+        return embedded
+
+    async def generate_embeddings(self, full_rebuild: bool = False) -> dict:
+        """Embed augmented caps that lack an embedding from the current model.
+
+        Args:
+            full_rebuild: Re-embed every augmented cap.
+
+        Returns:
+            The number of updated and skipped augmented caps.
+        """
 
-    async def generate_index(self) -> int:
         session = self.session_maker()
         async with session:
-            augmented_caps = await get_all_augmented_caps(session)
+            total = await count_augmented_caps(session)
+            jobs = await get_augmented_caps_to_embed(
+                session, None if full_rebuild else self.embedding_model_name
+            )
+
+        pipeline = EmbeddingPipeline(
+            self.minio_wrapper,
+            self.augmented_caps_bucket,
+            self.embedding_generator,
+            self.session_maker,
+            self.embedding_model_name,
+            batch_size=self.embedding_batch_size,
+            download_concurrency=settings.embedding_download_concurrency,
+            decode_workers=settings.embedding_preprocess_workers,
+            queue_batches=settings.embedding_pipeline_queue_batches,
+        )
+        updated = await pipeline.run(jobs)
 
-            embeddings = []
-            metadata = []
-            for aug_cap in augmented_caps:
-                if aug_cap.embedding_vector:
-                    embeddings.append(aug_cap.embedding_vector)
-                    metadata.append(aug_cap.id)
+        return {
+            "updated_embeddings": updated,
+            "skipped_embeddings": total - len(jobs),
+        }
 
-            index, metadata_blob = await asyncio.to_thread(
-                self.index_builder.build_index, embeddings, metadata
+    async def generate_index(self, index_mode: str | None = None) -> int:
+        index_mode = index_mode or settings.index_mode
+
+        session = self.session_maker()
+        async with session:
+            metadata, cap_ids, embeddings = await load_embedding_matrix(
+                session, chunk_size=settings.embedding_load_chunk_size
             )
 
+            if index_mode == INDEX_MODE_CENTROID:
+                index, metadata_blob = await asyncio.to_thread(
+                    self.index_builder.build_centroid_index,
+                    embeddings,
+                    cap_ids,
+                    settings.index_prototypes_per_cap,
+                )
+            else:
+                index, metadata_blob = await asyncio.to_thread(
+                    self.index_builder.build_index, embeddings, metadata
+                )
+
             with tempfile.NamedTemporaryFile(suffix=".index") as tmp:
                 faiss.write_index(index, tmp.name)
                 tmp.seek(0)
                 index_data = tmp.read()
 
-            self.minio_wrapper.upload_file(
-                self.index_bucket,
-                self.index_file_name,
-                io.BytesIO(index_data),
-                len(index_data),
-            )
-
-            self.minio_wrapper.upload_file(
+            await self.storage.ensure_buckets_exist([self.index_bucket])
+            failures = await self.storage.upload_files(
                 self.index_bucket,
-                self.metadata_file_name,
-                io.BytesIO(metadata_blob),
-                len(metadata_blob),
+                [
+                    (self.index_file_name, index_data),
+                    (self.metadata_file_name, metadata_blob),
+                ],
+                content_type="application/octet-stream",
             )
+            if failures:
+                raise failures[0].error
 
             return len(embeddings)
@@ -0,0 +1,190 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+import numpy as np
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.cap_detection.embedding_generator import EmbeddingGenerator
+from src.db.entities.augmented_cap_entity import AugmentedCap
+from src.storage.minio.async_minio_client import AsyncMinioClient
+from src.storage.minio.minio_client import MinioClientWrapper
+from src.utils.logger import get_logger
+from src.utils.tasks import task_group
+
+logger = get_logger(__name__)
+
+EmbeddingJob = tuple[int, str]
+
+
+class EmbeddingPipeline:
+    """Embed augmented caps with overlapping download, decode, encode and write.
+
+    Each stage runs concurrently and hands work to the next one through a
+    bounded queue, so at most a few batches of images are held in memory
+    regardless of how many augmented caps are processed:
+
+    1. ``download_concurrency`` workers fetch images from MinIO.
+    2. A decoder groups them into batches and preprocesses them on a pool.
+    3. An encoder runs one ``encode_image`` call per batch.
+    4. A writer stores every batch with a bulk ``UPDATE`` and commits it.
+    """
+
+    def __init__(
+        self,
+        minio_wrapper: MinioClientWrapper,
+        bucket: str,
+        embedding_generator: EmbeddingGenerator,
+        session_maker: Callable[[], AsyncSession],
+        embedding_model: str,
+        batch_size: int = 32,
+        download_concurrency: int = 8,
+        decode_workers: int = 4,
+        queue_batches: int = 2,
+    ) -> None:
+        """Configure the pipeline.
+
+        Args:
+            minio_wrapper: Client used to download augmented images.
+            bucket: Bucket holding the augmented images.
+            embedding_generator: Model used to preprocess and encode images.
+            session_maker: Factory for the writer's database session.
+            embedding_model: Model name stored next to every embedding.
+            batch_size: Images per model call and per database write.
+            download_concurrency: Number of parallel MinIO downloads.
+            decode_workers: Threads decoding and preprocessing images.
+            queue_batches: Batches buffered between consecutive stages.
+        """
+
+        self.minio_wrapper = minio_wrapper
+        self.storage = AsyncMinioClient(minio_wrapper)
+        self.bucket = bucket
+        self.embedding_generator = embedding_generator
+        self.session_maker = session_maker
+        self.embedding_model = embedding_model
+        self.batch_size = batch_size
+        self.download_concurrency = download_concurrency
+        self.decode_workers = decode_workers
+        self.queue_batches = queue_batches
+
+    async def run(self, jobs: list[EmbeddingJob]) -> int:
+        """Embed and store the given augmented caps.
+
+        Args:
+            jobs: ``(augmented cap ID, S3 key)`` of every cap to embed.
+
+        Returns:
+            Number of stored embeddings.
+        """
+
+        if not jobs:
+            return 0
+
+        pending: asyncio.Queue[EmbeddingJob] = asyncio.Queue()
+        for job in jobs:
+            pending.put_nowait(job)
+
+        downloaded: asyncio.Queue[Optional[tuple[int, bytes]]] = asyncio.Queue(
+            maxsize=self.batch_size * self.queue_batches
+        )
+        decoded: asyncio.Queue[Optional[tuple[list[int], Any]]] = asyncio.Queue(
+            maxsize=self.queue_batches
+        )
+        encoded: asyncio.Queue[Optional[tuple[list[int], np.ndarray]]] = asyncio.Queue(
+            maxsize=self.queue_batches
+        )
+
+        with ThreadPoolExecutor(
+            max_workers=self.decode_workers, thread_name_prefix="decode"
+        ) as decode_pool:
+            async with task_group() as tasks:
+                tasks.create_task(self._download(pending, downloaded))
+                tasks.create_task(self._decode(downloaded, decoded, decode_pool))
+                tasks.create_task(self._encode(decoded, encoded))
+                write_task = tasks.create_task(self._write(encoded))
+
+        written = write_task.result()
+        logger.info("Stored %d embeddings", written)
+        return written
+
+    async def _download(
+        self,
+        pending: asyncio.Queue[EmbeddingJob],
+        downloaded: asyncio.Queue[Optional[tuple[int, bytes]]],
+    ) -> None:
+        async def worker() -> None:
+            while not pending.empty():
+                aug_id, s3_key = pending.get_nowait()
+                data = await self.storage.download_bytes(self.bucket, s3_key)
+                await downloaded.put((aug_id, data))
+
+        async with task_group() as workers:
+            for _ in range(self.download_concurrency):
+                workers.create_task(worker())
+        await downloaded.put(None)
+
+    async def _decode(
+        self,
+        downloaded: asyncio.Queue[Optional[tuple[int, bytes]]],
+        decoded: asyncio.Queue[Optional[tuple[list[int], Any]]],
+        decode_pool: ThreadPoolExecutor,
+    ) -> None:
+        finished = False
+        while not finished:
+            ids: list[int] = []
+            images: list[bytes] = []
+            while len(ids) < self.batch_size:
+                item = await downloaded.get()
+                if item is None:
+                    finished = True
+                    break
+                ids.append(item[0])
+                images.append(item[1])
+
+            if ids:
+                batch = await asyncio.to_thread(
+                    self.embedding_generator.preprocess_batch, images, decode_pool
+                )
+                await decoded.put((ids, batch))
+
+        await decoded.put(None)
+
+    async def _encode(
+        self,
+        decoded: asyncio.Queue[Optional[tuple[list[int], Any]]],
+        encoded: asyncio.Queue[Optional[tuple[list[int], np.ndarray]]],
+    ) -> None:
+        while (item := await decoded.get()) is not None:
+            ids, batch = item
+            embeddings = await asyncio.to_thread(
+                self.embedding_generator.encode_batch, batch
+            )
+            await encoded.put((ids, embeddings))
+
+        await encoded.put(None)
+
+    async def _write(
+        self, encoded: asyncio.Queue[Optional[tuple[list[int], np.ndarray]]]
+    ) -> int:
+        written = 0
+        session = self.session_maker()
+        async with session:
+            while (item := await encoded.get()) is not None:
+                ids, embeddings = item
+                await session.execute(
+                    update(AugmentedCap),
+                    [
+                        {
+                            "id": aug_id,
+                            "embedding_vector": embedding,
+                            "embedding_model": self.embedding_model,
+                        }
+                        for aug_id, embedding in zip(ids, embeddings)
+                    ],
+                )
+                await session.commit()
+                written += len(ids)
+                logger.debug("Stored %d embeddings so far", written)
+
+        return written
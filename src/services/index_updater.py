@@ -0,0 +1,164 @@
+import asyncio
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from src.config import settings
+from src.services.cap_detection_service import CapDetectionService
+from src.services.query_service import QueryService
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class IndexUpdater:
+    """Keep the loaded similarity index in sync with created and deleted caps.
+
+    New caps are augmented, embedded and added to the live index; deleted caps
+    are removed from it. These changes only reach the index of the worker that
+    handled the request, and they are never uploaded, because workers
+    uploading their own copies would overwrite each other and freshly
+    rebuilt indexes. The database is the source of truth instead:
+    :meth:`start` periodically runs :meth:`QueryService.sync_index`, which
+    loads newly uploaded indexes and applies changes made through other
+    workers.
+    """
+
+    def __init__(
+        self,
+        cap_detection_service: CapDetectionService,
+        query_service: QueryService,
+        augmentations_per_image: int = settings.augmentations_per_image,
+        sync_interval_seconds: float = settings.index_sync_interval_seconds,
+        update_attempts: int = 3,
+        update_retry_delay_seconds: float = 0.5,
+    ) -> None:
+        """Create the updater.
+
+        Args:
+            cap_detection_service: Service used to augment and embed new caps.
+            query_service: Service holding the live index.
+            augmentations_per_image: Augmented images created per new cap.
+            sync_interval_seconds: Delay between periodic index syncs.
+            update_attempts: Attempts made for each index change before the
+                failure is logged and the change is given up.
+            update_retry_delay_seconds: Delay before the first retry; doubled
+                after every failed attempt.
+        """
+
+        self.cap_detection_service = cap_detection_service
+        self.query_service = query_service
+        self.augmentations_per_image = augmentations_per_image
+        self.sync_interval_seconds = sync_interval_seconds
+        self.update_attempts = max(1, update_attempts)
+        self.update_retry_delay_seconds = update_retry_delay_seconds
+
+        self._sync_task: asyncio.Task[None] | None = None
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the loaded index accepts incremental updates."""
+        return self.query_service.supports_incremental_updates
+
+    async def add_beer_cap(self, beer_cap_id: int) -> int:
+        """Augment and embed a new beer cap and add it to the live index.
+
+        Runs as a background task, so failures are logged instead of raised.
+
+        Returns:
+            Number of vectors added to the index.
+        """
+
+        if not self.enabled:
+            logger.info("Index does not support updates; cap %s not added", beer_cap_id)
+            return 0
+
+        try:
+            embedded = await self.cap_detection_service.augment_and_embed_cap(
+                beer_cap_id, self.augmentations_per_image
+            )
+        except Exception:
+            logger.exception("Failed to augment and embed beer cap %s", beer_cap_id)
+            return 0
+
+        added = await self._retry(
+            f"add beer cap {beer_cap_id} to the index",
+            self.query_service.add_to_index,
+            beer_cap_id,
+            embedded,
+        )
+        return added or 0
+
+    async def remove_beer_caps(self, beer_cap_ids: list[int]) -> int:
+        """Remove deleted beer caps from the live index.
+
+        Failures are logged instead of raised, since the caps are already
+        deleted from the database.
+
+        Returns:
+            Number of vectors removed from the index.
+        """
+
+        if not self.enabled or not beer_cap_ids:
+            return 0
+
+        removed = await self._retry(
+            f"remove beer caps {beer_cap_ids} from the index",
+            self.query_service.remove_caps_from_index,
+            beer_cap_ids,
+        )
+        return removed or 0
+
+    async def _retry(
+        self, description: str, func: Callable[..., Awaitable[T]], *args: object
+    ) -> Optional[T]:
+        """Await ``func(*args)``, retrying failures with exponential backoff.
+
+        Returns:
+            The result of ``func``, or ``None`` once every attempt failed.
+        """
+
+        delay = self.update_retry_delay_seconds
+        for attempt in range(1, self.update_attempts + 1):
+            try:
+                return await func(*args)
+            except Exception:
+                if attempt == self.update_attempts:
+                    logger.exception(
+                        "Failed to %s after %d attempts", description, attempt
+                    )
+                    return None
+                logger.warning(
+                    "Failed to %s (attempt %d of %d); retrying in %.1fs",
+                    description,
+                    attempt,
+                    self.update_attempts,
+                    delay,
+                    exc_info=True,
+                )
+                await asyncio.sleep(delay)
+                delay *= 2
+        return None
+
+    def start(self) -> None:
+        """Start syncing the index every ``sync_interval_seconds``."""
+        if self._sync_task is None:
+            self._sync_task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self) -> None:
+        """Stop the periodic sync."""
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            try:
+                await self._sync_task
+            except asyncio.CancelledError:
+                pass
+            self._sync_task = None
+
+    async def _sync_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval_seconds)
+            try:
+                await self.query_service.sync_index()
+            except Exception:
+                logger.exception("Failed to sync index")
@@ -0,0 +1,64 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class InferenceQueueFullError(Exception):
+    """Raised when the inference executor has no free queue slots."""
+
+
+class InferenceExecutor:
+    """Run blocking model inference off the event loop on a bounded pool."""
+
+    def __init__(self, max_workers: int = 1, max_queue_size: int = 16) -> None:
+        """Create the worker pool.
+
+        Args:
+            max_workers: Number of worker threads running inference.
+            max_queue_size: Number of jobs allowed to wait for a free worker
+                before new submissions are rejected.
+        """
+
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="inference"
+        )
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of jobs that are running or waiting for a worker."""
+        return self._pending
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run ``func`` on a worker thread and await its result.
+
+        Raises:
+            InferenceQueueFullError: If all workers are busy and the queue is
+                already at ``max_queue_size``.
+        """
+
+        if self._pending >= self.max_workers + self.max_queue_size:
+            logger.warning("Inference queue saturated (%d pending jobs)", self._pending)
+            raise InferenceQueueFullError("Inference queue is full")
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, functools.partial(func, *args, **kwargs)
+            )
+        finally:
+            self._pending -= 1
+
+    def shutdown(self) -> None:
+        """Stop the worker pool once the queued jobs have finished."""
+        self._executor.shutdown(wait=True)
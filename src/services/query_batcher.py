@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional
+
+from src.utils.logger import get_logger
+
+if TYPE_CHECKING:
+    from src.cap_detection.image_querier import AggregatedResult
+
+logger = get_logger(__name__)
+
+QueryResults = dict[int, "AggregatedResult"]
+BatchRunner = Callable[..., Awaitable[list[QueryResults]]]
+SearchKey = tuple[Optional[int], ...]
+
+
+@dataclass
+class _PendingBatch:
+    images: list[bytes] = field(default_factory=list)
+    futures: list[asyncio.Future[QueryResults]] = field(default_factory=list)
+    timer: asyncio.TimerHandle | None = None
+
+
+class QueryBatcher:
+    """Coalesce concurrent single-image queries into batched inference calls.
+
+    Queries with the same search parameters (``top_k``, ``faiss_k`` and any
+    index tuning values) that arrive within ``max_wait_ms`` of each other are
+    grouped, run through ``run_batch`` as a single batch and the results are
+    fanned back out to the waiting callers.
+    """
+
+    def __init__(
+        self,
+        run_batch: BatchRunner,
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+    ) -> None:
+        """Configure the batching window.
+
+        Args:
+            run_batch: Coroutine function called with a list of images
+                followed by the search parameters, returning one result
+                dictionary per image.
+            max_batch_size: Number of queued images that triggers an
+                immediate flush.
+            max_wait_ms: Maximum time the first query of a batch waits for
+                further queries before the batch is flushed.
+        """
+
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+
+        self.batch_sizes: Counter[int] = Counter()
+        self._pending: dict[SearchKey, _PendingBatch] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    @property
+    def batches_run(self) -> int:
+        """Total number of batches dispatched."""
+        return sum(self.batch_sizes.values())
+
+    @property
+    def mean_batch_size(self) -> float:
+        """Average number of images per dispatched batch."""
+        batches = self.batches_run
+        if not batches:
+            return 0.0
+        return sum(size * count for size, count in self.batch_sizes.items()) / batches
+
+    async def submit(self, image_bytes: bytes, *params: Optional[int]) -> QueryResults:
+        """Queue an image for the next batch and wait for its results.
+
+        Args:
+            image_bytes: Raw query image.
+            params: Search parameters passed to ``run_batch`` after the
+                images; only queries with equal parameters share a batch.
+        """
+
+        loop = asyncio.get_running_loop()
+        key = params
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = _PendingBatch()
+            batch.timer = loop.call_later(self.max_wait_ms / 1000, self._flush, key)
+            self._pending[key] = batch
+
+        future: asyncio.Future[QueryResults] = loop.create_future()
+        batch.images.append(image_bytes)
+        batch.futures.append(future)
+
+        if len(batch.images) >= self.max_batch_size:
+            self._flush(key)
+
+        return await future
+
+    def _flush(self, key: SearchKey) -> None:
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+
+        self.batch_sizes[len(batch.images)] += 1
+        logger.debug("Dispatching similarity batch of %d images", len(batch.images))
+        task = asyncio.ensure_future(self._run(batch, *key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: _PendingBatch, *params: Optional[int]) -> None:
+        try:
+            results = await self.run_batch(batch.images, *params)
+        except Exception as e:
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, result in zip(batch.futures, results):
+            if not future.done():
+                future.set_result(result)
@@ -1,21 +1,43 @@
 from __future__ import annotations
 
 import asyncio
-import pickle
-import tempfile
-from typing import TYPE_CHECKING, Any, Callable, cast
+import hashlib
+import os
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
 
 import faiss  # type: ignore[import-untyped]
+import numpy as np
 from sqlalchemy.ext.asyncio import AsyncSession
 
 if TYPE_CHECKING:
-    from src.cap_detection.image_querier import AggregatedResult, ImageQuerier
+    from src.cap_detection.image_querier import (
+        AggregatedResult,
+        ImageQuerier,
+        IndexSnapshot,
+    )
 
+from src.cap_detection.embedding_cache import EmbeddingCache
+from src.cap_detection.index_builder import (
+    INDEX_MODE_CENTROID,
+    IndexMetadata,
+    configure_index,
+)
 from src.config import settings
-from src.db.crud.augmented_cap_crud import get_all_augmented_caps
-from src.db.crud.beer_cap_crud import get_beer_cap_by_id
+from src.db.crud.augmented_cap_crud import (
+    get_augmented_cap_beer_cap_ids,
+    get_augmented_cap_embeddings,
+    get_embedded_augmented_cap_ids,
+    load_embedding_matrix,
+)
+from src.db.crud.beer_cap_crud import get_all_beer_caps, get_beer_caps_by_ids
 from src.db.database import GLOBAL_ASYNC_SESSION_MAKER
 from src.db.entities.beer_cap_entity import BeerCap
+from src.services.beer_cap_metadata_cache import BeerCapMetadata, BeerCapMetadataCache
+from src.services.inference_executor import InferenceExecutor
+from src.services.query_batcher import QueryBatcher
+from src.storage.minio.async_minio_client import AsyncMinioClient
 from src.storage.minio.minio_client import MinioClientWrapper
 from src.utils.logger import get_logger
 
@@ -26,6 +48,21 @@ class BeerCapNotFoundError(Exception):
     """Raised when a beer cap ID is not found in the database."""
 
 
+class IndexChecksumError(Exception):
+    """Raised when a downloaded index does not match its stored checksum."""
+
+
+_MD5_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+
+def _file_md5(path: Path) -> str:
+    digest = hashlib.md5()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
 class QueryService:
     """Service for querying beer cap images."""
 
@@ -33,87 +70,401 @@ class QueryService:
         self,
         minio_wrapper: MinioClientWrapper,
         session_maker: Callable[[], AsyncSession] = GLOBAL_ASYNC_SESSION_MAKER,
+        inference_executor: InferenceExecutor | None = None,
     ) -> None:
         self.session_maker = session_maker
         self.minio_wrapper = minio_wrapper
+        self.storage = AsyncMinioClient(minio_wrapper)
+        self.inference_executor = inference_executor or InferenceExecutor(
+            max_workers=settings.inference_max_workers,
+            max_queue_size=settings.inference_max_queue_size,
+        )
+        self.query_batcher: QueryBatcher | None = None
+        if settings.similarity_batch_max_size > 1:
+            self.query_batcher = QueryBatcher(
+                self._run_query_batch,
+                max_batch_size=settings.similarity_batch_max_size,
+                max_wait_ms=settings.similarity_batch_max_wait_ms,
+            )
 
         self.index_file_name = settings.minio_index_file_name
         self.metadata_file_name = settings.minio_metadata_file_name
         self.index_bucket = settings.minio_index_bucket
-        self.u2net_model_path = settings.u2net_model_path
+        self.u2net_model_path = settings.background_removal_model_path
+        self.background_removal_backend = settings.background_removal_backend
+        self.index_cache_dir = settings.index_cache_dir
+
+        self.embedding_cache: EmbeddingCache | None = None
+        if settings.query_embedding_cache_size > 0:
+            self.embedding_cache = EmbeddingCache(
+                max_entries=settings.query_embedding_cache_size,
+                ttl_seconds=settings.query_embedding_cache_ttl_seconds,
+            )
 
-        self.index: Any | None = None
-        self.metadata: list[int] | None = None
+        self.cap_metadata_cache = BeerCapMetadataCache()
         self.querier: ImageQuerier | None = None
+        self._reload_lock = asyncio.Lock()
+        self._snapshot_version = 0
+        self._index_etag: str | None = None
 
     async def load_index(self) -> None:
-        if not self.minio_wrapper.object_exists(
+        """Load the current index from MinIO and start serving it.
+
+        The new index and its label lookup are built completely before they
+        replace the served snapshot in one step, so queries keep running on
+        the previous index during a reload and the CLIP and U2NET models are
+        loaded only once.
+        """
+
+        async with self._reload_lock:
+            generation = self.cap_metadata_cache.generation
+            built = await self._build_snapshot(self._snapshot_version + 1)
+            if built is None:
+                return
+            snapshot, caps, etag = built
+            self._snapshot_version = snapshot.version
+
+            if self.querier is None:
+                from src.cap_detection.image_querier import ImageQuerier
+
+                self.querier = await asyncio.to_thread(
+                    ImageQuerier,
+                    snapshot,
+                    u2net_model_path=str(self.u2net_model_path),
+                    centroid_candidate_factor=settings.index_centroid_candidate_factor,
+                    background_removal_backend=self.background_removal_backend,
+                    embedding_cache=self.embedding_cache,
+                )
+            else:
+                await asyncio.to_thread(self.querier.swap_snapshot, snapshot)
+
+            # A cap modified while the caps were read must not be cached with
+            # its old metadata; misses are loaded on demand instead.
+            if self.cap_metadata_cache.generation == generation:
+                self.cap_metadata_cache.replace(caps)
+            else:
+                logger.info("Cap metadata changed during reload; cache not warmed")
+            self._index_etag = etag
+
+    async def _build_snapshot(
+        self, version: int
+    ) -> tuple[IndexSnapshot, list[BeerCap], str] | None:
+        if not await self.storage.object_exists(
             self.index_bucket, self.index_file_name
-        ) or not self.minio_wrapper.object_exists(
+        ) or not await self.storage.object_exists(
             self.index_bucket, self.metadata_file_name
         ):
-            return
+            return None
 
-        index_bytes = await asyncio.to_thread(
-            self.minio_wrapper.download_bytes,
-            self.index_bucket,
-            self.index_file_name,
+        etag = await self.storage.get_object_etag(
+            self.index_bucket, self.index_file_name
         )
+        index_path = await asyncio.to_thread(self._fetch_index_file, etag)
 
-        metadata_blob = await asyncio.to_thread(
-            self.minio_wrapper.download_bytes,
-            self.index_bucket,
-            self.metadata_file_name,
+        metadata_blob = await self.storage.download_bytes(
+            self.index_bucket, self.metadata_file_name
         )
 
-        with tempfile.NamedTemporaryFile(suffix=".index") as tmp:
-            tmp.write(index_bytes)
-            tmp.flush()
-            index = faiss.read_index(tmp.name)
-
-        metadata = cast(list[int], pickle.loads(metadata_blob))
+        # IO_FLAG_MMAP_IFC maps the vector codes of flat, IVF and HNSW indexes,
+        # so workers on one host share their page cache.
+        io_flags = faiss.IO_FLAG_MMAP_IFC if settings.index_mmap else 0
+        index = await asyncio.to_thread(faiss.read_index, str(index_path), io_flags)
 
-        self.index = index
-        self.metadata = metadata
+        metadata = IndexMetadata.from_bytes(metadata_blob)
+        configure_index(
+            index,
+            metadata.index_type,
+            nprobe=settings.index_nprobe,
+            ef_search=settings.index_ef_search,
+        )
+        logger.info(
+            "Loaded %s index in %s mode with %d vectors",
+            metadata.index_type,
+            metadata.mode,
+            index.ntotal,
+        )
 
+        rerank_embeddings = None
+        rerank_cap_ids = None
         session = self.session_maker()
         async with session:
-            augmented_caps = await get_all_augmented_caps(session)
+            beer_cap_ids = await get_augmented_cap_beer_cap_ids(session)
+            caps = await get_all_beer_caps(session)
+            if metadata.mode == INDEX_MODE_CENTROID and settings.index_centroid_rerank:
+                _, rerank_cap_ids, rerank_embeddings = await load_embedding_matrix(
+                    session, chunk_size=settings.embedding_load_chunk_size
+                )
+                faiss.normalize_L2(rerank_embeddings)
+
+        augmented_cap_to_cap = {
+            str(aug_id): cap_id for aug_id, cap_id in beer_cap_ids.items()
+        }
+
+        from src.cap_detection.image_querier import IndexSnapshot
+
+        snapshot = await asyncio.to_thread(
+            IndexSnapshot.build,
+            index,
+            metadata.ids,
+            augmented_cap_to_cap,
+            index_mode=metadata.mode,
+            index_type=metadata.index_type,
+            id_mapped=metadata.id_mapped,
+            rerank_embeddings=rerank_embeddings,
+            rerank_cap_ids=rerank_cap_ids,
+            memory_mapped=settings.index_mmap,
+            nprobe=settings.index_nprobe,
+            ef_search=settings.index_ef_search,
+            version=version,
+        )
+        return snapshot, caps, etag
+
+    def _fetch_index_file(self, etag: str | None = None) -> Path:
+        """Return a local copy of the index, downloading it only when changed.
+
+        The file is cached under ``index_cache_dir`` keyed by its MinIO ETag,
+        streamed to disk, verified against the ETag when it is a plain MD5
+        digest and atomically moved into place, so concurrent workers never
+        read a partial file.
+        """
+
+        if etag is None:
+            etag = self.minio_wrapper.get_object_etag(
+                self.index_bucket, self.index_file_name
+            )
+        name = Path(self.index_file_name)
+        cache_dir = Path(self.index_cache_dir)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        path = (
+            cache_dir / f"{name.stem}-{re.sub(r'[^0-9A-Za-z]', '', etag)}{name.suffix}"
+        )
+        if path.exists():
+            logger.info("Using cached index %s", path)
+            return path
+
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            self.minio_wrapper.download_file(
+                self.index_bucket, self.index_file_name, str(tmp_path)
+            )
+            checksum = etag.strip('"')
+            if _MD5_PATTERN.fullmatch(checksum) and _file_md5(tmp_path) != checksum:
+                raise IndexChecksumError(
+                    f"Checksum mismatch for {self.index_file_name}"
+                )
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        # Older versions can be unlinked safely; mapped pages stay valid.
+        for stale in cache_dir.glob(f"{name.stem}-*{name.suffix}"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+
+        logger.info("Cached index %s", path)
+        return path
+
+    @property
+    def supports_incremental_updates(self) -> bool:
+        """Whether the loaded index can be updated without a full rebuild."""
+        return self.querier is not None and self.querier.supports_updates
+
+    async def add_to_index(
+        self, cap_id: int, embedded: list[tuple[int, np.ndarray]]
+    ) -> int:
+        """Add the augmented cap embeddings of one beer cap to the loaded index.
+
+        Args:
+            cap_id: Beer cap the embeddings belong to.
+            embedded: ``(augmented cap ID, embedding)`` pairs.
+
+        Returns:
+            Number of added embeddings; already indexed ones are skipped.
+        """
+
+        if self.querier is None:
+            raise RuntimeError("Index not loaded; call load_index() first")
+        if not embedded:
+            return 0
+
+        aug_ids = [aug_id for aug_id, _ in embedded]
+        embeddings = np.array([vector for _, vector in embedded], dtype=np.float32)
+        # Index updates bypass the bounded inference queue, which rejects
+        # work under load; a dropped update would leave the index stale.
+        return await asyncio.to_thread(
+            self.querier.add_embeddings, aug_ids, cap_id, embeddings
+        )
 
-        augmented_cap_to_cap = {str(aug.id): aug.beer_cap_id for aug in augmented_caps}
+    async def remove_caps_from_index(self, cap_ids: list[int]) -> int:
+        """Remove all augmented cap embeddings of the given beer caps.
 
-        from src.cap_detection.image_querier import ImageQuerier
+        Returns:
+            Number of removed embeddings.
+        """
 
-        self.querier = ImageQuerier(
-            index=self.index,
-            metadata=self.metadata,
-            augmented_cap_to_cap=augmented_cap_to_cap,
-            u2net_model_path=str(self.u2net_model_path),
+        if self.querier is None:
+            raise RuntimeError("Index not loaded; call load_index() first")
+
+        return await asyncio.to_thread(self.querier.remove_caps, cap_ids)
+
+    async def sync_index(self) -> None:
+        """Bring the loaded index up to date with MinIO and the database.
+
+        Every worker keeps its own copy of the index, and only the job that
+        rebuilds the index uploads it. When a new index was uploaded, it is
+        loaded. Otherwise, an updatable index receives the embedded augmented
+        caps it lacks and drops those deleted from the database, so changes
+        made through other workers are applied here as well.
+        """
+
+        if not await self.storage.object_exists(
+            self.index_bucket, self.index_file_name
+        ):
+            return
+        etag = await self.storage.get_object_etag(
+            self.index_bucket, self.index_file_name
         )
+        if self.querier is None or etag != self._index_etag:
+            await self.load_index()
+            return
+        if not self.supports_incremental_updates:
+            return
+
+        # Only labels indexed before reading the database can be stale; caps
+        # added in the meantime are missing from the read.
+        indexed = self.querier.indexed_augmented_cap_ids()
+        session = self.session_maker()
+        async with session:
+            embedded = await get_embedded_augmented_cap_ids(session)
+            stored = np.fromiter(embedded, dtype=np.int64, count=len(embedded))
+            new_ids = np.setdiff1d(stored, indexed, assume_unique=True)
+            rows = await get_augmented_cap_embeddings(session, new_ids.tolist())
+        stale_ids = np.setdiff1d(indexed, stored, assume_unique=True)
+
+        by_cap: dict[int, list[tuple[int, np.ndarray]]] = {}
+        for aug_id, cap_id, embedding in rows:
+            by_cap.setdefault(cap_id, []).append((aug_id, embedding))
+        added = 0
+        for cap_id, cap_embedded in by_cap.items():
+            added += await self.add_to_index(cap_id, cap_embedded)
+        removed = 0
+        if stale_ids.size:
+            removed = await asyncio.to_thread(
+                self.querier.remove_augmented_caps, stale_ids.tolist()
+            )
+        if added or removed:
+            logger.info(
+                "Synced index with the database: %d vectors added, %d removed",
+                added,
+                removed,
+            )
 
     async def query_image(
         self,
         image_bytes: bytes,
         top_k: int = 3,
         faiss_k: int = 10000,
-    ) -> tuple[list[BeerCap], list[AggregatedResult]]:
+        nprobe: int | None = None,
+        ef_search: int | None = None,
+    ) -> tuple[list[BeerCapMetadata], list[AggregatedResult]]:
         if self.querier is None:
             raise RuntimeError("Index not loaded; call load_index() first")
 
-        results = self.querier.query(
-            image_bytes=image_bytes, top_k=top_k, faiss_k=faiss_k
-        )
+        if self.query_batcher is not None:
+            results = await self.query_batcher.submit(
+                image_bytes, top_k, faiss_k, nprobe, ef_search
+            )
+        else:
+            results = await self.inference_executor.run(
+                self.querier.query,
+                image_bytes=image_bytes,
+                top_k=top_k,
+                faiss_k=faiss_k,
+                nprobe=nprobe,
+                ef_search=ef_search,
+            )
         logger.debug("Queried %d results", len(results))
 
-        caps: list[BeerCap] = []
+        (caps_and_results,) = await self._get_caps_for_results([results])
+        return caps_and_results
 
-        session = self.session_maker()
-        async with session:
-            for cap_id in results.keys():
-                cap = await get_beer_cap_by_id(session, cap_id)
-                if cap is None:
-                    logger.warning("Cap with ID %s not found", cap_id)
-                    raise BeerCapNotFoundError(f"Cap with ID {cap_id} not found")
-                caps.append(cap)
-
-        return caps, [result for result in results.values()]
+    async def query_images(
+        self,
+        images: list[bytes],
+        top_k: int = 3,
+        faiss_k: int = 10000,
+        nprobe: int | None = None,
+        ef_search: int | None = None,
+    ) -> list[tuple[list[BeerCapMetadata], list[AggregatedResult]]]:
+        if self.querier is None:
+            raise RuntimeError("Index not loaded; call load_index() first")
+
+        batch_results = await self._run_query_batch(
+            images, top_k, faiss_k, nprobe, ef_search
+        )
+        logger.debug("Queried batch of %d images", len(batch_results))
+
+        return await self._get_caps_for_results(batch_results)
+
+    async def _run_query_batch(
+        self,
+        images: list[bytes],
+        top_k: int,
+        faiss_k: int,
+        nprobe: int | None = None,
+        ef_search: int | None = None,
+    ) -> list[dict[int, AggregatedResult]]:
+        if self.querier is None:
+            raise RuntimeError("Index not loaded; call load_index() first")
+
+        return await self.inference_executor.run(
+            self.querier.query_batch,
+            images=images,
+            top_k=top_k,
+            faiss_k=faiss_k,
+            nprobe=nprobe,
+            ef_search=ef_search,
+        )
+
+    def shutdown(self) -> None:
+        self.inference_executor.shutdown()
+
+    def invalidate_cap_metadata(self, beer_cap_ids: list[int] | None = None) -> None:
+        """Forget cached metadata of modified or deleted caps.
+
+        Args:
+            beer_cap_ids: Caps to forget, or ``None`` to forget every cap.
+        """
+        self.cap_metadata_cache.invalidate(beer_cap_ids)
+
+    async def _get_caps_for_results(
+        self, batch_results: list[dict[int, AggregatedResult]]
+    ) -> list[tuple[list[BeerCapMetadata], list[AggregatedResult]]]:
+        cap_ids = {cap_id for results in batch_results for cap_id in results}
+        caps = self.cap_metadata_cache.get_many(cap_ids)
+
+        missing = cap_ids - caps.keys()
+        if missing:
+            generation = self.cap_metadata_cache.generation
+            session = self.session_maker()
+            async with session:
+                loaded = await get_beer_caps_by_ids(session, missing)
+            cacheable = self.cap_metadata_cache.generation == generation
+            for cap in loaded:
+                if cacheable:
+                    caps[cap.id] = self.cap_metadata_cache.put(cap)
+                else:
+                    caps[cap.id] = BeerCapMetadata.from_entity(cap)
+
+        # The index of this worker may still hold caps deleted through another
+        # worker until its next sync; they are dropped from the results.
+        for cap_id in cap_ids - caps.keys():
+            logger.warning("Cap with ID %s not found; skipping it", cap_id)
+
+        return [
+            (
+                [caps[cap_id] for cap_id in results if cap_id in caps],
+                [result for cap_id, result in results.items() if cap_id in caps],
+            )
+            for results in batch_results
+        ]
@@ -1,5 +1,6 @@
 """MinIO storage package."""
 
-from .minio_client import MinioClientWrapper
+from .async_minio_client import AsyncMinioClient
+from .minio_client import MinioClientWrapper, UploadFailure
 
-__all__ = ["MinioClientWrapper"]
+__all__ = ["AsyncMinioClient", "MinioClientWrapper", "UploadFailure"]
@@ -0,0 +1,87 @@
+import asyncio
+from typing import BinaryIO, Optional, Sequence
+
+from src.storage.minio.minio_client import MinioClientWrapper, UploadFailure
+
+
+class AsyncMinioClient:
+    """Awaitable facade over :class:`MinioClientWrapper`.
+
+    The blocking MinIO calls run on worker threads and share the wrapper's
+    pooled keep-alive connections, so storage latency of one request does not
+    block the event loop or other requests. Async code should go through this
+    facade rather than calling the wrapper directly.
+    """
+
+    def __init__(self, wrapper: MinioClientWrapper) -> None:
+        self.wrapper = wrapper
+
+    async def ensure_buckets_exist(self, buckets: list[str]) -> None:
+        """See :meth:`MinioClientWrapper.ensure_buckets_exist`."""
+        await asyncio.to_thread(self.wrapper.ensure_buckets_exist, buckets)
+
+    async def upload_file(
+        self,
+        bucket_name: str,
+        object_name: str,
+        data: BinaryIO,
+        length: Optional[int] = None,
+        content_type: str = "image/png",
+    ) -> str:
+        """See :meth:`MinioClientWrapper.upload_file`."""
+        return await asyncio.to_thread(
+            self.wrapper.upload_file,
+            bucket_name,
+            object_name,
+            data,
+            length,
+            content_type,
+        )
+
+    async def upload_files(
+        self,
+        bucket_name: str,
+        objects: Sequence[tuple[str, bytes]],
+        content_type: str = "image/png",
+    ) -> list[UploadFailure]:
+        """Upload several objects in parallel.
+
+        See :meth:`MinioClientWrapper.upload_files_parallel`.
+        """
+        return await asyncio.to_thread(
+            self.wrapper.upload_files_parallel, bucket_name, objects, content_type
+        )
+
+    async def delete_file(self, bucket_name: str, object_name: str) -> None:
+        """See :meth:`MinioClientWrapper.delete_file`."""
+        await asyncio.to_thread(self.wrapper.delete_file, bucket_name, object_name)
+
+    async def delete_files(self, bucket_name: str, object_names: list[str]) -> None:
+        """See :meth:`MinioClientWrapper.delete_files`."""
+        await asyncio.to_thread(self.wrapper.delete_files, bucket_name, object_names)
+
+    async def object_exists(self, bucket_name: str, object_name: str) -> bool:
+        """See :meth:`MinioClientWrapper.object_exists`."""
+        return await asyncio.to_thread(
+            self.wrapper.object_exists, bucket_name, object_name
+        )
+
+    async def get_object_etag(self, bucket_name: str, object_name: str) -> str:
+        """See :meth:`MinioClientWrapper.get_object_etag`."""
+        return await asyncio.to_thread(
+            self.wrapper.get_object_etag, bucket_name, object_name
+        )
+
+    async def download_bytes(self, bucket_name: str, object_name: str) -> bytes:
+        """See :meth:`MinioClientWrapper.download_bytes`."""
+        return await asyncio.to_thread(
+            self.wrapper.download_bytes, bucket_name, object_name
+        )
+
+    async def download_file(
+        self, bucket_name: str, object_name: str, file_path: str
+    ) -> None:
+        """See :meth:`MinioClientWrapper.download_file`."""
+        await asyncio.to_thread(
+            self.wrapper.download_file, bucket_name, object_name, file_path
+        )
@@ -1,12 +1,20 @@
 import concurrent.futures
+import io
 import os
+import socket
+from dataclasses import dataclass
 from datetime import timedelta
-from typing import BinaryIO, Optional
+from typing import BinaryIO, Optional, Sequence
 from urllib.parse import urlparse
 
+import certifi
+import urllib3
 from minio import Minio
 from minio.deleteobjects import DeleteObject
-from minio.error import S3Error
+from minio.error import MinioException, S3Error
+from urllib3.connection import HTTPConnection
+from urllib3.exceptions import HTTPError
+from urllib3.util import Retry, Timeout
 
 from src.config import settings
 from src.utils.logger import get_logger
@@ -14,6 +22,14 @@ from src.utils.logger import get_logger
 logger = get_logger(__name__)
 
 
+@dataclass(frozen=True)
+class UploadFailure:
+    """An object that could not be uploaded by a bulk upload."""
+
+    object_name: str
+    error: Exception
+
+
 class MinioClientWrapper:
     def __init__(
         self,
@@ -22,6 +38,9 @@ class MinioClientWrapper:
         secret_key: Optional[str] = None,
         secure: Optional[bool] = None,
     ) -> None:
+        # One pool of keep-alive connections shared by every thread using
+        # this wrapper, sized for concurrent requests and bulk transfers.
+        self.http_client = self._create_http_client()
         self.client = self._create_minio_client(
             endpoint or settings.minio_endpoint, access_key, secret_key, secure
         )
@@ -41,6 +60,26 @@ class MinioClientWrapper:
         else:
             self.signer_client = self.client
 
+    @staticmethod
+    def _create_http_client() -> urllib3.PoolManager:
+        """Create the connection pool used by the MinIO clients."""
+        return urllib3.PoolManager(
+            num_pools=4,
+            maxsize=settings.minio_max_pool_connections,
+            block=False,
+            timeout=Timeout(
+                connect=settings.minio_connect_timeout_seconds,
+                read=settings.minio_read_timeout_seconds,
+            ),
+            socket_options=HTTPConnection.default_socket_options
+            + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)],
+            cert_reqs="CERT_REQUIRED",
+            ca_certs=os.environ.get("SSL_CERT_FILE") or certifi.where(),
+            retries=Retry(
+                total=5, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]
+            ),
+        )
+
     def _create_minio_client(
         self, endpoint_str, access_key, secret_key, secure_override
     ):
@@ -79,6 +118,7 @@ class MinioClientWrapper:
             secret_key=secret_key or settings.minio_secret_key,
             secure=secure_flag,
             region="us-east-1",
+            http_client=self.http_client,
         )
 
     def upload_file(
@@ -130,6 +170,57 @@ class MinioClientWrapper:
             logger.error("Failed to upload %s to %s: %s", object_name, bucket_name, e)
             raise
 
+    def upload_files_parallel(
+        self,
+        bucket_name: str,
+        objects: Sequence[tuple[str, bytes]],
+        content_type: str = "image/png",
+        max_workers: int = 8,
+    ) -> list[UploadFailure]:
+        """Uploads several objects to a bucket in parallel.
+
+        Transient connection errors and 5xx responses are already retried by
+        the shared connection pool, so a failed object is reported without
+        further attempts; it does not stop the others.
+
+        Args:
+            bucket_name (str): Name of the bucket.
+            objects (Sequence[tuple[str, bytes]]): (object_name, data) pairs to upload.
+            content_type (str): MIME type of the objects.
+            max_workers (int, optional): Number of parallel upload threads. Defaults to 8.
+
+        Returns:
+            list[UploadFailure]: The objects that could not be uploaded, empty
+            if every upload succeeded.
+        """
+
+        def upload_object(name: str, data: bytes) -> Optional[UploadFailure]:
+            try:
+                self.upload_file(
+                    bucket_name, name, io.BytesIO(data), len(data), content_type
+                )
+            except (MinioException, HTTPError) as e:
+                return UploadFailure(name, e)
+            return None
+
+        if not objects:
+            return []
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(max_workers, len(objects))
+        ) as executor:
+            results = list(executor.map(lambda item: upload_object(*item), objects))
+
+        failures = [failure for failure in results if failure is not None]
+        if failures:
+            logger.error(
+                "Failed to upload %d of %d objects to %s.",
+                len(failures),
+                len(objects),
+                bucket_name,
+            )
+        return failures
+
     def delete_file(self, bucket_name: str, object_name: str) -> None:
         """Deletes an object from a specified bucket.
 
@@ -196,6 +287,27 @@ class MinioClientWrapper:
             )
             return False
 
+    def get_object_etag(self, bucket_name: str, object_name: str) -> str:
+        """Returns the ETag of an object without downloading it.
+
+        Args:
+            bucket_name (str): Name of the bucket.
+            object_name (str): Name of the object.
+
+        Returns:
+            str: ETag of the object.
+
+        Raises:
+            S3Error: If the object metadata cannot be read.
+        """
+        try:
+            return self.client.stat_object(bucket_name, object_name).etag
+        except S3Error as e:
+            logger.error(
+                "Failed to read metadata of %s in %s: %s", object_name, bucket_name, e
+            )
+            raise
+
     def download_bytes(self, bucket_name: str, object_name: str) -> bytes:
         """Downloads an object from a bucket and returns its content as bytes.
 
@@ -225,6 +337,28 @@ class MinioClientWrapper:
                 response.close()
                 response.release_conn()
 
+    def download_file(self, bucket_name: str, object_name: str, file_path: str) -> None:
+        """Streams an object to a local file without buffering it in memory.
+
+        Args:
+            bucket_name (str): Name of the bucket.
+            object_name (str): Name of the object to download.
+            file_path (str): Destination path of the file.
+
+        Raises:
+            S3Error: If the download fails.
+        """
+        try:
+            self.client.fget_object(bucket_name, object_name, file_path)
+            logger.info(
+                "Downloaded %s from %s to %s.", object_name, bucket_name, file_path
+            )
+        except S3Error as e:
+            logger.error(
+                "Failed to download %s from %s: %s", object_name, bucket_name, e
+            )
+            raise
+
     def generate_presigned_url(
         self, bucket_name: str, object_name: str, expiry_seconds: int = 3600
     ) -> str:
@@ -0,0 +1,21 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+
+@asynccontextmanager
+async def task_group() -> AsyncIterator[asyncio.TaskGroup]:
+    """Run tasks in an ``asyncio.TaskGroup`` that raises the first failure.
+
+    A failing task cancels its siblings as in a plain task group, but the
+    caller sees the original exception rather than an ``ExceptionGroup``.
+    """
+
+    try:
+        async with asyncio.TaskGroup() as group:
+            yield group
+    except BaseExceptionGroup as errors:
+        error: BaseException = errors
+        while isinstance(error, BaseExceptionGroup):
+            error = error.exceptions[0]
+        raise error from errors
@@ -324,9 +324,12 @@ class RSU4F(nn.Module):  # UNet04FRES(nn.Module):
 ##### U^2-Net ####
 class U2NET(nn.Module):
 
-    def __init__(self, in_ch=3, out_ch=1):
+    def __init__(self, in_ch=3, out_ch=1, fused_output_only=False):
         super(U2NET, self).__init__()
 
+        # Inference only needs the fused map; the side outputs feed training.
+        self.fused_output_only = fused_output_only
+
         self.stage1 = RSU7(in_ch, 32, 64)
         self.pool12 = nn.MaxPool2d(2, stride=2, ceil_mode=True)
 
@@ -423,6 +426,9 @@ class U2NET(nn.Module):
 
         d0 = self.outconv(torch.cat((d1, d2, d3, d4, d5, d6), 1))
 
+        if self.fused_output_only:
+            return (F.sigmoid(d0),)
+
         return (
             F.sigmoid(d0),
             F.sigmoid(d1),
@@ -437,9 +443,12 @@ class U2NET(nn.Module):
 ### U^2-Net small ###
 class U2NETP(nn.Module):
 
-    def __init__(self, in_ch=3, out_ch=1):
+    def __init__(self, in_ch=3, out_ch=1, fused_output_only=False):
         super(U2NETP, self).__init__()
 
+        # Inference only needs the fused map; the side outputs feed training.
+        self.fused_output_only = fused_output_only
+
         self.stage1 = RSU7(in_ch, 16, 64)
         self.pool12 = nn.MaxPool2d(2, stride=2, ceil_mode=True)
 
@@ -536,6 +545,9 @@ class U2NETP(nn.Module):
 
         d0 = self.outconv(torch.cat((d1, d2, d3, d4, d5, d6), 1))
 
+        if self.fused_output_only:
+            return (F.sigmoid(d0),)
+
         return (
             F.sigmoid(d0),
             F.sigmoid(d1),
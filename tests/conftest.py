@@ -13,6 +13,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.config import settings
 from src.db.database import get_db_resources
 from src.db.entities import Base
+from src.db.entities.augmented_cap_entity import AugmentedCap
 from src.storage.minio.minio_client import MinioClientWrapper
 
 logger = logging.getLogger(__name__)
@@ -58,11 +59,25 @@ async def db_session() -> AsyncGenerator[AsyncSession, None]:
     await engine.dispose()
 
 
+@pytest.fixture(scope="function")
+def small_embedding_dim(monkeypatch: pytest.MonkeyPatch) -> int:
+    """Let a test store hand-written two-dimensional embeddings.
+
+    Each ``db_session`` engine copies the column type on first use, so this
+    must run before the test's first query that loads an embedding.
+    """
+    dim = 2
+    monkeypatch.setattr(settings, "embedding_dim", dim)
+    monkeypatch.setattr(AugmentedCap.embedding_vector.type, "dim", dim)
+    return dim
+
+
 @pytest.fixture(scope="function")
 def mock_minio_client_wrapper() -> MagicMock:
     mock_minio = MagicMock(spec=MinioClientWrapper)
     mock_s3_key = "mock_s3_key.jpg"
     mock_minio.upload_file.return_value = mock_s3_key
+    mock_minio.upload_files_parallel.return_value = []
     mock_minio.download_bytes.return_value = b"mock image data"
     mock_minio.generate_presigned_url.return_value = (
         f"{TEST_MINIO_ENDPOINT}/{TEST_BUCKET_NAME}/{mock_s3_key}"
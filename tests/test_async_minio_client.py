@@ -0,0 +1,50 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.config import settings
+from src.storage.minio.async_minio_client import AsyncMinioClient
+from src.storage.minio.minio_client import MinioClientWrapper
+
+
+@pytest.mark.asyncio
+async def test_calls_run_off_event_loop_thread() -> None:
+    wrapper = MagicMock(spec=MinioClientWrapper)
+    loop_thread = threading.get_ident()
+    wrapper.download_bytes.side_effect = lambda bucket, name: (
+        threading.get_ident().to_bytes(8, "little")
+    )
+
+    data = await AsyncMinioClient(wrapper).download_bytes("bucket", "cap.png")
+
+    assert int.from_bytes(data, "little") != loop_thread
+    wrapper.download_bytes.assert_called_once_with("bucket", "cap.png")
+
+
+@pytest.mark.asyncio
+async def test_delegates_to_wrapper() -> None:
+    wrapper = MagicMock(spec=MinioClientWrapper)
+    wrapper.object_exists.return_value = True
+    wrapper.upload_files_parallel.return_value = []
+    storage = AsyncMinioClient(wrapper)
+
+    assert await storage.object_exists("bucket", "caps.index") is True
+    assert await storage.upload_files("bucket", [("a.png", b"a")]) == []
+    await storage.delete_files("bucket", ["a.png"])
+
+    wrapper.upload_files_parallel.assert_called_once_with(
+        "bucket", [("a.png", b"a")], "image/png"
+    )
+    wrapper.delete_files.assert_called_once_with("bucket", ["a.png"])
+
+
+def test_clients_share_tuned_connection_pool() -> None:
+    wrapper = MinioClientWrapper(endpoint="localhost:9000")
+
+    assert wrapper.client._http is wrapper.http_client
+    assert wrapper.signer_client._http is wrapper.http_client
+    assert (
+        wrapper.http_client.connection_pool_kw["maxsize"]
+        == settings.minio_max_pool_connections
+    )
@@ -0,0 +1,31 @@
+import os
+import shutil
+
+from src.cap_detection.augmentation import augmentation_config_hash
+
+
+def test_config_hash_tracks_backend_and_model_contents(tmp_path) -> None:
+    model_path = tmp_path / "u2net.pth"
+    model_path.write_bytes(b"weights")
+    baseline = augmentation_config_hash(
+        2, background_removal_backend="u2net", model_path=model_path
+    )
+
+    assert baseline != augmentation_config_hash(
+        2, background_removal_backend="u2netp", model_path=model_path
+    )
+
+    # The same weights at another path or with a new mtime keep the hash.
+    copy_path = tmp_path / "checkout" / "u2net.pth"
+    copy_path.parent.mkdir()
+    shutil.copyfile(model_path, copy_path)
+    stat = copy_path.stat()
+    os.utime(copy_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert baseline == augmentation_config_hash(
+        2, background_removal_backend="u2net", model_path=copy_path
+    )
+
+    model_path.write_bytes(b"retrained weights")
+    assert baseline != augmentation_config_hash(
+        2, background_removal_backend="u2net", model_path=model_path
+    )
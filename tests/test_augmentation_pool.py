@@ -0,0 +1,54 @@
+import io
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+import torch
+from PIL import Image
+
+from src.cap_detection.augmentation_pool import AugmentationPool
+from src.cap_detection.background_remover import BACKEND_U2NETP
+from src.utils.u2net_model import U2NETP
+
+
+def _png_bytes(size: tuple[int, int] = (48, 32)) -> bytes:
+    pixels = np.random.randint(0, 255, (size[1], size[0], 3), dtype=np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(pixels).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+@pytest.mark.asyncio
+@patch("src.cap_detection.augmentation_pool.ImageAugmenter")
+async def test_single_worker_augments_in_process(mock_augmenter, tmp_path) -> None:
+    mock_augmenter.return_value.augment_image_bytes.return_value = [b"aug"]
+    pool = AugmentationPool(tmp_path / "u2net.pth", augmentations_per_image=1)
+
+    result = await pool.augment(b"image")
+    pool.shutdown()
+
+    assert result == [b"aug"]
+    mock_augmenter.return_value.augment_image_bytes.assert_called_once_with(b"image")
+
+
+@pytest.mark.asyncio
+async def test_worker_processes_return_encoded_augmentations(tmp_path) -> None:
+    model_path = tmp_path / "u2netp.pth"
+    torch.save(U2NETP(3, 1).state_dict(), model_path)
+    pool = AugmentationPool(
+        model_path,
+        augmentations_per_image=2,
+        image_size=(32, 32),
+        background_removal_backend=BACKEND_U2NETP,
+        workers=2,
+    )
+
+    try:
+        results = [await pool.augment(_png_bytes()) for _ in range(3)]
+    finally:
+        pool.shutdown()
+
+    assert [len(images) for images in results] == [3, 3, 3]
+    image = Image.open(io.BytesIO(results[0][1]))
+    assert image.mode == "RGBA"
+    assert image.size == (32, 32)
@@ -1,15 +1,19 @@
 from datetime import date
 
+import numpy as np
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.api.schemas.beer_cap.beer_cap_create import BeerCapCreateSchema
 from src.api.schemas.country.country_create import CountryCreateSchema
+from src.config import settings
 from src.db.crud.augmented_cap_crud import (
     create_augmented_cap,
+    create_augmented_caps,
     delete_augmented_cap,
     get_all_augmented_caps,
     get_augmented_cap_by_id,
+    load_embedding_matrix,
 )
 from src.db.crud.beer_brand_crud import create_beer_brand
 from src.db.crud.beer_cap_crud import create_beer_cap
@@ -54,6 +58,21 @@ class TestAugmentedCapCRUD:
         assert aug.beer_cap_id == self.beer_cap.id
         assert aug.s3_key == "test_s3_key.jpg"
 
+    async def test_create_augmented_caps(self, db_session: AsyncSession):
+        keys = [f"bulk_{idx}.png" for idx in range(3)]
+        ids = await create_augmented_caps(
+            db_session, [(self.beer_cap.id, key) for key in keys]
+        )
+        await db_session.commit()
+
+        assert len(ids) == 3
+        for aug_id, key in zip(ids, keys):
+            fetched = await get_augmented_cap_by_id(db_session, aug_id)
+            assert fetched is not None
+            assert fetched.s3_key == key
+            assert fetched.beer_cap_id == self.beer_cap.id
+        assert await create_augmented_caps(db_session, []) == []
+
     async def test_get_augmented_cap_by_id(self, db_session: AsyncSession):
         created_aug = await create_augmented_cap(
             db_session, self.beer_cap.id, "fetched_aug_s3_key.jpg"
@@ -72,6 +91,22 @@ class TestAugmentedCapCRUD:
         assert "aug_one.jpg" in s3_keys
         assert "aug_two.jpg" in s3_keys
 
+    async def test_load_embedding_matrix(self, db_session: AsyncSession):
+        vectors = np.eye(2, settings.embedding_dim)
+        first = await create_augmented_cap(db_session, self.beer_cap.id, "m1.jpg")
+        await create_augmented_cap(db_session, self.beer_cap.id, "m2.jpg")
+        third = await create_augmented_cap(db_session, self.beer_cap.id, "m3.jpg")
+        first.embedding_vector = vectors[0]
+        third.embedding_vector = vectors[1]
+        await db_session.commit()
+
+        ids, cap_ids, matrix = await load_embedding_matrix(db_session, chunk_size=1)
+
+        assert ids.tolist() == [first.id, third.id]
+        assert cap_ids.tolist() == [self.beer_cap.id] * 2
+        assert matrix.dtype == np.float32
+        assert matrix.tolist() == vectors.tolist()
+
     async def test_delete_augmented_cap(self, db_session: AsyncSession):
         aug = await create_augmented_cap(
             db_session, self.beer_cap.id, "delete_aug_s3_key.jpg"
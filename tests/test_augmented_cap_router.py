@@ -1,5 +1,6 @@
 import importlib
 
+import numpy as np
 import pytest
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
@@ -17,10 +18,12 @@ class CapDetectionStub:
         self._pre = preprocess_return
         self._emb = embeddings_return
 
-    async def preprocess(self, augmentations_per_image: int) -> int:
+    async def preprocess(
+        self, augmentations_per_image: int, full_rebuild: bool = False
+    ) -> int:
         return self._pre
 
-    async def generate_embeddings(self) -> int:
+    async def generate_embeddings(self, full_rebuild: bool = False) -> int:
         return self._emb
 
 
@@ -62,7 +65,7 @@ def test_get_all_augmented_beer_caps(
         class AugCap:
             def __init__(self):
                 self.id = 1
-                self.embedding_vector = [0.1, 0.2]
+                self.embedding_vector = np.array([0.1, 0.2])
 
         return [AugCap()]
 
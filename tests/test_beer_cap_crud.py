@@ -13,6 +13,7 @@ from src.db.crud.beer_cap_crud import (
     get_all_beer_caps,
     get_beer_cap_by_id,
     get_beer_caps_by_beer_id,
+    get_beer_caps_by_ids,
     update_beer_cap,
 )
 from src.db.crud.beer_crud import create_beer
@@ -67,6 +68,24 @@ class TestBeerCapCRUD:
         assert fetched_cap.id == created_cap.id
         assert fetched_cap.s3_key == "fetched_cap_s3_key.jpg"
 
+    async def test_get_beer_caps_by_ids(self, db_session: AsyncSession):
+        caps = [
+            await create_beer_cap(
+                db_session,
+                self.beer.id,
+                f"cap_by_ids_{i}.jpg",
+                BeerCapCreateSchema(filename=f"cap_by_ids_{i}.jpg"),
+            )
+            for i in range(3)
+        ]
+
+        fetched = await get_beer_caps_by_ids(
+            db_session, [caps[0].id, caps[2].id, 999999]
+        )
+
+        assert sorted(cap.id for cap in fetched) == sorted([caps[0].id, caps[2].id])
+        assert await get_beer_caps_by_ids(db_session, []) == []
+
     async def test_get_beer_caps_by_beer_id(self, db_session: AsyncSession):
         beer_id = self.beer.id
         await create_beer_cap(
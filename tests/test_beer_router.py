@@ -1,4 +1,5 @@
 import importlib
+from types import SimpleNamespace
 from typing import Optional
 
 import pytest
@@ -7,6 +8,7 @@ from fastapi.testclient import TestClient
 
 from src.api.dependencies.db import get_db_session
 from src.api.dependencies.facades import get_beer_cap_facade
+from src.api.dependencies.services import get_index_updater
 from src.api.dependencies.auth import verify_admin
 
 beer_router = importlib.import_module("src.api.routers.beer_router")
@@ -196,12 +198,29 @@ def test_delete_beer_success(
         async def delete_beer_and_caps(self, beer_id: int) -> bool:
             return True
 
+    class _IndexUpdater:
+        def __init__(self) -> None:
+            self.removed: list[int] = []
+
+        async def remove_beer_caps(self, beer_cap_ids: list[int]) -> int:
+            self.removed.extend(beer_cap_ids)
+            return len(beer_cap_ids)
+
+    async def mock_get_beer_caps_by_beer_id(db, beer_id):
+        return [SimpleNamespace(id=1), SimpleNamespace(id=2)]
+
+    monkeypatch.setattr(
+        beer_router, "get_beer_caps_by_beer_id", mock_get_beer_caps_by_beer_id
+    )
+    updater = _IndexUpdater()
     client.app.dependency_overrides[get_beer_cap_facade] = lambda: _FacadeOK()
+    client.app.dependency_overrides[get_index_updater] = lambda: updater
 
     resp = client.delete("/beers/1/")
     assert resp.status_code == 200
     payload = resp.json()
     assert payload.get("success") is True or payload.get("id") == 1
+    assert updater.removed == [1, 2]
 
 
 def test_delete_beer_not_found(
@@ -211,6 +230,13 @@ def test_delete_beer_not_found(
         async def delete_beer_and_caps(self, beer_id: int) -> bool:
             return False
 
+    async def mock_get_beer_caps_by_beer_id(db, beer_id):
+        return []
+
+    monkeypatch.setattr(
+        beer_router, "get_beer_caps_by_beer_id", mock_get_beer_caps_by_beer_id
+    )
+
     client.app.dependency_overrides[get_beer_cap_facade] = lambda: _FacadeNotFound()
 
     resp = client.delete("/beers/9999/")
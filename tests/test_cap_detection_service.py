@@ -1,8 +1,8 @@
 import sys
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import numpy as np
 import pytest
-import torch
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
 
@@ -18,6 +18,8 @@ from src.db.crud.beer_crud import create_beer
 from src.db.crud.country_crud import create_country
 from src.services.cap_detection_service import CapDetectionService
 
+pytestmark = pytest.mark.usefixtures("small_embedding_dim")
+
 
 @pytest.mark.asyncio
 async def test_preprocess_creates_augmented_caps(
@@ -39,17 +41,22 @@ async def test_preprocess_creates_augmented_caps(
         bind=db_session.bind, class_=AsyncSession, expire_on_commit=False
     )
 
-    with patch("src.services.cap_detection_service.ImageAugmenter") as MockAug, patch(
+    with patch(
+        "src.services.cap_detection_service.AugmentationPool"
+    ) as MockPool, patch(
         "src.services.cap_detection_service.EmbeddingGenerator"
-    ), patch("src.services.cap_detection_service.IndexBuilder"):
-        MockAug.return_value.augment_image_bytes.return_value = [b"aug"]
+    ), patch(
+        "src.services.cap_detection_service.IndexBuilder"
+    ):
+        MockPool.return_value.workers = 1
+        MockPool.return_value.augment = AsyncMock(return_value=[b"aug"])
         service = CapDetectionService(
             mock_minio_client_wrapper, session_maker=session_maker
         )
         created = await service.preprocess(augmentations_per_image=1)
 
     assert created == 1
-    mock_minio_client_wrapper.upload_file.assert_called_once()
+    mock_minio_client_wrapper.upload_files_parallel.assert_called_once()
     augmented_caps = await get_all_augmented_caps(db_session)
     assert len(augmented_caps) == 1
 
@@ -78,7 +85,10 @@ async def test_generate_embeddings_stores_vectors(
     with patch(
         "src.services.cap_detection_service.EmbeddingGenerator"
     ) as MockEmb, patch("src.services.cap_detection_service.IndexBuilder"):
-        MockEmb.return_value.generate_embeddings.return_value = torch.tensor([0.1, 0.2])
+        MockEmb.return_value.preprocess_batch.side_effect = lambda images, pool: images
+        MockEmb.return_value.encode_batch.side_effect = lambda batch: np.tile(
+            np.array([0.1, 0.2], dtype=np.float32), (len(batch), 1)
+        )
         service = CapDetectionService(
             mock_minio_client_wrapper, session_maker=session_maker
         )
@@ -91,6 +101,139 @@ async def test_generate_embeddings_stores_vectors(
     )
 
 
+@pytest.mark.asyncio
+async def test_preprocess_skips_up_to_date_caps(
+    db_session: AsyncSession, mock_minio_client_wrapper: MagicMock
+) -> None:
+    brand = await create_beer_brand(db_session, "Brand")
+    country = await create_country(db_session, CountryCreateSchema(name="Country"))
+    beer = await create_beer(
+        db_session, "Beer", brand.id, rating=5, country_id=country.id
+    )
+    await create_beer_cap(
+        db_session,
+        beer.id,
+        "original.png",
+        BeerCapCreateSchema(filename="original.png"),
+    )
+    mock_minio_client_wrapper.get_object_etag.return_value = "etag-1"
+
+    session_maker = sessionmaker(
+        bind=db_session.bind, class_=AsyncSession, expire_on_commit=False
+    )
+
+    with patch(
+        "src.services.cap_detection_service.AugmentationPool"
+    ) as MockPool, patch(
+        "src.services.cap_detection_service.EmbeddingGenerator"
+    ), patch(
+        "src.services.cap_detection_service.IndexBuilder"
+    ):
+        MockPool.return_value.workers = 1
+        MockPool.return_value.augment = AsyncMock(return_value=[b"aug"])
+        service = CapDetectionService(
+            mock_minio_client_wrapper, session_maker=session_maker
+        )
+        first = await service.preprocess(augmentations_per_image=1)
+        second = await service.preprocess(augmentations_per_image=1)
+        rebuilt = await service.preprocess(augmentations_per_image=1, full_rebuild=True)
+
+    assert (first, second, rebuilt) == (1, 0, 1)
+    assert len(await get_all_augmented_caps(db_session)) == 1
+
+
+@pytest.mark.asyncio
+async def test_augment_and_embed_cap_stores_embeddings(
+    db_session: AsyncSession, mock_minio_client_wrapper: MagicMock
+) -> None:
+    brand = await create_beer_brand(db_session, "Brand")
+    country = await create_country(db_session, CountryCreateSchema(name="Country"))
+    beer = await create_beer(
+        db_session, "Beer", brand.id, rating=5, country_id=country.id
+    )
+    cap = await create_beer_cap(
+        db_session,
+        beer.id,
+        "original.png",
+        BeerCapCreateSchema(filename="original.png"),
+    )
+    mock_minio_client_wrapper.get_object_etag.return_value = "etag-1"
+
+    session_maker = sessionmaker(
+        bind=db_session.bind, class_=AsyncSession, expire_on_commit=False
+    )
+
+    with patch(
+        "src.services.cap_detection_service.ImageAugmenter"
+    ) as MockAugmenter, patch(
+        "src.services.cap_detection_service.EmbeddingGenerator"
+    ) as MockEmb, patch(
+        "src.services.cap_detection_service.IndexBuilder"
+    ):
+        MockAugmenter.return_value.augment_image_bytes.return_value = [b"a", b"b"]
+        MockEmb.return_value.generate_embeddings_batch.return_value = np.array(
+            [[1.0, 0.0], [0.0, 1.0]], dtype=np.float32
+        )
+        service = CapDetectionService(
+            mock_minio_client_wrapper, session_maker=session_maker
+        )
+        embedded = await service.augment_and_embed_cap(cap.id, 1)
+
+    augmented_caps = sorted(
+        await get_all_augmented_caps(db_session), key=lambda aug: aug.id
+    )
+    assert [aug_id for aug_id, _ in embedded] == [aug.id for aug in augmented_caps]
+    assert [aug.s3_key for aug in augmented_caps] == [
+        "original_aug_000.png",
+        "original_aug_001.png",
+    ]
+    assert [aug.embedding_vector.tolist() for aug in augmented_caps] == [
+        [1.0, 0.0],
+        [0.0, 1.0],
+    ]
+    assert {aug.embedding_model for aug in augmented_caps} == {
+        service.embedding_model_name
+    }
+
+
+@pytest.mark.asyncio
+async def test_generate_embeddings_skips_current_model_embeddings(
+    db_session: AsyncSession, mock_minio_client_wrapper: MagicMock
+) -> None:
+    brand = await create_beer_brand(db_session, "Brand")
+    country = await create_country(db_session, CountryCreateSchema(name="Country"))
+    beer = await create_beer(
+        db_session, "Beer", brand.id, rating=5, country_id=country.id
+    )
+    cap = await create_beer_cap(
+        db_session,
+        beer.id,
+        "cap.png",
+        BeerCapCreateSchema(filename="cap.png"),
+    )
+    await create_augmented_cap(db_session, cap.id, "aug.png")
+
+    session_maker = sessionmaker(
+        bind=db_session.bind, class_=AsyncSession, expire_on_commit=False
+    )
+
+    with patch(
+        "src.services.cap_detection_service.EmbeddingGenerator"
+    ) as MockEmb, patch("src.services.cap_detection_service.IndexBuilder"):
+        MockEmb.return_value.preprocess_batch.side_effect = lambda images, pool: images
+        MockEmb.return_value.encode_batch.side_effect = lambda batch: np.tile(
+            np.array([0.1, 0.2], dtype=np.float32), (len(batch), 1)
+        )
+        service = CapDetectionService(
+            mock_minio_client_wrapper, session_maker=session_maker
+        )
+        await service.generate_embeddings()
+        result = await service.generate_embeddings()
+
+    assert result == {"updated_embeddings": 0, "skipped_embeddings": 1}
+    MockEmb.return_value.encode_batch.assert_called_once()
+
+
 @pytest.mark.asyncio
 async def test_generate_index_uploads_files(
     db_session: AsyncSession, mock_minio_client_wrapper: MagicMock
@@ -135,9 +278,13 @@ async def test_generate_index_uploads_files(
         count = await service.generate_index()
 
     assert count == 1
-    assert mock_minio_client_wrapper.upload_file.call_count == 2
+    mock_minio_client_wrapper.ensure_buckets_exist.assert_called_once_with(
+        [settings.minio_index_bucket]
+    )
+    mock_minio_client_wrapper.upload_files_parallel.assert_called_once()
     uploaded = [
-        call.args[1] for call in mock_minio_client_wrapper.upload_file.call_args_list
+        name
+        for name, _ in mock_minio_client_wrapper.upload_files_parallel.call_args.args[1]
     ]
     assert settings.minio_index_file_name in uploaded
     assert settings.minio_metadata_file_name in uploaded
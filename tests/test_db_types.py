@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from src.db.types import PackedVector, pack_vector, unpack_vector
+
+
+def test_float32_round_trip_is_zero_copy():
+    blob = pack_vector([0.1, 0.2, 0.3])
+
+    vector = unpack_vector(blob)
+
+    assert len(blob) == 12
+    assert vector.dtype == np.float32
+    assert not vector.flags["OWNDATA"]
+    np.testing.assert_allclose(vector, [0.1, 0.2, 0.3], rtol=1e-6)
+
+
+def test_float16_storage_is_upcast_on_read():
+    packed = PackedVector("float16")
+
+    blob = packed.process_bind_param(np.array([0.5, -1.0]), dialect=None)
+    vector = packed.process_result_value(blob, dialect=None)
+
+    assert len(blob) == 4
+    assert vector.dtype == np.float32
+    assert vector.tolist() == [0.5, -1.0]
+
+
+def test_packed_vector_handles_null_and_rejects_matrices():
+    packed = PackedVector()
+
+    assert packed.process_bind_param(None, dialect=None) is None
+    assert packed.process_result_value(None, dialect=None) is None
+    with pytest.raises(ValueError):
+        pack_vector([[1.0, 2.0]])
+
+
+def test_unpack_rejects_vectors_of_another_dtype():
+    blob = pack_vector(np.ones(4), "float32")
+
+    assert unpack_vector(blob, "float32", expected_dim=4).shape == (4,)
+    with pytest.raises(ValueError):
+        unpack_vector(blob, "float16", expected_dim=4)
+    with pytest.raises(ValueError):
+        PackedVector("float16", dim=4).process_result_value(blob, dialect=None)
+    with pytest.raises(ValueError):
+        unpack_vector(b"\x00" * 5, "float32")
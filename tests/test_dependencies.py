@@ -0,0 +1,17 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from src.api.dependencies import get_beer_cap_facade, get_minio_client
+
+
+def test_storage_dependencies_share_app_state_instances() -> None:
+    state = SimpleNamespace(minio_client=MagicMock(), beer_cap_facade=MagicMock())
+    first = SimpleNamespace(app=SimpleNamespace(state=state))
+    second = SimpleNamespace(app=SimpleNamespace(state=state))
+
+    assert get_minio_client(first) is get_minio_client(second) is state.minio_client
+    assert (
+        get_beer_cap_facade(first)
+        is get_beer_cap_facade(second)
+        is state.beer_cap_facade
+    )
@@ -0,0 +1,42 @@
+from unittest.mock import patch
+
+import numpy as np
+
+from src.cap_detection.embedding_cache import EmbeddingCache
+
+
+def test_cache_evicts_least_recently_used_and_counts_lookups():
+    cache = EmbeddingCache(max_entries=2)
+    cache.put("a", np.array([1.0, 0.0]))
+    cache.put("b", np.array([0.0, 1.0]))
+    assert cache.get("a") is not None
+
+    cache.put("c", np.array([0.6, 0.8]))
+
+    assert cache.get("b") is None
+    assert cache.get("a").dtype == np.float32
+    assert cache.get("c") is not None
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_cache_expires_entries_after_ttl():
+    cache = EmbeddingCache(ttl_seconds=10.0)
+    with patch("src.cap_detection.embedding_cache.time.monotonic") as clock:
+        clock.return_value = 100.0
+        cache.put("a", np.array([1.0, 0.0]))
+        clock.return_value = 105.0
+        assert cache.get("a") is not None
+        clock.return_value = 111.0
+        assert cache.get("a") is None
+
+    assert len(cache) == 0
+
+
+def test_model_version_change_clears_entries():
+    cache = EmbeddingCache(model_version="v1")
+    cache.put(EmbeddingCache.key_for(b"image"), np.array([1.0, 0.0]))
+
+    cache.set_model_version("v1")
+    assert len(cache) == 1
+    cache.set_model_version("v2")
+    assert len(cache) == 0
@@ -0,0 +1,36 @@
+import io
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import torch
+from PIL import Image
+
+from src.cap_detection.embedding_generator import EmbeddingGenerator
+
+
+def make_image_bytes(color: tuple[int, int, int, int]) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGBA", (8, 8), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@patch("src.cap_detection.embedding_generator.load_model_and_preprocess")
+def test_generate_embeddings_batch_encodes_per_batch(mock_load):
+    model = MagicMock()
+    model.encode_image.side_effect = lambda batch: batch[:, :, 0, 0]
+    preprocess = MagicMock(
+        side_effect=lambda image: torch.tensor(
+            np.array(image, dtype=np.float32)[:2, :2].transpose(2, 0, 1)
+        )
+    )
+    mock_load.return_value = (model, preprocess)
+    generator = EmbeddingGenerator(batch_size=2, preprocess_workers=2)
+
+    images = [make_image_bytes((i, 0, 0, 255)) for i in range(5)]
+    embeddings = generator.generate_embeddings_batch(images)
+
+    assert model.encode_image.call_count == 3
+    assert embeddings.dtype == np.float32
+    assert embeddings.flags["C_CONTIGUOUS"]
+    assert embeddings.shape == (5, 3)
+    assert embeddings[:, 0].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
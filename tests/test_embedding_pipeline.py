@@ -0,0 +1,65 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import pytest
+
+from src.services.embedding_pipeline import EmbeddingPipeline
+
+
+def make_pipeline(session: MagicMock, **kwargs) -> EmbeddingPipeline:
+    minio = MagicMock()
+    minio.download_bytes.side_effect = lambda bucket, key: key.encode()
+    generator = MagicMock()
+    generator.preprocess_batch.side_effect = lambda images, pool: list(images)
+    generator.encode_batch.side_effect = lambda batch: np.array(
+        [[float(len(image)), 0.0] for image in batch], dtype=np.float32
+    )
+    session.__aenter__.return_value = session
+    session.execute = AsyncMock()
+    session.commit = AsyncMock()
+    return EmbeddingPipeline(
+        minio,
+        "bucket",
+        generator,
+        lambda: session,
+        "ViT-B/32",
+        **kwargs,
+    )
+
+
+@pytest.mark.asyncio
+async def test_run_writes_every_job_in_batches():
+    session = MagicMock()
+    pipeline = make_pipeline(session, batch_size=2, download_concurrency=3)
+    jobs = [(i, "x" * i) for i in range(1, 6)]
+
+    written = await pipeline.run(jobs)
+
+    assert written == 5
+    assert pipeline.embedding_generator.encode_batch.call_count == 3
+    assert session.commit.await_count == 3
+    rows = [row for call in session.execute.await_args_list for row in call.args[1]]
+    assert sorted(row["id"] for row in rows) == [1, 2, 3, 4, 5]
+    assert all(row["embedding_vector"].tolist() == [row["id"], 0.0] for row in rows)
+    assert all(row["embedding_model"] == "ViT-B/32" for row in rows)
+
+
+@pytest.mark.asyncio
+async def test_run_propagates_stage_errors():
+    session = MagicMock()
+    pipeline = make_pipeline(session, batch_size=2)
+    pipeline.minio_wrapper.download_bytes.side_effect = RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        await pipeline.run([(1, "a"), (2, "b")])
+
+    session.commit.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_run_without_jobs_does_nothing():
+    session = MagicMock()
+    pipeline = make_pipeline(session)
+
+    assert await pipeline.run([]) == 0
+    session.execute.assert_not_awaited()
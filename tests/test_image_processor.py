@@ -2,6 +2,7 @@ import sys
 from pathlib import Path
 from unittest.mock import MagicMock
 
+import numpy as np
 from PIL import Image
 
 sys.modules["cv2"] = MagicMock()
@@ -10,8 +11,11 @@ from src.cap_detection.image_processor import _process_image_for_embedding
 
 
 class DummyBackgroundRemover:
-    def remove_background(self, img: Image.Image) -> Image.Image:
-        return img
+    def remove_background_batch(self, images: list[np.ndarray]) -> list[np.ndarray]:
+        return [
+            np.dstack((image, np.full(image.shape[:2], 255, np.uint8)))
+            for image in images
+        ]
 
 
 def load_image_bytes() -> bytes:
@@ -35,3 +39,52 @@ def test_process_image_for_embedding_with_alpha():
     )
     assert processed.mode == "RGBA"
     assert processed.size == (128, 128)
+
+
+def test_remove_background_batch_returns_rgba_arrays_at_input_size():
+    import torch
+
+    from src.cap_detection.background_remover import BackgroundRemover
+
+    remover = BackgroundRemover.__new__(BackgroundRemover)
+    remover.device = torch.device("cpu")
+    inputs = []
+
+    def fake_model(batch):
+        inputs.append(batch)
+        mask = batch[:, :1]
+        return (mask,)
+
+    remover.model = fake_model
+    wide = np.zeros((40, 80, 3), dtype=np.uint8)
+    wide[:, 40:] = 255
+    tall = np.full((60, 30, 3), 128, dtype=np.uint8)
+    tall[:30] = 0
+
+    first, second = remover.remove_background_batch([wide, Image.fromarray(tall)])
+
+    assert len(inputs) == 1 and inputs[0].shape == (2, 3, 320, 320)
+    assert first.shape == (40, 80, 4) and first.dtype == np.uint8
+    assert second.shape == (60, 30, 4)
+    assert (first[..., :3] == wide).all()
+    assert first[0, 0, 3] == 0 and first[0, -1, 3] == 255
+    assert second[0, 0, 3] == 0 and second[-1, 0, 3] == 255
+
+
+def test_background_remover_loads_selected_backend(tmp_path):
+    import pytest
+    import torch
+
+    from src.cap_detection.background_remover import BackgroundRemover
+    from src.utils.u2net_model import U2NETP
+
+    weights = tmp_path / "u2netp.pth"
+    torch.save(U2NETP(3, 1).state_dict(), weights)
+    traced = tmp_path / "u2netp.pt"
+    torch.jit.save(torch.jit.script(torch.nn.Identity()), str(traced))
+
+    assert isinstance(BackgroundRemover(weights, backend="u2netp").model, U2NETP)
+    scripted = BackgroundRemover(traced, backend="u2net_torchscript").model
+    assert isinstance(scripted, torch.jit.ScriptModule)
+    with pytest.raises(ValueError):
+        BackgroundRemover(weights, backend="onnx")
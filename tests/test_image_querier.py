@@ -1,34 +1,356 @@
 from unittest.mock import MagicMock, patch
 import sys
 
+import numpy as np
 import torch
 from PIL import Image
 
 sys.modules["cv2"] = MagicMock()
 
-from src.cap_detection.image_querier import ImageQuerier
+from src.cap_detection.image_querier import (
+    ImageQuerier,
+    IndexSnapshot,
+    RerankMatrix,
+    aggregate_hits,
+)
 
 
-@patch("src.cap_detection.image_querier._process_image_for_embedding")
-@patch("src.cap_detection.image_querier.BackgroundRemover")
+@patch("src.cap_detection.image_querier._process_images_for_embedding")
+@patch("src.cap_detection.image_querier.load_background_remover")
 @patch("src.cap_detection.image_querier.load_model_and_preprocess")
 def test_process_image_bytes_uses_image_processor(mock_load, mock_br, mock_process):
     dummy_model = MagicMock()
     dummy_preprocess = MagicMock(return_value=torch.zeros((3, 224, 224)))
     mock_load.return_value = (dummy_model, dummy_preprocess)
     mock_br.return_value = MagicMock()
-    mock_process.return_value = Image.new("RGB", (224, 224))
+    mock_process.return_value = [Image.new("RGB", (224, 224))]
 
     dummy_index = MagicMock()
     querier = ImageQuerier(
-        index=dummy_index,
-        metadata=[],
-        augmented_cap_to_cap={},
-        u2net_model_path="dummy",
+        IndexSnapshot.build(dummy_index, [], {}), u2net_model_path="dummy"
     )
 
     tensor = querier._process_image_bytes(b"data")
 
     mock_process.assert_called_once()
-    dummy_preprocess.assert_called_once_with(mock_process.return_value)
+    dummy_preprocess.assert_called_once_with(mock_process.return_value[0])
     assert tensor.shape == (1, 3, 224, 224)
+
+
+@patch("src.cap_detection.image_querier._process_images_for_embedding")
+@patch("src.cap_detection.image_querier.load_background_remover")
+@patch("src.cap_detection.image_querier.load_model_and_preprocess")
+def test_query_batch_encodes_and_searches_once(mock_load, mock_br, mock_process):
+    dummy_model = MagicMock()
+    dummy_model.encode_image.return_value = torch.ones((2, 4))
+    dummy_preprocess = MagicMock(return_value=torch.zeros((3, 224, 224)))
+    mock_load.return_value = (dummy_model, dummy_preprocess)
+    mock_br.return_value = MagicMock()
+    mock_process.return_value = [Image.new("RGB", (224, 224))] * 2
+
+    dummy_index = MagicMock()
+    dummy_index.ntotal = 3
+    dummy_index.search.return_value = (
+        np.array([[0.9, 0.8, 0.1], [0.7, 0.6, 0.5]], dtype=np.float32),
+        np.array([[0, 1, 2], [2, 1, 0]]),
+    )
+    querier = ImageQuerier(
+        IndexSnapshot.build(dummy_index, [10, 11, 12], {"10": 1, "11": 1, "12": 2}),
+        u2net_model_path="dummy",
+    )
+
+    results = querier.query_batch([b"first", b"second"], top_k=1, faiss_k=3)
+
+    mock_process.assert_called_once()
+    dummy_model.encode_image.assert_called_once()
+    assert dummy_model.encode_image.call_args[0][0].shape == (2, 3, 224, 224)
+    dummy_index.search.assert_called_once()
+    assert list(results[0].keys()) == [1]
+    assert list(results[1].keys()) == [2]
+
+
+def test_aggregate_results_groups_hits_by_cap():
+    snapshot = IndexSnapshot.build(
+        MagicMock(),
+        [10, 11, 12, 13, 14],
+        {"10": 1, "11": 2, "12": 1, "13": 3},
+    )
+
+    similarities = np.array([0.9, 0.75, 0.7, 0.6, 0.5, 0.0], dtype=np.float32)
+    indices = np.array([0, 1, 2, 3, 4, -1])
+
+    results = aggregate_hits(similarities, indices, snapshot.label_to_cap, top_k=2)
+
+    assert list(results.keys()) == [1, 2]
+    assert results[1].match_count == 2
+    assert abs(results[1].mean_similarity - 0.8) < 1e-6
+    assert abs(results[1].min_similarity - 0.7) < 1e-6
+    assert abs(results[1].max_similarity - 0.9) < 1e-6
+    assert results[2].match_count == 1
+
+
+@patch("src.cap_detection.image_querier.load_background_remover")
+@patch("src.cap_detection.image_querier.load_model_and_preprocess")
+def test_centroid_mode_reranks_shortlist_against_augmented_vectors(mock_load, mock_br):
+    dummy_model = MagicMock()
+    dummy_model.encode_image.return_value = torch.tensor([[1.0, 0.0]])
+    mock_load.return_value = (dummy_model, MagicMock())
+
+    dummy_index = MagicMock()
+    dummy_index.ntotal = 3
+    dummy_index.search.return_value = (
+        np.array([[0.9, 0.8]], dtype=np.float32),
+        np.array([[0, 1]]),
+    )
+    rerank_embeddings = np.array(
+        [[0.6, 0.8], [0.0, 1.0], [0.8, 0.6], [1.0, 0.0]], dtype=np.float32
+    )
+    snapshot = IndexSnapshot.build(
+        dummy_index,
+        [1, 2, 3],
+        {},
+        index_mode="centroid",
+        rerank_embeddings=rerank_embeddings,
+        rerank_cap_ids=np.array([1, 1, 2, 3], dtype=np.int32),
+    )
+    querier = ImageQuerier(
+        snapshot, u2net_model_path="dummy", centroid_candidate_factor=2
+    )
+
+    results = querier._search(
+        np.array([[1.0, 0.0]], dtype=np.float32), top_k=1, faiss_k=10000
+    )
+
+    assert dummy_index.search.call_args[0][1] == 2
+    assert list(results[0].keys()) == [2]
+    assert results[0][2].match_count == 1
+    assert abs(results[0][2].mean_similarity - 0.8) < 1e-6
+
+
+def test_rerank_matrix_returns_rows_of_shortlisted_caps():
+    rerank = RerankMatrix.build(
+        np.zeros((5, 2), dtype=np.float32),
+        np.array([3, 1, 2, 1, 3], dtype=np.int32),
+    )
+
+    assert sorted(rerank.rows_for(np.array([1, 3])).tolist()) == [0, 1, 3, 4]
+    assert rerank.rows_for(np.array([2, 7])).tolist() == [2]
+    assert rerank.rows_for(np.array([0, 9])).size == 0
+
+
+@patch("src.cap_detection.image_querier.load_background_remover")
+@patch("src.cap_detection.image_querier.load_model_and_preprocess")
+def test_add_and_remove_caps_on_id_mapped_index(mock_load, mock_br):
+    import faiss
+
+    from src.cap_detection.index_builder import IndexBuilder
+
+    mock_load.return_value = (MagicMock(), MagicMock())
+    index, _ = IndexBuilder().build_index([[1.0, 0.0], [0.0, 1.0]], [10, 11])
+    querier = ImageQuerier(
+        IndexSnapshot.build(index, [10, 11], {"10": 1, "11": 2}, id_mapped=True),
+        u2net_model_path="dummy",
+    )
+
+    vector = np.array([[0.6, 0.8]], dtype=np.float32)
+    assert querier.add_embeddings([25], 3, vector) == 1
+    assert querier.add_embeddings([25], 3, vector) == 0
+
+    query = np.array([[0.6, 0.8]], dtype=np.float32)
+    sims, labels = querier.snapshot.index.search(query, 3)
+    assert labels[0][0] == 25
+    label_to_cap = querier.snapshot.label_to_cap
+    assert list(aggregate_hits(sims[0], labels[0], label_to_cap, 1)) == [3]
+
+    assert querier.remove_caps([3]) == 1
+    assert querier.snapshot.index.ntotal == 2
+    assert querier.snapshot.metadata == (10, 11)
+    assert querier.indexed_augmented_cap_ids().tolist() == [10, 11]
+    assert querier.remove_augmented_caps([11, 99]) == 1
+    assert querier.indexed_augmented_cap_ids().tolist() == [10]
+
+    restored = faiss.deserialize_index(
+        np.frombuffer(querier.serialize_index()[0], dtype=np.uint8)
+    )
+    assert restored.ntotal == 1
+
+
+@patch("src.cap_detection.image_querier.load_background_remover")
+@patch("src.cap_detection.image_querier.load_model_and_preprocess")
+def test_masked_hnsw_removals_survive_save_and_reload(mock_load, mock_br):
+    import faiss
+
+    from src.cap_detection.index_builder import IndexBuilder
+
+    mock_load.return_value = (MagicMock(), MagicMock())
+    vectors = [[1.0, 0.0], [0.9, 0.1], [0.0, 1.0]]
+    index, _ = IndexBuilder(index_type="hnsw_flat").build_index(vectors, [10, 11, 300])
+    querier = ImageQuerier(
+        IndexSnapshot.build(
+            index,
+            [10, 11, 300],
+            {"10": 1, "11": 1, "300": 2},
+            index_type="hnsw_flat",
+            id_mapped=True,
+        ),
+        u2net_model_path="dummy",
+    )
+
+    assert querier.remove_caps([2]) == 1
+    assert querier.snapshot.metadata == (10, 11, 300)
+
+    restored = faiss.deserialize_index(
+        np.frombuffer(querier.serialize_index()[0], dtype=np.uint8)
+    )
+    # The deleted augmented cap is gone from the database after a reload.
+    reloaded = ImageQuerier(
+        IndexSnapshot.build(
+            restored,
+            list(querier.snapshot.metadata),
+            {"10": 1, "11": 1},
+            index_type="hnsw_flat",
+            id_mapped=True,
+        ),
+        u2net_model_path="dummy",
+    )
+    results = reloaded._search(
+        np.array([[0.0, 1.0]], dtype=np.float32), top_k=2, faiss_k=3
+    )
+    assert list(results[0]) == [1]
+
+
+def test_aggregate_hits_ignores_labels_outside_lookup():
+    results = aggregate_hits(
+        np.array([0.9, 0.8]), np.array([300, 1]), np.array([-1, 5]), top_k=2
+    )
+
+    assert list(results) == [5]
+
+
+@patch("src.cap_detection.image_querier.load_background_remover")
+@patch("src.cap_detection.image_querier.load_model_and_preprocess")
+def test_updates_publish_copies_and_searches_skip_lock(mock_load, mock_br):
+    from src.cap_detection.index_builder import IndexBuilder
+
+    mock_load.return_value = (MagicMock(), MagicMock())
+    index, _ = IndexBuilder().build_index([[1.0, 0.0], [0.0, 1.0]], [10, 11])
+    snapshot = IndexSnapshot.build(index, [10, 11], {"10": 1, "11": 2}, id_mapped=True)
+    querier = ImageQuerier(snapshot, u2net_model_path="dummy")
+
+    querier.add_embeddings([25], 3, np.array([[0.6, 0.8]], dtype=np.float32))
+    querier.remove_caps([1])
+
+    assert querier.snapshot.index is not snapshot.index
+    assert snapshot.index.ntotal == 2
+    assert querier.snapshot.index.ntotal == 2
+    with querier._index_lock:
+        results = querier._search(
+            np.array([[0.6, 0.8]], dtype=np.float32), top_k=1, faiss_k=10
+        )
+    assert list(results[0]) == [3]
+
+
+@patch("src.cap_detection.image_querier.load_background_remover")
+@patch("src.cap_detection.image_querier.load_model_and_preprocess")
+def test_mmapped_index_is_copied_before_update(mock_load, mock_br, tmp_path):
+    import faiss
+
+    from src.cap_detection.index_builder import IndexBuilder
+
+    mock_load.return_value = (MagicMock(), MagicMock())
+    builder = IndexBuilder(index_type="ivf_flat", ivf_nlist=2)
+    vectors = [[1.0, 0.0], [0.9, 0.1], [0.0, 1.0], [0.1, 0.9]]
+    index, _ = builder.build_index(vectors, [10, 11, 12, 13])
+    path = tmp_path / "caps.index"
+    faiss.write_index(index, str(path))
+    mapped = faiss.read_index(str(path), faiss.IO_FLAG_MMAP_IFC)
+    snapshot = IndexSnapshot.build(
+        mapped,
+        [10, 11, 12, 13],
+        {"10": 1, "11": 1, "12": 2, "13": 2},
+        index_type="ivf_flat",
+        id_mapped=True,
+        memory_mapped=True,
+        nprobe=2,
+    )
+    querier = ImageQuerier(snapshot, u2net_model_path="dummy")
+    # Another worker may replace the cached file while this one serves it.
+    path.unlink()
+
+    querier.add_embeddings([14], 3, np.array([[0.6, 0.8]], dtype=np.float32))
+    assert querier.remove_caps([1]) == 2
+
+    assert not querier.snapshot.memory_mapped
+    assert querier.snapshot.index.ntotal == 3
+    assert faiss.extract_index_ivf(querier.snapshot.index).nprobe == 2
+    assert snapshot.index.ntotal == 4
+
+
+@patch("src.cap_detection.image_querier.load_background_remover")
+@patch("src.cap_detection.image_querier.load_model_and_preprocess")
+def test_swap_snapshot_keeps_models_and_serves_new_index(mock_load, mock_br):
+    from src.cap_detection.index_builder import IndexBuilder
+
+    dummy_model = MagicMock()
+    dummy_model.encode_image.return_value = torch.tensor([[1.0, 0.0]])
+    mock_load.return_value = (dummy_model, MagicMock())
+    builder = IndexBuilder()
+    old_index, _ = builder.build_index([[1.0, 0.0]], [10])
+    new_index, _ = builder.build_index([[1.0, 0.0], [0.0, 1.0]], [20, 21])
+    querier = ImageQuerier(
+        IndexSnapshot.build(old_index, [10], {"10": 1}, id_mapped=True),
+        u2net_model_path="dummy",
+    )
+
+    previous = querier.swap_snapshot(
+        IndexSnapshot.build(
+            new_index, [20, 21], {"20": 2, "21": 3}, id_mapped=True, version=2
+        )
+    )
+    results = querier._search(
+        np.array([[1.0, 0.0]], dtype=np.float32), top_k=1, faiss_k=10
+    )
+
+    mock_load.assert_called_once()
+    mock_br.assert_called_once()
+    assert previous.index is old_index
+    assert querier.snapshot.version == 2
+    assert list(results[0].keys()) == [2]
+
+
+@patch("src.cap_detection.image_querier._process_images_for_embedding")
+@patch("src.cap_detection.image_querier.load_background_remover")
+@patch("src.cap_detection.image_querier.load_model_and_preprocess")
+def test_embedding_cache_skips_preprocessing_of_seen_images(
+    mock_load, mock_br, mock_process
+):
+    from src.cap_detection.embedding_cache import EmbeddingCache
+
+    dummy_model = MagicMock()
+    dummy_model.encode_image.side_effect = lambda batch: torch.ones((len(batch), 2))
+    mock_load.return_value = (dummy_model, MagicMock(return_value=torch.zeros(3)))
+    mock_process.side_effect = lambda images, *args: [Image.new("RGB", (8, 8))] * len(
+        images
+    )
+    dummy_index = MagicMock()
+    dummy_index.ntotal = 1
+    dummy_index.search.side_effect = lambda vectors, k, params=None: (
+        np.ones((len(vectors), 1), dtype=np.float32),
+        np.zeros((len(vectors), 1), dtype=np.int64),
+    )
+    cache = EmbeddingCache(max_entries=8)
+    querier = ImageQuerier(
+        IndexSnapshot.build(dummy_index, [10], {"10": 1}),
+        u2net_model_path="dummy",
+        embedding_cache=cache,
+    )
+
+    querier.query_batch([b"first", b"first"], top_k=1, faiss_k=1)
+    results = querier.query_batch([b"first", b"second"], top_k=1, faiss_k=1)
+
+    assert [call.args[0] for call in mock_process.call_args_list] == [
+        [b"first"],
+        [b"second"],
+    ]
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert [list(result) for result in results] == [[1], [1]]
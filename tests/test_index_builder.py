@@ -0,0 +1,107 @@
+import pickle
+
+import numpy as np
+
+from src.cap_detection.index_builder import (
+    INDEX_MODE_AUGMENTED,
+    INDEX_MODE_CENTROID,
+    INDEX_TYPE_FLAT,
+    INDEX_TYPE_HNSW_FLAT,
+    INDEX_TYPE_IVF_FLAT,
+    INDEX_TYPE_IVF_PQ,
+    INDEX_TYPES,
+    IndexBuilder,
+    IndexMetadata,
+    configure_index,
+    make_search_parameters,
+)
+
+
+def test_build_centroid_index_stores_one_vector_per_cap() -> None:
+    embeddings = [[1.0, 0.0], [0.8, 0.2], [0.0, 1.0], [0.1, 0.9], [0.2, 0.8]]
+    cap_ids = [7, 7, 3, 3, 3]
+
+    index, metadata_blob = IndexBuilder().build_centroid_index(embeddings, cap_ids)
+
+    metadata = IndexMetadata.from_bytes(metadata_blob)
+    assert index.ntotal == 2
+    assert metadata.mode == INDEX_MODE_CENTROID
+    assert sorted(metadata.ids) == [3, 7]
+
+    query = np.array([[1.0, 0.0]], dtype=np.float32)
+    _, rows = index.search(query, 1)
+    assert metadata.ids[rows[0][0]] == 7
+
+
+def test_build_centroid_index_with_prototypes() -> None:
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(40, 8)).tolist()
+    cap_ids = [1] * 20 + [2] * 20
+
+    index, metadata_blob = IndexBuilder().build_centroid_index(
+        embeddings, cap_ids, prototypes_per_cap=3
+    )
+
+    assert index.ntotal == 6
+    assert sorted(IndexMetadata.from_bytes(metadata_blob).ids) == [1] * 3 + [2] * 3
+
+
+def test_index_metadata_reads_legacy_id_list() -> None:
+    metadata = IndexMetadata.from_bytes(pickle.dumps([4, 5, 6]))
+
+    assert metadata.ids == [4, 5, 6]
+    assert metadata.mode == INDEX_MODE_AUGMENTED
+
+
+def test_build_index_supports_every_index_type() -> None:
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(300, 16)).astype(np.float32)
+
+    for index_type in INDEX_TYPES:
+        index, metadata_blob = IndexBuilder(index_type=index_type, pq_m=4).build_index(
+            embeddings.tolist(), list(range(300))
+        )
+        metadata = IndexMetadata.from_bytes(metadata_blob)
+        configure_index(index, metadata.index_type, nprobe=4, ef_search=32)
+
+        query = embeddings[:1] / np.linalg.norm(embeddings[:1])
+        params = make_search_parameters(index, nprobe=300, ef_search=300)
+        _, rows = index.search(query, 1, params=params)
+
+        assert metadata.index_type == index_type
+        assert index.ntotal == 300
+        assert rows[0][0] == 0
+
+
+def test_pq_index_falls_back_to_flat_with_too_few_vectors() -> None:
+    embeddings = np.eye(8, dtype=np.float32).tolist()
+
+    _, metadata_blob = IndexBuilder(index_type=INDEX_TYPE_IVF_PQ, pq_m=4).build_index(
+        embeddings, list(range(8))
+    )
+
+    assert IndexMetadata.from_bytes(metadata_blob).index_type == INDEX_TYPE_FLAT
+
+
+def test_make_search_parameters_matches_index_type() -> None:
+    embeddings = np.eye(8, dtype=np.float32).tolist()
+    ivf, _ = IndexBuilder(index_type=INDEX_TYPE_IVF_FLAT).build_index(
+        embeddings, list(range(8))
+    )
+    hnsw, _ = IndexBuilder(index_type=INDEX_TYPE_HNSW_FLAT).build_index(
+        embeddings, list(range(8))
+    )
+
+    assert make_search_parameters(ivf) is None
+    assert make_search_parameters(ivf, nprobe=2).nprobe == 2
+    assert make_search_parameters(hnsw, ef_search=40).efSearch == 40
+
+
+def test_build_index_accepts_float32_matrix_without_copy():
+    embeddings = np.array([[3.0, 4.0], [0.0, 2.0]], dtype=np.float32)
+
+    index, blob = IndexBuilder().build_index(embeddings, np.array([7, 9]))
+
+    np.testing.assert_allclose(embeddings, [[0.6, 0.8], [0.0, 1.0]], rtol=1e-6)
+    assert IndexMetadata.from_bytes(blob).ids == [7, 9]
+    assert index.ntotal == 2
@@ -0,0 +1,86 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.services.index_updater import IndexUpdater
+
+
+def make_updater(supports_updates: bool = True) -> IndexUpdater:
+    cap_detection_service = MagicMock()
+    cap_detection_service.augment_and_embed_cap = AsyncMock(
+        return_value=[(10, [1.0, 0.0]), (11, [0.0, 1.0])]
+    )
+    query_service = MagicMock()
+    query_service.supports_incremental_updates = supports_updates
+    query_service.add_to_index = AsyncMock(return_value=2)
+    query_service.remove_caps_from_index = AsyncMock(return_value=2)
+    query_service.sync_index = AsyncMock()
+    return IndexUpdater(
+        cap_detection_service,
+        query_service,
+        augmentations_per_image=2,
+        update_retry_delay_seconds=0,
+    )
+
+
+@pytest.mark.asyncio
+async def test_add_beer_cap_embeds_and_adds_to_index():
+    updater = make_updater()
+
+    added = await updater.add_beer_cap(5)
+
+    assert added == 2
+    updater.cap_detection_service.augment_and_embed_cap.assert_awaited_once_with(5, 2)
+    updater.query_service.add_to_index.assert_awaited_once_with(
+        5, [(10, [1.0, 0.0]), (11, [0.0, 1.0])]
+    )
+
+
+@pytest.mark.asyncio
+async def test_sync_loop_syncs_index_and_survives_failures():
+    updater = make_updater()
+    updater.sync_interval_seconds = 0
+    updater.query_service.sync_index.side_effect = [RuntimeError("down"), None]
+
+    updater.start()
+    while updater.query_service.sync_index.await_count < 2:
+        await asyncio.sleep(0)
+    await updater.stop()
+
+    assert updater._sync_task is None
+
+
+@pytest.mark.asyncio
+async def test_updates_skipped_when_index_not_updatable():
+    updater = make_updater(supports_updates=False)
+
+    assert await updater.add_beer_cap(5) == 0
+    assert await updater.remove_beer_caps([5]) == 0
+
+    updater.cap_detection_service.augment_and_embed_cap.assert_not_awaited()
+    updater.query_service.remove_caps_from_index.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_failed_index_update_is_retried():
+    updater = make_updater()
+    updater.query_service.remove_caps_from_index.side_effect = [
+        RuntimeError("busy"),
+        2,
+    ]
+
+    assert await updater.remove_beer_caps([5]) == 2
+
+    assert updater.query_service.remove_caps_from_index.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_index_update_failures_are_logged_not_raised(caplog):
+    updater = make_updater()
+    updater.query_service.add_to_index.side_effect = RuntimeError("busy")
+
+    assert await updater.add_beer_cap(5) == 0
+
+    assert updater.query_service.add_to_index.await_count == 3
+    assert "Failed to add beer cap 5 to the index after 3 attempts" in caplog.text
@@ -0,0 +1,37 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.services.inference_executor import InferenceExecutor, InferenceQueueFullError
+
+
+@pytest.mark.asyncio
+async def test_run_executes_off_event_loop_thread() -> None:
+    executor = InferenceExecutor(max_workers=1, max_queue_size=1)
+    loop_thread = threading.get_ident()
+
+    result = await executor.run(lambda value: (value, threading.get_ident()), 42)
+
+    assert result[0] == 42
+    assert result[1] != loop_thread
+    assert executor.pending == 0
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_run_rejects_when_queue_is_full() -> None:
+    executor = InferenceExecutor(max_workers=1, max_queue_size=1)
+    release = threading.Event()
+
+    running = asyncio.ensure_future(executor.run(release.wait))
+    queued = asyncio.ensure_future(executor.run(release.wait))
+    await asyncio.sleep(0)
+
+    with pytest.raises(InferenceQueueFullError):
+        await executor.run(release.wait)
+
+    release.set()
+    await asyncio.gather(running, queued)
+    assert executor.pending == 0
+    executor.shutdown()
@@ -142,3 +142,28 @@ class TestMinioClientIntegration:
         assert len(downloaded_objects) == len(object_names)
         for name in object_names:
             assert name in downloaded_names
+
+    def test_upload_files_parallel(
+        self, real_minio_client: MinioClientWrapper, dummy_image_bytes: bytes
+    ):
+        objects = [(f"test_bulk_{idx}.jpg", dummy_image_bytes) for idx in range(4)]
+
+        failures = real_minio_client.upload_files_parallel(
+            TEST_BUCKET_NAME, objects, content_type=TEST_IMAGE_CONTENT_TYPE
+        )
+
+        assert failures == []
+        for name, _ in objects:
+            assert real_minio_client.object_exists(TEST_BUCKET_NAME, name)
+
+    def test_upload_files_parallel_reports_failed_objects(
+        self, real_minio_client: MinioClientWrapper, dummy_image_bytes: bytes
+    ):
+        objects = [("test_bulk_ok.jpg", dummy_image_bytes)]
+
+        failures = real_minio_client.upload_files_parallel(
+            "missing-bulk-bucket", objects
+        )
+
+        assert [failure.object_name for failure in failures] == ["test_bulk_ok.jpg"]
+        assert isinstance(failures[0].error, S3Error)
@@ -0,0 +1,55 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+import torch
+
+from src.cap_detection import model_loader
+
+
+@pytest.fixture(autouse=True)
+def empty_registry():
+    model_loader.unload_models()
+    yield
+    model_loader.unload_models()
+
+
+@patch("src.cap_detection.model_loader.BackgroundRemover")
+def test_background_remover_is_loaded_once_across_threads(mock_br, tmp_path):
+    def slow_load(model_path, backend):
+        time.sleep(0.05)
+        return MagicMock()
+
+    mock_br.side_effect = slow_load
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(
+                model_loader.load_background_remover(tmp_path / "u2net.pth")
+            )
+        )
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    mock_br.assert_called_once_with(
+        model_path=(tmp_path / "u2net.pth").resolve(), backend="u2net"
+    )
+    assert all(result is results[0] for result in results)
+
+
+@patch("src.cap_detection.model_loader.clip.load")
+def test_loaded_model_sizes_reports_parameter_bytes(mock_clip_load):
+    mock_clip_load.return_value = (torch.nn.Linear(4, 2), MagicMock())
+
+    first = model_loader.load_model_and_preprocess()
+    second = model_loader.load_model_and_preprocess()
+
+    assert first is second
+    mock_clip_load.assert_called_once()
+    sizes = model_loader.loaded_model_sizes()
+    assert sizes == {f"clip:{model_loader.CLIP_MODEL_NAME}": (4 * 2 + 2) * 4}
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from src.services.query_batcher import QueryBatcher
+
+
+@pytest.mark.asyncio
+async def test_concurrent_queries_are_coalesced_into_one_batch() -> None:
+    calls: list[tuple[list[bytes], int, int]] = []
+
+    async def run_batch(images: list[bytes], top_k: int, faiss_k: int):
+        calls.append((list(images), top_k, faiss_k))
+        return [{index: image} for index, image in enumerate(images)]
+
+    batcher = QueryBatcher(run_batch, max_batch_size=8, max_wait_ms=5)
+
+    results = await asyncio.gather(
+        batcher.submit(b"a", 3, 100),
+        batcher.submit(b"b", 3, 100),
+        batcher.submit(b"c", 3, 100),
+    )
+
+    assert calls == [([b"a", b"b", b"c"], 3, 100)]
+    assert results == [{0: b"a"}, {1: b"b"}, {2: b"c"}]
+    assert batcher.batch_sizes == {3: 1}
+    assert batcher.mean_batch_size == 3.0
+
+
+@pytest.mark.asyncio
+async def test_batch_flushes_at_max_size_and_groups_by_parameters() -> None:
+    calls: list[tuple[int, int]] = []
+
+    async def run_batch(images: list[bytes], top_k: int, faiss_k: int):
+        calls.append((len(images), top_k))
+        return [{} for _ in images]
+
+    batcher = QueryBatcher(run_batch, max_batch_size=2, max_wait_ms=1000)
+
+    await asyncio.wait_for(
+        asyncio.gather(batcher.submit(b"a", 3, 100), batcher.submit(b"b", 3, 100)),
+        timeout=0.5,
+    )
+    await asyncio.gather(batcher.submit(b"c", 1, 100), batcher.submit(b"d", 2, 100))
+
+    assert calls[0] == (2, 3)
+    assert sorted(calls[1:]) == [(1, 1), (1, 2)]
+    assert batcher.batches_run == 3
+
+
+@pytest.mark.asyncio
+async def test_batch_errors_are_raised_to_every_caller() -> None:
+    async def run_batch(images: list[bytes], top_k: int, faiss_k: int):
+        raise RuntimeError("boom")
+
+    batcher = QueryBatcher(run_batch, max_batch_size=8, max_wait_ms=1)
+
+    results = await asyncio.gather(
+        batcher.submit(b"a", 3, 100),
+        batcher.submit(b"b", 3, 100),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
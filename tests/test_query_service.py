@@ -1,11 +1,16 @@
+import hashlib
 import sys
 from contextlib import asynccontextmanager
 from dataclasses import dataclass
 from unittest.mock import MagicMock
 
+import numpy as np
 import pytest
 
-from src.services.query_service import BeerCapNotFoundError, QueryService
+from src.services.query_service import (
+    IndexChecksumError,
+    QueryService,
+)
 
 sys.modules.setdefault("cv2", MagicMock())
 
@@ -21,10 +26,13 @@ class DummyAggregatedResult:
 @dataclass
 class DummyBeerCap:
     id: int
+    variant_name: str | None = None
+    collected_date: None = None
+    s3_key: str = "cap.jpg"
 
 
 @pytest.mark.asyncio
-async def test_query_image_raises_when_cap_missing(
+async def test_query_image_skips_caps_missing_from_database(
     mock_minio_client_wrapper: MagicMock, monkeypatch: pytest.MonkeyPatch
 ) -> None:
     @asynccontextmanager
@@ -35,24 +43,27 @@ async def test_query_image_raises_when_cap_missing(
         minio_wrapper=mock_minio_client_wrapper, session_maker=fake_session_maker
     )
 
+    deleted = DummyAggregatedResult(
+        match_count=1, mean_similarity=0.9, min_similarity=0.8, max_similarity=1.0
+    )
+    kept = DummyAggregatedResult(
+        match_count=1, mean_similarity=0.7, min_similarity=0.6, max_similarity=0.8
+    )
     mock_querier = MagicMock()
-    mock_querier.query.return_value = {
-        1: DummyAggregatedResult(
-            match_count=1,
-            mean_similarity=0.9,
-            min_similarity=0.8,
-            max_similarity=1.0,
-        )
-    }
+    mock_querier.query.return_value = {1: deleted, 2: kept}
     service.querier = mock_querier
 
-    async def fake_get_cap(session: MagicMock, cap_id: int):
-        return None
+    async def fake_get_caps(session: MagicMock, cap_ids: set[int]):
+        return [DummyBeerCap(id=2)]
+
+    monkeypatch.setattr(
+        "src.services.query_service.get_beer_caps_by_ids", fake_get_caps
+    )
 
-    monkeypatch.setattr("src.services.query_service.get_beer_cap_by_id", fake_get_cap)
+    caps, results = await service.query_image(b"dummy")
 
-    with pytest.raises(BeerCapNotFoundError):
-        await service.query_image(b"dummy")
+    assert [cap.id for cap in caps] == [2]
+    assert results == [kept]
 
 
 @pytest.mark.asyncio
@@ -89,7 +100,7 @@ async def test_query_image_orders_and_filters_results(
     }
 
     class DummyQuerier:
-        def query(self, image_bytes: bytes, top_k: int, faiss_k: int):
+        def query(self, image_bytes: bytes, top_k: int, faiss_k: int, **params):
             assert top_k == 2
             ordered = dict(
                 sorted(
@@ -102,10 +113,12 @@ async def test_query_image_orders_and_filters_results(
 
     service.querier = DummyQuerier()
 
-    async def fake_get_cap(session: MagicMock, cap_id: int):
-        return DummyBeerCap(id=cap_id)
+    async def fake_get_caps(session: MagicMock, cap_ids: set[int]):
+        return [DummyBeerCap(id=cap_id) for cap_id in cap_ids]
 
-    monkeypatch.setattr("src.services.query_service.get_beer_cap_by_id", fake_get_cap)
+    monkeypatch.setattr(
+        "src.services.query_service.get_beer_caps_by_ids", fake_get_caps
+    )
 
     caps, agg_results = await service.query_image(b"dummy", top_k=2)
 
@@ -119,3 +132,236 @@ async def test_query_image_orders_and_filters_results(
     ):
         assert cap.id == exp_id
         assert result == exp_result
+
+
+@pytest.mark.asyncio
+async def test_query_images_returns_results_per_image(
+    mock_minio_client_wrapper: MagicMock, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    @asynccontextmanager
+    async def fake_session_maker():
+        yield MagicMock()
+
+    service = QueryService(
+        minio_wrapper=mock_minio_client_wrapper, session_maker=fake_session_maker
+    )
+
+    first = DummyAggregatedResult(
+        match_count=1, mean_similarity=0.9, min_similarity=0.8, max_similarity=1.0
+    )
+    second = DummyAggregatedResult(
+        match_count=2, mean_similarity=0.7, min_similarity=0.6, max_similarity=0.8
+    )
+
+    mock_querier = MagicMock()
+    mock_querier.query_batch.return_value = [{1: first}, {2: second}]
+    service.querier = mock_querier
+
+    async def fake_get_caps(session: MagicMock, cap_ids: set[int]):
+        return [DummyBeerCap(id=cap_id) for cap_id in cap_ids]
+
+    monkeypatch.setattr(
+        "src.services.query_service.get_beer_caps_by_ids", fake_get_caps
+    )
+
+    batch = await service.query_images([b"first", b"second"], top_k=1)
+
+    mock_querier.query_batch.assert_called_once_with(
+        images=[b"first", b"second"],
+        top_k=1,
+        faiss_k=10000,
+        nprobe=None,
+        ef_search=None,
+    )
+    assert [[cap.id for cap in caps] for caps, _ in batch] == [[1], [2]]
+    assert [results for _, results in batch] == [[first], [second]]
+
+
+def test_fetch_index_file_downloads_once_per_etag(
+    mock_minio_client_wrapper: MagicMock, tmp_path
+) -> None:
+    content = b"index-bytes"
+    etag = hashlib.md5(content).hexdigest()
+    mock_minio_client_wrapper.get_object_etag.return_value = etag
+    mock_minio_client_wrapper.download_file.side_effect = (
+        lambda bucket, name, path: open(path, "wb").write(content)
+    )
+    service = QueryService(minio_wrapper=mock_minio_client_wrapper)
+    service.index_cache_dir = tmp_path
+
+    first = service._fetch_index_file()
+    second = service._fetch_index_file()
+
+    assert first == second
+    assert first.read_bytes() == content
+    mock_minio_client_wrapper.download_file.assert_called_once()
+    assert [p.name for p in tmp_path.iterdir()] == [first.name]
+
+
+def test_fetch_index_file_rejects_checksum_mismatch(
+    mock_minio_client_wrapper: MagicMock, tmp_path
+) -> None:
+    mock_minio_client_wrapper.get_object_etag.return_value = "0" * 32
+    mock_minio_client_wrapper.download_file.side_effect = (
+        lambda bucket, name, path: open(path, "wb").write(b"corrupt")
+    )
+    service = QueryService(minio_wrapper=mock_minio_client_wrapper)
+    service.index_cache_dir = tmp_path
+
+    with pytest.raises(IndexChecksumError):
+        service._fetch_index_file()
+
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_reload_swaps_snapshot_on_existing_querier(
+    mock_minio_client_wrapper: MagicMock, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    service = QueryService(minio_wrapper=mock_minio_client_wrapper)
+    built_versions = []
+
+    async def fake_build_snapshot(version):
+        built_versions.append(version)
+        return MagicMock(version=version), [DummyBeerCap(id=version)], "etag"
+
+    monkeypatch.setattr(service, "_build_snapshot", fake_build_snapshot)
+    querier = MagicMock()
+    service.querier = querier
+
+    await service.load_index()
+    await service.load_index()
+
+    assert built_versions == [1, 2]
+    assert service.querier is querier
+    assert [c.args[0].version for c in querier.swap_snapshot.call_args_list] == [1, 2]
+    assert list(service.cap_metadata_cache.get_many([1, 2])) == [2]
+
+
+@pytest.mark.asyncio
+async def test_reload_does_not_cache_caps_invalidated_during_read(
+    mock_minio_client_wrapper: MagicMock, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    service = QueryService(minio_wrapper=mock_minio_client_wrapper)
+
+    async def fake_build_snapshot(version):
+        caps = [DummyBeerCap(id=1, variant_name="old")]
+        service.invalidate_cap_metadata([1])
+        return MagicMock(version=version), caps, "etag"
+
+    monkeypatch.setattr(service, "_build_snapshot", fake_build_snapshot)
+    service.querier = MagicMock()
+
+    await service.load_index()
+
+    assert service.cap_metadata_cache.get_many([1]) == {}
+
+
+@pytest.mark.asyncio
+async def test_cap_metadata_is_served_from_cache_with_one_fallback_query(
+    mock_minio_client_wrapper: MagicMock, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    sessions = []
+
+    @asynccontextmanager
+    async def fake_session_maker():
+        sessions.append(1)
+        yield MagicMock()
+
+    service = QueryService(
+        minio_wrapper=mock_minio_client_wrapper, session_maker=fake_session_maker
+    )
+    service.cap_metadata_cache.replace([DummyBeerCap(id=1), DummyBeerCap(id=2)])
+    result = DummyAggregatedResult(
+        match_count=1, mean_similarity=0.9, min_similarity=0.8, max_similarity=1.0
+    )
+    mock_querier = MagicMock()
+    mock_querier.query_batch.return_value = [{1: result, 3: result}, {4: result}]
+    service.querier = mock_querier
+    queried_ids = []
+
+    async def fake_get_caps(session: MagicMock, cap_ids: set[int]):
+        queried_ids.append(set(cap_ids))
+        return [DummyBeerCap(id=cap_id) for cap_id in cap_ids]
+
+    monkeypatch.setattr(
+        "src.services.query_service.get_beer_caps_by_ids", fake_get_caps
+    )
+
+    batch = await service.query_images([b"first", b"second"], top_k=2)
+    assert [[cap.id for cap in caps] for caps, _ in batch] == [[1, 3], [4]]
+    assert queried_ids == [{3, 4}]
+
+    service.invalidate_cap_metadata([1])
+    mock_querier.query_batch.return_value = [{3: result}, {4: result}]
+    await service.query_images([b"first", b"second"], top_k=2)
+
+    assert queried_ids == [{3, 4}]
+    assert len(sessions) == 1
+
+
+@pytest.mark.asyncio
+async def test_sync_index_applies_database_changes_from_other_workers(
+    mock_minio_client_wrapper: MagicMock, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    @asynccontextmanager
+    async def fake_session_maker():
+        yield MagicMock()
+
+    service = QueryService(
+        minio_wrapper=mock_minio_client_wrapper, session_maker=fake_session_maker
+    )
+    mock_minio_client_wrapper.object_exists.return_value = True
+    mock_minio_client_wrapper.get_object_etag.return_value = "etag"
+    service._index_etag = "etag"
+    querier = MagicMock()
+    querier.supports_updates = True
+    querier.indexed_augmented_cap_ids.return_value = np.array([10, 11])
+    querier.add_embeddings.side_effect = lambda ids, cap_id, embeddings: len(ids)
+    querier.remove_augmented_caps.side_effect = len
+    service.querier = querier
+    loaded_ids = []
+
+    async def fake_embedded_ids(session):
+        return {11: 1, 12: 2, 13: 2}
+
+    async def fake_embeddings(session, ids):
+        loaded_ids.append(ids)
+        return [(12, 2, np.ones(2)), (13, 2, np.zeros(2))]
+
+    monkeypatch.setattr(
+        "src.services.query_service.get_embedded_augmented_cap_ids", fake_embedded_ids
+    )
+    monkeypatch.setattr(
+        "src.services.query_service.get_augmented_cap_embeddings", fake_embeddings
+    )
+
+    await service.sync_index()
+
+    assert loaded_ids == [[12, 13]]
+    (ids, cap_id, _), _ = querier.add_embeddings.call_args
+    assert (ids, cap_id) == ([12, 13], 2)
+    querier.remove_augmented_caps.assert_called_once_with([10])
+
+
+@pytest.mark.asyncio
+async def test_sync_index_reloads_newly_uploaded_index(
+    mock_minio_client_wrapper: MagicMock, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    service = QueryService(minio_wrapper=mock_minio_client_wrapper)
+    mock_minio_client_wrapper.object_exists.return_value = True
+    mock_minio_client_wrapper.get_object_etag.return_value = "new"
+    service._index_etag = "old"
+    service.querier = MagicMock()
+    service.querier.supports_updates = False
+
+    async def fake_build_snapshot(version):
+        return MagicMock(version=version), [], "new"
+
+    monkeypatch.setattr(service, "_build_snapshot", fake_build_snapshot)
+
+    await service.sync_index()
+    await service.sync_index()
+
+    service.querier.swap_snapshot.assert_called_once()
+    service.querier.indexed_augmented_cap_ids.assert_not_called()
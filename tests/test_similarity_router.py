@@ -11,6 +11,7 @@ from src.api.dependencies.services import get_query_service
 from src.api.routers.similarity_router import router
 from src.api.schemas.similarity.query_response import BeerCapResponseWithQueryResult
 from src.api.dependencies.auth import verify_admin
+from src.services.inference_executor import InferenceQueueFullError
 
 
 @dataclass
@@ -49,6 +50,9 @@ def client() -> TestClient:
 
     mock_query_service = MagicMock()
     mock_query_service.query_image = AsyncMock(return_value=([cap], [result]))
+    mock_query_service.query_images = AsyncMock(
+        return_value=[([cap], [result]), ([], [])]
+    )
 
     mock_facade = MagicMock()
     mock_facade.get_presigned_url_for_cap.return_value = "http://example.com/test.jpg"
@@ -95,3 +99,64 @@ def test_query_image_rejects_non_image_file(client: TestClient) -> None:
 def test_query_image_missing_file(client: TestClient) -> None:
     response = client.post("/similarity/query-image")
     assert response.status_code == 422
+
+
+def test_query_images_returns_results_per_file(client: TestClient) -> None:
+    with open("tests/data/test_image.jpg", "rb") as f:
+        image_bytes = f.read()
+
+    files = [
+        ("files", ("first.jpg", image_bytes, "image/jpeg")),
+        ("files", ("second.jpg", image_bytes, "image/jpeg")),
+    ]
+    response = client.post("/similarity/query-images", files=files)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["filename"] for item in data] == ["first.jpg", "second.jpg"]
+    assert len(data[0]["matches"]) == 1
+    assert data[0]["matches"][0]["id"] == 1
+    assert data[1]["matches"] == []
+
+
+def test_query_images_rejects_non_image_file(client: TestClient) -> None:
+    files = [
+        ("files", ("image.jpg", b"data", "image/jpeg")),
+        ("files", ("not_image.txt", b"text content", "text/plain")),
+    ]
+    response = client.post("/similarity/query-images", files=files)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Only image uploads are allowed."
+
+
+def test_query_image_returns_503_when_inference_queue_full() -> None:
+    app = FastAPI()
+    app.include_router(router)
+
+    mock_query_service = MagicMock()
+    mock_query_service.query_image = AsyncMock(side_effect=InferenceQueueFullError())
+
+    app.dependency_overrides[get_query_service] = lambda: mock_query_service
+    app.dependency_overrides[get_beer_cap_facade] = lambda: MagicMock()
+    app.dependency_overrides[verify_admin] = lambda: None
+
+    files = {"file": ("test_image.jpg", b"data", "image/jpeg")}
+    response = TestClient(app).post("/similarity/query-image", files=files)
+
+    assert response.status_code == 503
+
+
+def test_query_image_forwards_index_search_parameters(client: TestClient) -> None:
+    files = {"file": ("test_image.jpg", b"data", "image/jpeg")}
+    response = client.post(
+        "/similarity/query-image",
+        files=files,
+        params={"nprobe": 32, "ef_search": 128},
+    )
+
+    assert response.status_code == 200
+    query_service = client.app.dependency_overrides[get_query_service]()
+    _, kwargs = query_service.query_image.call_args
+    assert kwargs["nprobe"] == 32
+    assert kwargs["ef_search"] == 128
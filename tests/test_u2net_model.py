@@ -0,0 +1,24 @@
+import pytest
+import torch
+
+from src.utils.u2net_model import U2NET, U2NETP
+
+
+@pytest.mark.parametrize("model_class", [U2NET, U2NETP])
+def test_fused_output_only_matches_full_output(model_class):
+    torch.manual_seed(0)
+    model = model_class(3, 1).eval()
+    batch = torch.rand((2, 3, 64, 64))
+
+    with torch.inference_mode():
+        full = model(batch)
+        model.fused_output_only = True
+        fused = model(batch)
+        fused_channels_last = model.to(memory_format=torch.channels_last)(
+            batch.contiguous(memory_format=torch.channels_last)
+        )
+
+    assert len(full) == 7
+    assert len(fused) == 1
+    assert torch.equal(fused[0], full[0])
+    assert torch.allclose(fused_channels_last[0], full[0], atol=1e-5)